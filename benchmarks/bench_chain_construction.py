@@ -0,0 +1,88 @@
+"""
+Per-call overhead of rebuilding chains (and schemas) inside graph nodes.
+
+Measures what every node call used to pay before the chains were built once at
+engine init: redefining the pydantic schema, with_structured_output() and the
+prompt | model composition, next to reading the chain prebuilt by DocGen. No
+request is sent.
+
+Run from the repository root: uv run python benchmarks/bench_chain_construction.py
+"""
+
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+import stubs  # noqa: F401  (sets placeholder credentials)
+from langchain_core.output_parsers import StrOutputParser
+from pydantic import BaseModel, Field
+
+from graph_examples.doc_generator.doc_gen import DocGen, EvaluationResult
+from graph_examples.doc_generator.doc_gen_prompts import (
+    PROMPT_FOR_CLARITY_EVALUATION,
+    PROMPT_FOR_OUTLINE_VALIDATION,
+    PROMPT_FOR_TOPIC_VALIDATION,
+)
+from graph_examples.rag_search.rag_search_prompts import PROMPT_FOR_ANSWER
+
+NUMBER = 200
+
+
+def main() -> None:
+    """
+    Print the average cost of building each chain per node call.
+    """
+    doc_gen = DocGen()
+    gllm_41 = doc_gen._gllm_41
+    gllm_41_mini = doc_gen._gllm_41_mini
+
+    def topic_chain() -> Any:
+        class TopicValidationResponse(BaseModel):
+            is_topic_valid: bool = Field(description="True if the topic is valid")
+
+        return PROMPT_FOR_TOPIC_VALIDATION | gllm_41_mini.with_structured_output(
+            TopicValidationResponse
+        )
+
+    def outline_validation_chain() -> Any:
+        class OutlineValidationResponse(BaseModel):
+            is_outline_valid: bool = Field(description="True if valid")
+            reason: str = Field(description="Explanation")
+
+        return PROMPT_FOR_OUTLINE_VALIDATION | gllm_41.with_structured_output(
+            OutlineValidationResponse
+        )
+
+    def evaluator_chain() -> Any:
+        return PROMPT_FOR_CLARITY_EVALUATION | gllm_41.with_structured_output(
+            EvaluationResult
+        )
+
+    def answer_chain() -> Any:
+        return PROMPT_FOR_ANSWER | gllm_41 | StrOutputParser()
+
+    # (rebuilt per call, prebuilt chain read from the engine or None)
+    builders: dict[str, tuple[Callable[[], Any], Callable[[], Any] | None]] = {
+        "DocGen._draft topic chain": (topic_chain, lambda: doc_gen._topic_chain),
+        "DocGen._validate chain": (
+            outline_validation_chain,
+            lambda: doc_gen._outline_validation_chain,
+        ),
+        "DocGen._eval_* chain (x3 per run)": (
+            evaluator_chain,
+            lambda: doc_gen._clarity_chain,
+        ),
+        # Building a RagSearch opens the vector store, only the rebuild is timed
+        "RagSearch._answer_* chain (x2 per query)": (answer_chain, None),
+    }
+    for name, (build, prebuilt) in builders.items():
+        seconds = timeit.timeit(build, number=NUMBER) / NUMBER
+        line = f"{name:<42} rebuilt {seconds * 1e6:10.1f} us per call"
+        if prebuilt is not None:
+            seconds = timeit.timeit(prebuilt, number=NUMBER) / NUMBER
+            line += f"   prebuilt {seconds * 1e6:6.2f} us per call"
+        print(line)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
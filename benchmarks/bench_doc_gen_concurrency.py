@@ -0,0 +1,55 @@
+"""
+Throughput of one shared DocGen engine for N simultaneous topics.
+
+Every model call is a stub that waits STUB_DELAY seconds. With async nodes the
+wall time stays close to one pipeline run for any N, so throughput scales with N.
+A run that serialises would take N times as long.
+
+Run from the repository root: uv run python benchmarks/bench_doc_gen_concurrency.py
+"""
+
+import asyncio
+import time
+
+from stubs import StubChatModel
+
+from graph_examples.doc_generator.doc_gen import DocGen, DocGenOptions
+
+STUB_DELAY = 0.2
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32)
+
+
+class StubDocGen(DocGen):
+    """
+    DocGen whose model clients are replaced by stubs.
+    """
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = StubChatModel(delay=STUB_DELAY)
+        self._gllm_41_mini = StubChatModel(delay=STUB_DELAY)
+        self._gllm_41_nano = StubChatModel(delay=STUB_DELAY)
+
+
+async def _run(doc_gen: DocGen, n: int) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(doc_gen.respond(f"The history of topic number {i}") for i in range(n))
+    )
+    elapsed = time.perf_counter() - start
+    assert all(response for response, _ in results)
+    return elapsed
+
+
+async def main() -> None:
+    """
+    Print wall time and throughput for each concurrency level.
+    """
+    doc_gen = StubDocGen(DocGenOptions())
+    print(f"{'N':>4} {'wall (s)':>10} {'topics/s':>10}")  # noqa: T201
+    for n in CONCURRENCY_LEVELS:
+        elapsed = await _run(doc_gen, n)
+        print(f"{n:>4} {elapsed:>10.2f} {n / elapsed:>10.2f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
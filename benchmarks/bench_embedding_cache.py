@@ -0,0 +1,120 @@
+"""
+Embedding requests and latency with the embedding cache, cold and warm.
+
+"cold ingest" embeds every chunk. "duplicate upload" ingests copies of the files
+under other names, "rebuilt store" ingests the files again into an empty vector
+store and "repeated queries" searches the same queries twice; all of them are
+served from the cache. The stub model answers after REQUEST_DELAY seconds.
+
+Run from the repository root: uv run python benchmarks/bench_embedding_cache.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable
+
+from bench_ingestion import CHUNK_SIZE, OPTIONS, REQUEST_DELAY, write_files
+from langchain_chroma import Chroma
+from stubs import StubEmbeddings
+
+from graph_examples.embedding_cache import SQLiteEmbeddingCache, with_embedding_cache
+from graph_examples.rag_search.bm25_index import BM25_INDEX_FILENAME, BM25Index
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.ingestion import IngestionOptions
+from graph_examples.rag_search.ingestion_manifest import (
+    MANIFEST_FILENAME,
+    IngestionManifest,
+)
+
+QUERIES = 20
+
+
+class CachedStubChromaInterface(ChromaInterface):
+    """
+    ChromaInterface with the stub embeddings behind the embedding cache.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        cache: SQLiteEmbeddingCache,
+        embeddings: StubEmbeddings,
+        options: IngestionOptions,
+    ) -> None:
+        self.directory = directory
+        self.cache = cache
+        self.embeddings = embeddings
+        super().__init__(options)
+
+    def _intialize(self) -> None:
+        self.client = Chroma(
+            collection_name="benchmark",
+            embedding_function=with_embedding_cache(self.embeddings, self.cache),
+            persist_directory=self.directory,
+        )
+        self.manifest = IngestionManifest(
+            os.path.join(self.directory, MANIFEST_FILENAME)
+        )
+        self.bm25_index = BM25Index(os.path.join(self.directory, BM25_INDEX_FILENAME))
+
+
+def _measure(name: str, embeddings: StubEmbeddings, fn: Callable[[], object]) -> None:
+    requests = embeddings.requests
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(  # noqa: T201
+        f"{name:<18} {elapsed:6.2f}s  "
+        f"{embeddings.requests - requests:3d} embedding requests"
+    )
+
+
+def main() -> None:
+    """
+    Print the embedding requests of cold and cached ingestion and search.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_files(tmp)
+        copies = []
+        for file in files:
+            copy = os.path.join(tmp, f"copy_{os.path.basename(file)}")
+            shutil.copyfile(file, copy)
+            copies.append(copy)
+        queries = [f"query about chunk {i}" for i in range(QUERIES)]
+
+        cache = SQLiteEmbeddingCache(os.path.join(tmp, "embedding_cache.sqlite"))
+        embeddings = StubEmbeddings(delay=REQUEST_DELAY)
+        interface = CachedStubChromaInterface(
+            os.path.join(tmp, "store"), cache, embeddings, OPTIONS
+        )
+        # Start the process pool outside of the measurement, like a warm app
+        interface.ingest_many(files[:1], CHUNK_SIZE)
+        interface._delete_file("document_0")
+        cache.clear()
+
+        _measure(
+            "cold ingest", embeddings, lambda: interface.ingest_many(files, CHUNK_SIZE)
+        )
+        _measure(
+            "duplicate upload",
+            embeddings,
+            lambda: interface.ingest_many(copies, CHUNK_SIZE),
+        )
+
+        rebuilt = CachedStubChromaInterface(
+            os.path.join(tmp, "rebuilt"), cache, embeddings, OPTIONS
+        )
+        _measure(
+            "rebuilt store", embeddings, lambda: rebuilt.ingest_many(files, CHUNK_SIZE)
+        )
+
+        for name in ("queries", "repeated queries"):
+            _measure(name, embeddings, lambda: [rebuilt.search(q) for q in queries])
+
+        print(f"hit rate {cache.hit_rate():.0%}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
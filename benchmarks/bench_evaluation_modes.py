@@ -0,0 +1,99 @@
+"""
+Separate gpt-4.1 evaluators vs the combined evaluator with escalation.
+
+The stub gpt-4.1 answers after GPT41_DELAY seconds and the smaller tiers after
+MINI_DELAY seconds. Every evaluator call sends the whole document, so the
+number of gpt-4.1 evaluator calls is the number of times the document tokens
+are paid for at the gpt-4.1 rate.
+
+Run from the repository root: uv run python benchmarks/bench_evaluation_modes.py
+"""
+
+import asyncio
+import os
+import time
+
+from stubs import StubChatModel
+
+from graph_examples.doc_generator.doc_gen import (
+    DocGen,
+    DocGenOptions,
+    EvaluationResult,
+)
+
+os.environ["LLM_CACHE"] = "off"
+
+GPT41_DELAY = 0.6
+MINI_DELAY = 0.3
+RUNS = 5
+
+
+class StubDocGen(DocGen):
+    """
+    DocGen whose model clients are replaced by stubs with tiered latency.
+    """
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = StubChatModel(delay=GPT41_DELAY)
+        self._gllm_41_mini = StubChatModel(delay=MINI_DELAY)
+        self._gllm_41_nano = StubChatModel(delay=MINI_DELAY)
+
+
+class AlwaysEscalatingDocGen(StubDocGen):
+    """
+    Worst case of the combined mode: every score is borderline.
+    """
+
+    def _is_borderline(
+        self, name: str, result: EvaluationResult, safety_confidence: float
+    ) -> bool:
+        return True
+
+
+async def _measure(doc_gen: StubDocGen) -> tuple[float, float]:
+    """
+    Returns the average evaluation seconds and gpt-4.1 evaluator calls per run.
+    """
+    evaluation_seconds = 0.0
+    gpt41_calls = 0
+    for _ in range(RUNS):
+        state = {
+            "topic": "The history of tea",
+            "document": "Stub document text about the topic. " * 20,
+        }
+        calls_before = doc_gen._gllm_41.calls
+        start = time.perf_counter()
+        if doc_gen.options.evaluation_mode == "combined":
+            await doc_gen._evaluate(state)
+        else:
+            await asyncio.gather(
+                doc_gen._eval_clarity(state),
+                doc_gen._eval_relevance(state),
+                doc_gen._eval_safety(state),
+            )
+        evaluation_seconds += time.perf_counter() - start
+        gpt41_calls += doc_gen._gllm_41.calls - calls_before
+    return evaluation_seconds / RUNS, gpt41_calls / RUNS
+
+
+async def main() -> None:
+    """
+    Print evaluation latency and gpt-4.1 evaluator calls per run for each mode.
+    """
+    variants = {
+        "separate (3x gpt-4.1)": StubDocGen(DocGenOptions()),
+        "combined, no escalation": StubDocGen(
+            DocGenOptions(evaluation_mode="combined")
+        ),
+        "combined, all escalated": AlwaysEscalatingDocGen(
+            DocGenOptions(evaluation_mode="combined")
+        ),
+    }
+    print(f"{'mode':<26} {'latency (s)':>12} {'gpt-4.1 calls':>14}")  # noqa: T201
+    for name, doc_gen in variants.items():
+        seconds, calls = await _measure(doc_gen)
+        print(f"{name:<26} {seconds:>12.2f} {calls:>14.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
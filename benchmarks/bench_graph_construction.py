@@ -0,0 +1,71 @@
+"""
+Constructor latency of the example graphs with and without diagram rendering.
+
+"without" reproduces the previous behaviour (constructor + mermaid PNG render on
+every instantiation), "with" is the constructor alone now that rendering lives in
+the `render_graphs` entry point.
+
+Run from the repository root: uv run python benchmarks/bench_graph_construction.py
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+# The constructors only need the variables to be present, no request is sent
+os.environ.setdefault("GITHUB_INFERENCE_ENDPOINT", "https://models.github.ai/inference")
+os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+
+from graph_examples.doc_generator.doc_gen import DocGen  # noqa: E402
+from graph_examples.rag_search.rag_search import RagSearch  # noqa: E402
+
+ROUNDS = 5
+
+
+def _construct(cls: Callable[[], Any]) -> None:
+    cls()
+
+
+def _construct_and_render(cls: Callable[[], Any], output: Path) -> None:
+    instance = cls()
+    try:
+        output.write_bytes(instance.graph.get_graph().draw_mermaid_png())
+    except Exception:
+        # The old constructors logged and swallowed render failures too
+        pass
+
+
+def _measure(fn: Callable[[], None]) -> list[float]:
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    """
+    Print median constructor latency for DocGen and RagSearch.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "graph.png"
+        for name, cls in (("DocGen", DocGen), ("RagSearch", RagSearch)):
+            without_change = _measure(lambda c=cls: _construct_and_render(c, output))
+            with_change = _measure(lambda c=cls: _construct(c))
+            print(  # noqa: T201
+                f"{name:<10} render in constructor: "
+                f"{statistics.median(without_change) * 1000:8.1f} ms   "
+                f"constructor only: {statistics.median(with_change) * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
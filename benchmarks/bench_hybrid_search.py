@@ -0,0 +1,252 @@
+"""
+Recall@k and latency of the dense, sparse (BM25) and hybrid (RRF) search.
+
+The corpus mimics a set of manuals: maintenance instructions repeated for
+PARTS part numbers, which differ almost only by the part number, and general
+guidance paragraphs. "part" queries ask about one part number, "paraphrase"
+queries ask about a guidance paragraph in other words than the paragraph.
+
+The dense model is a stub with the usual strengths and weaknesses of embedding
+models: it maps synonyms to the same direction, but sees rare identifiers such
+as part numbers only as a few low-weight subword pieces. It answers
+immediately, so the latencies are the search cost only.
+
+Run from the repository root: uv run python benchmarks/bench_hybrid_search.py
+"""
+
+import hashlib
+import math
+import os
+import random
+import re
+import tempfile
+import time
+
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from graph_examples.rag_search.bm25_index import BM25_INDEX_FILENAME, BM25Index
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.ingestion import IngestionOptions
+from graph_examples.rag_search.ingestion_manifest import (
+    MANIFEST_FILENAME,
+    IngestionManifest,
+)
+from graph_examples.rag_search.types import SearchMode
+
+PARTS = 30
+CHUNK_SIZE = 24
+DIMENSION = 256
+RECALL_AT = (1, 3, 6)
+IDENTIFIER_WEIGHT = 0.3
+
+_MAINTENANCE = (
+    "Replace the air filter of the {part} every {hours} hours of operation.",
+    "Check the drive belt tension of the {part} after {hours} hours.",
+    "Flush the coolant pump of the {part} once every {hours} hours.",
+)
+
+# (guidance paragraph, paraphrased query)
+_GUIDANCE = (
+    (
+        "Store spare batteries in a dry room below 25 degrees.",
+        "where should accumulators be kept",
+    ),
+    (
+        "Wear protective gloves when handling hydraulic fluid.",
+        "safety equipment for touching oil in the hydraulics",
+    ),
+    (
+        "Dispose of used oil at a certified recycling center.",
+        "how to get rid of old lubricant",
+    ),
+    (
+        "Disconnect the mains power before opening the housing.",
+        "switch off electricity before removing the cover",
+    ),
+    (
+        "Clean the sensor lens with a soft cloth and isopropyl alcohol.",
+        "wipe the camera glass",
+    ),
+    (
+        "Tighten the mounting bolts to 40 newton meters.",
+        "torque for the fixing screws",
+    ),
+    (
+        "Lubricate the bearings monthly with lithium grease.",
+        "how often to oil the rollers",
+    ),
+    (
+        "Report unusual vibration to the service team immediately.",
+        "who to contact about shaking",
+    ),
+)
+
+# Words the stub model maps to the same concept
+_SYNONYMS = (
+    {"battery", "batteries", "accumulator", "accumulators"},
+    {"store", "kept", "keep"},
+    {"gloves", "equipment", "protective", "safety"},
+    {"handling", "touching"},
+    {"fluid", "oil", "lubricant", "grease", "lubricate"},
+    {"hydraulic", "hydraulics"},
+    {"dispose", "rid"},
+    {"used", "old"},
+    {"disconnect", "switch", "off"},
+    {"mains", "power", "electricity"},
+    {"opening", "removing"},
+    {"housing", "cover"},
+    {"clean", "wipe"},
+    {"sensor", "camera"},
+    {"lens", "glass"},
+    {"tighten", "torque"},
+    {"mounting", "fixing"},
+    {"bolts", "screws"},
+    {"bearings", "rollers"},
+    {"monthly", "often"},
+    {"report", "contact"},
+    {"service", "team", "who"},
+    {"vibration", "shaking"},
+)
+_CONCEPTS = {word: min(group) for group in _SYNONYMS for word in group}
+_STOP_WORDS = {"a", "the", "of", "to", "at", "in", "with", "for", "and", "be", "how"}
+
+
+class ConceptEmbeddings(Embeddings):
+    """
+    Bag of concepts embeddings: synonyms share a dimension, identifiers blur.
+    """
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * DIMENSION
+        for token in re.findall(r"[\w-]+", text.lower()):
+            if token in _STOP_WORDS:
+                continue
+            if any(c.isdigit() for c in token):
+                # Rare identifiers are split into subword pieces shared with
+                # other identifiers, which carry little weight
+                pieces = re.findall(r"[a-z]+|\d{1,2}", token)
+                weight = IDENTIFIER_WEIGHT
+            else:
+                pieces = [_CONCEPTS.get(token, token)]
+                weight = 1.0
+            for piece in pieces:
+                digest = hashlib.sha256(piece.encode()).digest()
+                vector[int.from_bytes(digest[:4]) % DIMENSION] += weight
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed documents.
+        """
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embed a query.
+        """
+        return self._embed(text)
+
+
+class StubChromaInterface(ChromaInterface):
+    """
+    ChromaInterface storing in a temporary directory with the stub embeddings.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        super().__init__(IngestionOptions(embedding_requests_per_second=1000))
+
+    def _intialize(self) -> None:
+        self.client = Chroma(
+            collection_name="benchmark",
+            embedding_function=ConceptEmbeddings(),
+            persist_directory=self.directory,
+            collection_metadata={"hnsw:space": "cosine"},
+        )
+        self.manifest = IngestionManifest(
+            os.path.join(self.directory, MANIFEST_FILENAME)
+        )
+        self.bm25_index = BM25Index(os.path.join(self.directory, BM25_INDEX_FILENAME))
+
+
+def _write_corpus(directory: str) -> tuple[list[str], list[tuple[str, str]]]:
+    """
+    Write the manuals, returns their paths and the (query, relevant text) pairs.
+    """
+    rng = random.Random(0)
+    parts = [f"XJ-{rng.randint(1000, 9999)}" for _ in range(PARTS)]
+    queries = []
+    paragraphs = []
+    for part in parts:
+        for template in _MAINTENANCE:
+            paragraph = template.format(part=part, hours=rng.choice((100, 250, 500)))
+            paragraphs.append(paragraph)
+        # Ask about one instruction of the part, in the words of the manual
+        template = rng.choice(_MAINTENANCE)
+        topic = " ".join(template.split()[1:4])
+        relevant = next(p for p in paragraphs[-3:] if topic in p)
+        queries.append((f"{topic} {part}", relevant))
+    for paragraph, query in _GUIDANCE:
+        paragraphs.append(paragraph)
+        queries.append((query, paragraph))
+
+    rng.shuffle(paragraphs)
+    files = []
+    for i in range(0, len(paragraphs), 20):
+        path = os.path.join(directory, f"manual_{i // 20}.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n\n".join(paragraphs[i : i + 20]))
+        files.append(path)
+    return files, queries
+
+
+def _evaluate(
+    chroma: ChromaInterface, mode: SearchMode, queries: list[tuple[str, str]]
+) -> tuple[list[float], float]:
+    hits = dict.fromkeys(RECALL_AT, 0)
+    start = time.perf_counter()
+    for query, relevant in queries:
+        results = chroma.search(query, k=max(RECALL_AT), mode=mode)
+        rank = next(
+            (
+                i
+                for i, (document, _) in enumerate(results)
+                if relevant in document.page_content
+            ),
+            None,
+        )
+        for k in RECALL_AT:
+            hits[k] += rank is not None and rank < k
+    elapsed = time.perf_counter() - start
+    return [hits[k] / len(queries) for k in RECALL_AT], elapsed / len(queries)
+
+
+def main() -> None:
+    """
+    Print recall@k and mean latency of every search mode, per kind of query.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        files, queries = _write_corpus(tmp)
+        chroma = StubChromaInterface(os.path.join(tmp, "store"))
+        chroma.ingest_many(files, CHUNK_SIZE)
+
+        header = "   ".join(f"recall@{k}" for k in RECALL_AT)
+        print(f"{'queries':<11} {'mode':<7} {header}   latency")  # noqa: T201
+        for kind, subset in (
+            ("part", queries[:PARTS]),
+            ("paraphrase", queries[PARTS:]),
+            ("all", queries),
+        ):
+            for mode in ("dense", "sparse", "hybrid"):
+                recall, latency = _evaluate(chroma, mode, subset)
+                print(  # noqa: T201
+                    f"{kind:<11} {mode:<7} "
+                    + "   ".join(f"{value:8.2f}" for value in recall)
+                    + f"   {latency * 1000:5.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
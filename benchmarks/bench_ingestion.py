@@ -0,0 +1,177 @@
+"""
+Ingestion throughput of the sequential ingestion vs the ingestion pipeline.
+
+"sequential" reproduces the previous ingestion: files one after another, split
+in the calling process, a tiktoken lookup and encode per chunk and embedding
+batches sent one after another. "pipeline" is ChromaInterface.ingest_many:
+files split in the process pool, token counts computed once per chunk and
+embedding batches sent concurrently under the rate limit. Both embed with a
+stub model answering after REQUEST_DELAY seconds per request.
+
+"incremental" then edits one paragraph of one file and ingests it again; only
+the chunks whose text changed are embedded.
+
+Run from the repository root: uv run python benchmarks/bench_ingestion.py
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import tiktoken
+from langchain_chroma import Chroma
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from stubs import StubEmbeddings
+
+from graph_examples.rag_search.bm25_index import BM25_INDEX_FILENAME, BM25Index
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.ingestion import IngestionOptions
+from graph_examples.rag_search.ingestion_manifest import (
+    MANIFEST_FILENAME,
+    IngestionManifest,
+)
+
+FILES = 8
+PARAGRAPHS = 200
+WORDS_PER_PARAGRAPH = 80
+CHUNK_SIZE = 512
+REQUEST_DELAY = 0.25
+OPTIONS = IngestionOptions(embedding_concurrency=4, embedding_requests_per_second=8)
+
+_VOCABULARY = (
+    "vector search embedding chunk document retrieval answer query model index "
+    "token batch latency network storage cache memory process thread pipeline "
+    "data text file page section result score rank system user request"
+).split()
+
+
+class StubChromaInterface(ChromaInterface):
+    """
+    ChromaInterface storing in a temporary directory with the stub embeddings.
+    """
+
+    def __init__(self, directory: str, options: IngestionOptions) -> None:
+        self.directory = directory
+        self.embeddings = StubEmbeddings(delay=REQUEST_DELAY)
+        super().__init__(options)
+
+    def _intialize(self) -> None:
+        self.client = Chroma(
+            collection_name="benchmark",
+            embedding_function=self.embeddings,
+            persist_directory=self.directory,
+        )
+        self.manifest = IngestionManifest(
+            os.path.join(self.directory, MANIFEST_FILENAME)
+        )
+        self.bm25_index = BM25Index(os.path.join(self.directory, BM25_INDEX_FILENAME))
+
+
+def write_files(directory: str) -> list[str]:
+    """
+    Write FILES text files of random paragraphs and return their paths.
+    """
+    rng = random.Random(0)
+    files = []
+    for i in range(FILES):
+        path = os.path.join(directory, f"document_{i}.txt")
+        paragraphs = [
+            " ".join(rng.choices(_VOCABULARY, k=WORDS_PER_PARAGRAPH)) + "."
+            for _ in range(PARAGRAPHS)
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n\n".join(paragraphs))
+        files.append(path)
+    return files
+
+
+def _ingest_sequential(client: Chroma, files: list[str]) -> int:
+    # The ingestion before the pipeline, one file and one batch at a time
+    chunk_count = 0
+    for file in files:
+        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name="cl100k_base",
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_SIZE // 8,
+        )
+        chunks = TextLoader(file).load_and_split(text_splitter=text_splitter)
+        chunk_count += len(chunks)
+        batch_chunk = []
+        chunk_ids = []
+        batch_size = 0
+        for i, chunk in enumerate(chunks):
+            size = len(tiktoken.get_encoding("cl100k_base").encode(chunk.page_content))
+            chunk_id = f"{os.path.basename(file)}_{CHUNK_SIZE}_{i}"
+            if batch_size + size < 8192:
+                chunk_ids.append(chunk_id)
+                batch_chunk.append(chunk)
+                batch_size += size
+            else:
+                client.add_documents(batch_chunk, ids=chunk_ids)
+                batch_chunk = [chunk]
+                chunk_ids = [chunk_id]
+                batch_size = size
+        if batch_chunk:
+            client.add_documents(batch_chunk, ids=chunk_ids)
+    return chunk_count
+
+
+def _edit_paragraph(path: str) -> None:
+    with open(path, encoding="utf-8") as file:
+        paragraphs = file.read().split("\n\n")
+    paragraphs[len(paragraphs) // 2] = "An edited paragraph about the benchmark."
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n\n".join(paragraphs))
+
+
+def _report(name: str, chunks: int, elapsed: float, embeddings: StubEmbeddings) -> None:
+    print(  # noqa: T201
+        f"{name:<12} {chunks:5d} chunks in {elapsed:6.2f}s  "
+        f"{chunks / elapsed:7.1f} chunks/s  {embeddings.requests:3d} embedding requests"
+    )
+
+
+def main() -> None:
+    """
+    Print ingestion throughput and embedding requests of both ingestion paths.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_files(tmp)
+
+        embeddings = StubEmbeddings(delay=REQUEST_DELAY)
+        client = Chroma(
+            collection_name="sequential",
+            embedding_function=embeddings,
+            persist_directory=os.path.join(tmp, "sequential"),
+        )
+        start = time.perf_counter()
+        chunks = _ingest_sequential(client, files)
+        _report("sequential", chunks, time.perf_counter() - start, embeddings)
+
+        interface = StubChromaInterface(os.path.join(tmp, "pipeline"), OPTIONS)
+        # Start the process pool outside of the measurement, like a warm app
+        interface.ingest_many([files[0]], CHUNK_SIZE)
+        interface._delete_file("document_0")
+        interface.embeddings.requests = 0
+        start = time.perf_counter()
+        interface.ingest_many(files, CHUNK_SIZE)
+        elapsed = time.perf_counter() - start
+        chunks = sum(entry.chunk_count for entry in interface.manifest.files())
+        _report("pipeline", chunks, elapsed, interface.embeddings)
+
+        _edit_paragraph(files[0])
+        interface.embeddings.requests = 0
+        interface.embeddings.texts = 0
+        start = time.perf_counter()
+        status = interface.ingest(files[0], CHUNK_SIZE)
+        elapsed = time.perf_counter() - start
+        print(  # noqa: T201
+            f"incremental  {status} in {elapsed:.2f}s, "
+            f"{interface.embeddings.requests} embedding requests"
+        )
+
+
+if __name__ == "__main__":
+    main()
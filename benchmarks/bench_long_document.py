@@ -0,0 +1,114 @@
+"""
+Wall time and peak memory of the hierarchical mode for growing outlines.
+
+The stub outline has MAIN_POINTS main points with three subsections of three
+leaves each, so a 16 point outline has about 150 leaves (a 50 page document).
+Every model call waits STUB_DELAY seconds. The leaves take about
+leaves / max_concurrency model calls, so with the default max_concurrency of 4
+the wall time grows linearly with the outline. Only with max_concurrency at
+least the number of leaves does it stay close to four model calls (outline,
+summary, leaves, evaluators). Peak memory also grows linearly: every leaf draft
+is kept in the state until the document is stitched, next to the streamed text.
+
+Run from the repository root: uv run python benchmarks/bench_long_document.py
+"""
+
+import asyncio
+import os
+import time
+import tracemalloc
+
+from langchain_core.messages import BaseMessage
+from stubs import STUB_OUTLINE, StubChatModel
+
+from graph_examples.doc_generator.doc_gen import DocGen, DocGenOptions
+
+os.environ["LLM_CACHE"] = "off"
+
+STUB_DELAY = 0.2
+MAIN_POINTS = (2, 4, 8, 16)
+CONCURRENCY_LEVELS = (DocGenOptions().max_concurrency, 256)
+
+
+def long_outline(main_points: int) -> str:
+    """
+    Returns a valid outline with main_points main points three levels deep.
+    """
+    lines = ["1. Introduction", "1.1 Background", "1.2 Scope"]
+    for point in range(2, main_points + 2):
+        lines.append(f"{point}. Main point {point}")
+        for sub in range(1, 4):
+            lines.append(f"{point}.{sub} Subsection {point}.{sub}")
+            lines.extend(
+                f"{point}.{sub}.{leaf} Detail {point}.{sub}.{leaf}"
+                for leaf in range(1, 4)
+            )
+    conclusion = main_points + 2
+    lines += [f"{conclusion}. Conclusion", f"{conclusion}.1 Summary"]
+    return "\n".join(lines)
+
+
+class LongOutlineModel(StubChatModel):
+    """
+    Stub model answering outline prompts with a long outline.
+    """
+
+    outline: str = ""
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        reply = super()._reply(messages)
+        return self.outline if reply == STUB_OUTLINE else reply
+
+
+class StubDocGen(DocGen):
+    """
+    DocGen in hierarchical mode whose model clients are replaced by stubs.
+    """
+
+    outline = ""
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = LongOutlineModel(delay=STUB_DELAY, outline=self.outline)
+        self._gllm_41_mini = StubChatModel(delay=STUB_DELAY)
+        self._gllm_41_nano = StubChatModel(delay=STUB_DELAY)
+
+
+async def _stream(doc_gen: DocGen) -> str:
+    response = ""
+    async for text, _ in doc_gen.astream_document("The history of tea"):
+        response = text
+    return response
+
+
+async def main() -> None:
+    """
+    Print the leaves, wall time per max_concurrency and peak traced memory for
+    each outline size.
+    """
+    walls = " ".join(f"{f'wall@{n} (s)':>12}" for n in CONCURRENCY_LEVELS)
+    print(f"{'points':>6} {'leaves':>7} {walls} {'peak MiB':>9}")  # noqa: T201
+    for main_points in MAIN_POINTS:
+        StubDocGen.outline = long_outline(main_points)
+        leaves = 3 + 9 * main_points
+        elapsed = []
+        for max_concurrency in CONCURRENCY_LEVELS:
+            doc_gen = StubDocGen(
+                DocGenOptions(
+                    generation_mode="hierarchical", max_concurrency=max_concurrency
+                )
+            )
+            start = time.perf_counter()
+            response = await _stream(doc_gen)
+            elapsed.append(time.perf_counter() - start)
+            assert response.startswith("1. Introduction"), response[:80]
+        # Traced separately, tracemalloc slows the run down several times
+        tracemalloc.start()
+        await _stream(doc_gen)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        walls = " ".join(f"{seconds:>12.2f}" for seconds in elapsed)
+        print(f"{main_points:>6} {leaves:>7} {walls} {peak / 2**20:>9.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
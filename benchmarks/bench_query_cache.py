@@ -0,0 +1,137 @@
+"""
+Query latency of repeated popular queries with and without the query cache.
+
+The workload draws QUERIES queries from POPULAR distinct questions with a
+Zipf-like popularity, in random case and spacing, and ingests a file half way
+through. "no cache" embeds, searches and reranks every query. "query cache"
+serves repeated queries from the cache until the ingestion bumps the vector
+store generation, after which every query is searched again once.
+
+The vector store answers after SEARCH_DELAY seconds (query embedding and
+similarity search) and the answer model after ANSWER_DELAY seconds. The
+reranker model is downloaded to the rag_search .cache folder on first use.
+
+Run from the repository root: uv run python benchmarks/bench_query_cache.py
+"""
+
+import os
+import random
+import threading
+import time
+
+from langchain_core.documents import Document
+from stubs import StubChatModel
+
+from graph_examples.logger import get_logger
+from graph_examples.metrics import Metrics
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.rag_search import RagSearch, RagSearchOptions
+from graph_examples.rag_search.types import SearchMode
+
+os.environ["LLM_CACHE"] = "off"
+
+SEARCH_DELAY = 0.15
+ANSWER_DELAY = 0.05
+POPULAR = 10
+QUERIES = 60
+
+
+class StubChroma(ChromaInterface):
+    """
+    Vector store returning fixed chunks after SEARCH_DELAY seconds.
+    """
+
+    def __init__(self) -> None:
+        self.logger = get_logger(__name__)
+        self.client = None
+        self.searches = 0
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def search(
+        self, query: str, k: int = 6, mode: SearchMode = "dense"
+    ) -> list[tuple[Document, float]]:
+        """
+        Returns fixed chunks of the current generation after SEARCH_DELAY seconds.
+        """
+        time.sleep(SEARCH_DELAY)
+        self.searches += 1
+        return [
+            (
+                Document(
+                    page_content=f"Passage {i} of generation {self.generation}. " * 40,
+                    metadata={"source": f"/data/document_{i % 3}.pdf"},
+                ),
+                0.2 + i / 20,
+            )
+            for i in range(6)
+        ]
+
+    def ingest(self, file: str, chunk_size: int) -> str:
+        """
+        Record a write to the vector store.
+        """
+        self._bump_generation()
+        return f"{file}: Successfully ingested"
+
+
+class StubRagSearch(RagSearch):
+    """
+    RagSearch whose model clients are replaced by stubs.
+    """
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = StubChatModel(delay=ANSWER_DELAY)
+        self._gllm_41_mini = StubChatModel(delay=ANSWER_DELAY)
+        self._gllm_41_nano = StubChatModel(delay=ANSWER_DELAY)
+        self._search_model = StubChatModel(delay=ANSWER_DELAY)
+
+
+def _workload() -> list[str]:
+    rng = random.Random(0)
+    questions = [f"What does document {i} say about retrieval?" for i in range(POPULAR)]
+    weights = [1 / (rank + 1) for rank in range(POPULAR)]
+    queries = []
+    for question in rng.choices(questions, weights=weights, k=QUERIES):
+        words = question.split()
+        if rng.random() < 0.5:
+            words[0] = words[0].lower()
+        queries.append(("  " if rng.random() < 0.3 else " ").join(words))
+    return queries
+
+
+def _run(name: str, options: RagSearchOptions, queries: list[str]) -> None:
+    chroma = StubChroma()
+    ChromaInterface._instance = chroma
+    engine = StubRagSearch(options)
+    metrics = Metrics(name)
+    stale = 0
+    for i, query in enumerate(queries):
+        if i == len(queries) // 2:
+            chroma.ingest("new_document.pdf", 512)
+        with metrics.timer("query_seconds"):
+            search_results, *_ = engine.respond(query)
+        # Results of the previous generation must never be served
+        stale += f"generation {chroma.generation}" not in (
+            search_results.results[0].document
+        )
+
+    p50 = metrics.percentile("query_seconds", 50) or 0.0
+    p95 = metrics.percentile("query_seconds", 95) or 0.0
+    print(  # noqa: T201
+        f"{name:<12} p50 {p50 * 1000:6.1f} ms   p95 {p95 * 1000:6.1f} ms   "
+        f"{chroma.searches:3d} searches   {stale} stale results"
+    )
+
+
+def main() -> None:
+    """
+    Print query latency and vector store searches with and without the cache.
+    """
+    queries = _workload()
+    _run("no cache", RagSearchOptions(query_cache_entries=0), queries)
+    _run("query cache", RagSearchOptions(), queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Latency and token usage of the direct retrieval vs the RAG agent retrieval.
+
+"agent" routes the query through create_agent: one LLM call emits the
+semantic_search tool call, a second one reads every retrieved chunk and echoes
+it back as ListOfSearchedResults. "direct" queries the vector store from the
+graph and builds the search results locally. Both modes then answer with the
+baseline and reranked documents.
+
+The vector store returns CHUNKS chunks after SEARCH_DELAY seconds. The stub
+models answer after MODEL_DELAY seconds plus their output tokens at
+OUTPUT_TOKENS_PER_SECOND, and report token usage at about 4 characters per
+token. The reranker model is downloaded to the rag_search .cache folder on
+first use.
+
+Run from the repository root: uv run python benchmarks/bench_rag_retrieval_modes.py
+"""
+
+import json
+import os
+import statistics
+import time
+from typing import Any
+
+from langchain_core.callbacks import (
+    CallbackManagerForLLMRun,
+    UsageMetadataCallbackHandler,
+)
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from stubs import StubChatModel
+
+from graph_examples.logger import get_logger
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.rag_search import RagSearch, RagSearchOptions
+from graph_examples.rag_search.types import SearchMode
+
+os.environ["LLM_CACHE"] = "off"
+
+CHUNKS = 6
+CHUNK_CHARACTERS = 2000  # about a 512 token chunk
+SEARCH_DELAY = 0.15
+MODEL_DELAY = 0.3
+OUTPUT_TOKENS_PER_SECOND = 1000.0
+QUERIES = 5
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _chunks(query: str) -> list[tuple[Document, float]]:
+    return [
+        (
+            Document(
+                page_content=(f"Chunk {i} for {query}. " * 200)[:CHUNK_CHARACTERS],
+                metadata={"source": f"/data/document_{i % 3}.pdf"},
+            ),
+            0.2 + i / 20,
+        )
+        for i in range(CHUNKS)
+    ]
+
+
+class StubChroma(ChromaInterface):
+    """
+    Vector store returning fixed chunks after the embedding and query delay.
+    """
+
+    def __init__(self) -> None:
+        self.logger = get_logger(__name__)
+        self.client = None
+
+    def search(
+        self, query: str, k: int = 6, mode: SearchMode = "dense"
+    ) -> list[tuple[Document, float]]:
+        """
+        Returns the fixed chunks after SEARCH_DELAY seconds.
+        """
+        time.sleep(SEARCH_DELAY)
+        return _chunks(query)
+
+
+class UsageStubChatModel(StubChatModel):
+    """
+    Stub model reporting token usage, and calling semantic_search like the agent.
+    """
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Runnable:
+        """
+        Returns the model itself, the stub knows the semantic_search tool.
+        """
+        return self
+
+    def _message(self, messages: list[BaseMessage]) -> AIMessage:
+        if "RAG search agent" in str(messages[0].content):
+            if not isinstance(messages[-1], ToolMessage):
+                message = AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": "semantic_search",
+                            "args": {"query": str(messages[-1].content)},
+                            "id": "call_search",
+                        }
+                    ],
+                )
+                output = json.dumps(message.tool_calls)
+            else:
+                tool_call = next(
+                    m for m in messages if isinstance(m, AIMessage) and m.tool_calls
+                ).tool_calls[0]
+                # The agent echoes every retrieved chunk as structured output
+                results = [
+                    {
+                        "document": document.page_content,
+                        "source": document.metadata["source"].split("/")[-1],
+                        "score": round(score, 3),
+                    }
+                    for document, score in _chunks(tool_call["args"]["query"])
+                ]
+                output = json.dumps({"results": results})
+                message = AIMessage(content=output)
+        else:
+            output = "Stub answer to the query."
+            message = AIMessage(content=output)
+
+        prompt = " ".join(str(m.content) for m in messages)
+        # The usage callback groups the usage by model name
+        message.response_metadata = {"model_name": "stub"}
+        message.usage_metadata = {
+            "input_tokens": _tokens(prompt),
+            "output_tokens": _tokens(output),
+            "total_tokens": _tokens(prompt) + _tokens(output),
+        }
+        time.sleep(self.delay + _tokens(output) / OUTPUT_TOKENS_PER_SECOND)
+        return message
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        message = self._message(messages)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class StubRagSearch(RagSearch):
+    """
+    RagSearch whose model clients are replaced by stubs reporting token usage.
+    """
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = UsageStubChatModel(delay=MODEL_DELAY)
+        self._gllm_41_mini = UsageStubChatModel(delay=MODEL_DELAY)
+        self._gllm_41_nano = UsageStubChatModel(delay=MODEL_DELAY)
+        self._search_model = UsageStubChatModel(delay=MODEL_DELAY)
+
+
+def _measure(engine: RagSearch) -> tuple[float, int, int]:
+    samples = []
+    handler = UsageMetadataCallbackHandler()
+    for i in range(QUERIES):
+        start = time.perf_counter()
+        engine.graph.invoke(
+            {"query": f"benchmark query {i}"}, config={"callbacks": [handler]}
+        )
+        samples.append(time.perf_counter() - start)
+    calls = sum(
+        model.calls
+        for model in (engine._gllm_41, engine._search_model)
+        if isinstance(model, StubChatModel)
+    )
+    total_tokens = sum(
+        usage["total_tokens"] for usage in handler.usage_metadata.values()
+    )
+    return statistics.median(samples), total_tokens // QUERIES, calls // QUERIES
+
+
+def main() -> None:
+    """
+    Print median latency, tokens and LLM calls per query for both retrieval modes.
+    """
+    ChromaInterface._instance = StubChroma()
+    for mode in ("agent", "direct"):
+        engine = StubRagSearch(
+            RagSearchOptions(retrieval_mode=mode, query_cache_entries=0)
+        )
+        latency, tokens, calls = _measure(engine)
+        print(  # noqa: T201
+            f"{mode:<7} median {latency * 1000:7.1f} ms   "
+            f"{tokens:6d} tokens/query   {calls} LLM calls/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
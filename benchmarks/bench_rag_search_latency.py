@@ -0,0 +1,129 @@
+"""
+p50/p95 query latency of RagSearch with a new engine per query vs a shared engine.
+
+"per query" reproduces the previous behaviour of the app: a RagSearch engine is
+built for every query and the reranker loads the flashrank ONNX model on every
+call. "shared" is the long-lived engine of RagSearch.get_instance(), whose
+reranker is loaded and warmed once. The retrieval and the answer model are
+stubs with a fixed delay, so the difference is the per query setup cost.
+
+The reranker model is downloaded to the rag_search .cache folder on first use.
+
+Run from the repository root: uv run python benchmarks/bench_rag_search_latency.py
+"""
+
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from flashrank import Ranker, RerankRequest
+from stubs import StubChatModel
+
+from graph_examples.metrics import Metrics
+from graph_examples.rag_search.rag_search import (
+    RANKER_CACHE_DIR,
+    RANKER_MODEL,
+    RagSearch,
+    RagSearchOptions,
+    State,
+)
+from graph_examples.rag_search.types import ListOfSearchedResults, SearchResult
+
+os.environ["LLM_CACHE"] = "off"
+
+SEARCH_DELAY = 0.1
+ANSWER_DELAY = 0.05
+QUERIES = 20
+WORKERS = 4
+# Queries repeat across runs, the query cache would skip the rerank
+OPTIONS = RagSearchOptions(query_cache_entries=0)
+
+_RESULTS = ListOfSearchedResults(
+    results=[
+        SearchResult(
+            document=f"Passage {i} about retrieval, reranking and answer quality. " * 8,
+            source=f"document_{i % 3}.pdf",
+            score=1.0 - i / 10,
+        )
+        for i in range(6)
+    ]
+)
+
+
+class StubRagSearch(RagSearch):
+    """
+    RagSearch whose vector store search and model clients are replaced by stubs.
+    """
+
+    def _initialize_models(self) -> None:
+        self._gllm_41 = StubChatModel(delay=ANSWER_DELAY)
+        self._gllm_41_mini = StubChatModel(delay=ANSWER_DELAY)
+        self._gllm_41_nano = StubChatModel(delay=ANSWER_DELAY)
+        self._search_model = StubChatModel(delay=SEARCH_DELAY)
+
+    def _retrieve(self, state: State) -> State:
+        time.sleep(SEARCH_DELAY)
+        return {"messages": [], "search_results": _RESULTS.model_copy(deep=True)}
+
+
+class PerQueryRagSearch(StubRagSearch):
+    """
+    Previous behaviour: no warm ranker, a new Ranker is loaded for every rerank.
+    """
+
+    def _initialize_ranker(self) -> None:
+        pass
+
+    def _rerank(
+        self, query: str, passages: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        ranker = Ranker(model_name=RANKER_MODEL, cache_dir=RANKER_CACHE_DIR)
+        return ranker.rerank(RerankRequest(query=query, passages=passages))
+
+
+def _per_query(query: str) -> None:
+    PerQueryRagSearch(OPTIONS).respond(query)
+
+
+def _run(name: str, respond: Callable[[str], Any], workers: int) -> None:
+    metrics = Metrics(name)
+
+    def timed(i: int) -> None:
+        with metrics.timer("query_seconds"):
+            respond(f"{name} query {i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(timed, range(QUERIES)))
+    elapsed = time.perf_counter() - start
+    p50 = metrics.percentile("query_seconds", 50) or 0.0
+    p95 = metrics.percentile("query_seconds", 95) or 0.0
+    print(  # noqa: T201
+        f"{name:<10} workers={workers}  p50 {p50 * 1000:7.1f} ms   "
+        f"p95 {p95 * 1000:7.1f} ms   {QUERIES / elapsed:5.1f} queries/s"
+    )
+
+
+def main() -> None:
+    """
+    Print p50/p95 query latency, sequential and with concurrent workers.
+    """
+    # Downloads the reranker model once, so neither variant pays for it
+    Ranker(model_name=RANKER_MODEL, cache_dir=RANKER_CACHE_DIR)
+
+    start = time.perf_counter()
+    shared = StubRagSearch(OPTIONS)
+    print(  # noqa: T201
+        f"shared engine startup (ranker load + warm up): "
+        f"{(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+
+    for workers in (1, WORKERS):
+        _run("per query", _per_query, workers)
+        _run("shared", shared.respond, workers)
+
+
+if __name__ == "__main__":
+    main()
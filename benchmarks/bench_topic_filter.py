@@ -0,0 +1,80 @@
+"""
+Decisions of the local topic pre-filter on labelled inputs.
+
+The pre-filter only rejects clearly invalid input locally. "gibberish" inputs
+may be rejected or escalated; every other input must reach the LLM validator,
+which also checks that a topic is suitable: valid topics, stop words only,
+conversational requests, topics made of common words that are still unsuitable,
+and topics in another script. The script prints the decisions, the share of LLM
+validations avoided, and fails on any wrong local decision.
+
+Run from the repository root: uv run python benchmarks/bench_topic_filter.py
+"""
+
+import sys
+
+from graph_examples.doc_generator.doc_gen_topic_filter import (
+    TopicDecision,
+    TopicPreFilter,
+)
+
+GIBBERISH = (
+    "asdf",
+    "asdkjh qwe",
+    "xzqv bnmk",
+    "!!!!",
+    "12345",
+    "qwrtp zxcvb lkjhg",
+)
+ESCALATE = (
+    "Quantum computing",
+    "Renewable energy in Europe",
+    "Introduction to machine learning",
+    "Benefits of green tea",
+    "Climate change and global health",
+    "Impact of social media on teenagers",
+    "The history of tea",
+    "The French Revolution",
+    "History of the Roman Empire",
+    "Photosynthesis",
+    "the and of",
+    "and the a of",
+    "hello world",
+    "tell me a joke",
+    "How to build a bomb",
+    "Why women are bad at science",
+    "Money laundering methods",
+    "War crimes history",
+    "機械学習",
+    "Историческая лингвистика",
+)
+
+
+def main() -> None:
+    """
+    Print the decision of every input and exit with an error on a wrong one.
+    """
+    topic_filter = TopicPreFilter()
+    failures = 0
+    local = 0
+    inputs = [("gibberish", topic) for topic in GIBBERISH] + [
+        ("escalate", topic) for topic in ESCALATE
+    ]
+    for kind, topic in inputs:
+        decision = topic_filter.classify(topic)
+        # Only gibberish may be settled locally
+        wrong = kind == "escalate" and decision != TopicDecision.ESCALATE
+        failures += wrong
+        local += decision != TopicDecision.ESCALATE
+        print(  # noqa: T201
+            f"{kind:<10} {decision.name:<9} {'WRONG ' if wrong else ''}{topic!r}"
+        )
+    print(  # noqa: T201
+        f"{local}/{len(inputs)} LLM validations avoided, {failures} wrong decisions"
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Recall@10 vs memory of the compact first-pass vector index modes.
+
+"full" is the exact search on the full-precision 3072-dimension float32
+vectors. The other rows search the compact vectors of CompactVectorIndex, alone
+("first pass") and with the RESCORE_FACTOR * 10 best candidates rescored with
+their full-precision vectors ("rescored"), as ChromaInterface does. Recall is
+measured against the exact top 10.
+
+"index" is the memory of the vectors searched, "resident" adds the
+full-precision vectors that Chroma keeps in memory in every mode, so the compact
+modes use more memory than "full", not less.
+
+The embeddings are synthetic: clustered unit vectors whose variance decays
+along the dimensions like the Matryoshka embeddings of text-embedding-3-large,
+so the leading dimensions carry most of the information. Sign bits weigh every
+dimension the same, so the binary codes lose the most on such vectors.
+
+Run from the repository root: uv run python benchmarks/bench_vector_index.py
+"""
+
+import time
+
+import numpy as np
+
+from graph_examples.rag_search.vector_index import (
+    CompactVectorIndex,
+    VectorIndexOptions,
+)
+
+CHUNKS = 10_000
+QUERIES = 200
+DIMENSIONS = 3072
+CLUSTERS = 100
+K = 10
+RESCORE_FACTOR = 4
+
+CONFIGURATIONS = (
+    VectorIndexOptions(mode="matryoshka", dimensions=256),
+    VectorIndexOptions(mode="matryoshka", dimensions=512),
+    VectorIndexOptions(mode="matryoshka", dimensions=1024),
+    VectorIndexOptions(mode="int8", dimensions=1024),
+    VectorIndexOptions(mode="int8", dimensions=3072),
+    VectorIndexOptions(mode="binary", dimensions=1024),
+    VectorIndexOptions(mode="binary", dimensions=3072),
+)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _embeddings() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    decay = (1 + np.arange(DIMENSIONS, dtype=np.float32) / 64) ** -1
+    centers = rng.standard_normal((CLUSTERS, DIMENSIONS), dtype=np.float32) * decay
+    chunks = centers[rng.integers(CLUSTERS, size=CHUNKS)]
+    chunks += 0.8 * rng.standard_normal(chunks.shape, dtype=np.float32) * decay
+    queries = chunks[rng.integers(CHUNKS, size=QUERIES)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape, dtype=np.float32) * (
+        decay
+    )
+    return _normalize(chunks), _normalize(queries)
+
+
+def _recall(found: list[list[int]], exact: np.ndarray) -> float:
+    return float(
+        np.mean([len(set(f) & set(e)) / K for f, e in zip(found, exact, strict=True)])
+    )
+
+
+def _report(
+    name: str, index_bytes: int, resident_bytes: int, recall: float, seconds: float
+) -> None:
+    print(  # noqa: T201
+        f"{name:<28} {index_bytes / CHUNKS:7.0f} B/vector "
+        f"index {index_bytes / 2**20:7.1f} MB   resident {resident_bytes / 2**20:7.1f} MB   "
+        f"recall@{K} {recall:5.3f}   {seconds / QUERIES * 1000:6.2f} ms/query"
+    )
+
+
+def main() -> None:
+    """
+    Print memory, recall@10 and latency of every index mode.
+    """
+    chunks, queries = _embeddings()
+    ids = [str(i) for i in range(CHUNKS)]
+
+    start = time.perf_counter()
+    exact = np.argsort(-(queries @ chunks.T), axis=1)[:, :K]
+    _report("full", chunks.nbytes, chunks.nbytes, 1.0, time.perf_counter() - start)
+
+    for options in CONFIGURATIONS:
+        index = CompactVectorIndex(":memory:", options)
+        index.add(ids, chunks)
+        name = f"{options.mode} {options.dimensions}"
+
+        start = time.perf_counter()
+        first_pass = [[int(i) for i in index.search(query, K)] for query in queries]
+        _report(
+            f"{name} first pass",
+            index.nbytes,
+            index.nbytes + chunks.nbytes,
+            _recall(first_pass, exact),
+            time.perf_counter() - start,
+        )
+
+        start = time.perf_counter()
+        rescored = []
+        for query in queries:
+            candidates = [int(i) for i in index.search(query, K * RESCORE_FACTOR)]
+            scores = chunks[candidates] @ query
+            rescored.append([candidates[i] for i in np.argsort(-scores)[:K]])
+        _report(
+            f"{name} rescored",
+            index.nbytes,
+            index.nbytes + chunks.nbytes,
+            _recall(rescored, exact),
+            time.perf_counter() - start,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Stub models shared by the benchmarks: fixed latency, no network, no cost.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+# The model clients only need the variables to be present, no request is sent
+os.environ.setdefault("GITHUB_INFERENCE_ENDPOINT", "https://models.github.ai/inference")
+os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+
+STUB_OUTLINE = """1. Introduction
+1.1 Background of the topic
+1.2 Purpose and scope of the document
+
+2. First Main Point
+2.1 First supporting detail
+2.2 Second supporting detail
+
+3. Second Main Point
+3.1 First supporting detail
+3.2 Second supporting detail
+
+4. Conclusion
+4.1 Summary of main findings
+4.2 Recommendations"""
+
+STUB_DOCUMENT = "Stub document text about the topic. " * 20
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers after a fixed delay, sleeping like a network call.
+    """
+
+    delay: float = 0.2
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        prompt = " ".join(str(m.content) for m in messages)
+        return STUB_OUTLINE if "structured outline" in prompt else STUB_DOCUMENT
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.delay)
+        message = AIMessage(content=self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        message = AIMessage(content=self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.delay)
+        for word in self._reply(messages).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for word in self._reply(messages).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        """
+        Returns a runnable producing a passing instance of schema after the delay.
+        """
+
+        def respond(_: Any) -> Any:
+            self.calls += 1
+            time.sleep(self.delay)
+            return schema(**_passing_values(schema))
+
+        async def arespond(_: Any) -> Any:
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            return schema(**_passing_values(schema))
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Embedding model answering after a fixed delay per request.
+    """
+
+    def __init__(self, delay: float = 0.25, dimension: int = 64) -> None:
+        self.delay = delay
+        self.dimension = dimension
+        self.requests = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [digest[i % len(digest)] / 255 for i in range(self.dimension)]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Returns a deterministic vector per text after the delay.
+        """
+        with self._lock:
+            self.requests += 1
+            self.texts += len(texts)
+        time.sleep(self.delay)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Returns the deterministic vector of the query after the delay.
+        """
+        with self._lock:
+            self.requests += 1
+            self.texts += 1
+        time.sleep(self.delay)
+        return self._vector(text)
+
+
+def _passing_values(schema: type[BaseModel]) -> dict[str, Any]:
+    values: dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if annotation is bool:
+            values[name] = True
+        elif annotation is int:
+            values[name] = 3
+        elif annotation is float:
+            values[name] = 1.0
+        elif annotation is str:
+            values[name] = "stub"
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            values[name] = annotation(**_passing_values(annotation))
+    return values
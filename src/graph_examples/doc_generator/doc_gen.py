@@ -1,29 +1,102 @@
+import asyncio
+import contextlib
+import operator
 import os
+import re
+import threading
+import time
 import warnings
+import weakref
+from collections.abc import AsyncIterator, Hashable, Mapping
 from enum import Enum, auto
-from typing import Any, Literal, TypedDict
+from typing import Annotated, Any, Literal, TypedDict, cast
 
+import aiosqlite
 from langchain_azure_ai.chat_models import AzureAIChatCompletionsModel
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
-from pydantic import BaseModel, Field
+from langgraph.types import Send
+from pydantic import BaseModel, Field, field_validator
 
+from graph_examples.doc_generator.doc_gen_outline import (
+    OutlineSection,
+    iter_leaves,
+    parse_outline,
+    validate_outline_structure,
+)
 from graph_examples.doc_generator.doc_gen_prompts import (
     PROMPT_FOR_CLARITY_EVALUATION,
+    PROMPT_FOR_COMBINED_EVALUATION,
+    PROMPT_FOR_CONTEXT_SUMMARY,
     PROMPT_FOR_DOCUMENT_GENERATION,
     PROMPT_FOR_HARMFULNESS_EVALUATION,
+    PROMPT_FOR_LEAF_GENERATION,
+    PROMPT_FOR_LONG_OUTLINE_GENERATION,
     PROMPT_FOR_OUTLINE_GENERATION,
     PROMPT_FOR_OUTLINE_VALIDATION,
     PROMPT_FOR_RELEVANCE_EVALUATION,
+    PROMPT_FOR_SECTION_GENERATION,
     PROMPT_FOR_TOPIC_VALIDATION,
 )
+from graph_examples.doc_generator.doc_gen_topic_filter import (
+    TopicDecision,
+    TopicPreFilter,
+)
+from graph_examples.llm_cache import with_llm_cache
 from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
 
 # Suppress ExperimentalWarning from AzureAIChatCompletionsModel
 warnings.filterwarnings(
     "ignore", message=".*AzureAIChatCompletionsModel is currently in preview.*"
 )
 
+# Tag of the model calls whose tokens are streamed to the user
+STREAM_TAG = "doc_gen:stream"
+
+# Evaluation summary shown while the evaluators run in the background
+EVALUATION_PENDING = "Evaluating document..."
+
+# Harmfulness scores at or below this are blocked by the safety gate
+UNSAFE_HARMFULNESS_SCORE = 1
+
+# Scores of the combined evaluator that are re-evaluated by gpt-4.1
+BORDERLINE_SCORE = 2
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "doc_gen_checkpoints.sqlite",
+)
+
+_TRANSIENT_ERROR_MARKERS = (
+    "429",
+    "too many requests",
+    "rate limit",
+    "timed out",
+    "timeout",
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Check if the error is a rate limit or timeout, i.e. worth retrying later.
+    """
+    if isinstance(error, TimeoutError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if status in (408, 429, 503, 504):
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in _TRANSIENT_ERROR_MARKERS)
+
 
 class ErrorStatus(Enum):
     """
@@ -40,6 +113,7 @@ class ErrorStatus(Enum):
     CLARITY_EVALUATION_FAILED = auto()
     RELEVANCE_EVALUATION_FAILED = auto()
     HARMFULNESS_EVALUATION_FAILED = auto()
+    DOCUMENT_FAILED_SAFETY_GATE = auto()
 
 
 class EvaluationResult(BaseModel):
@@ -53,6 +127,171 @@ class EvaluationResult(BaseModel):
     reason: str = Field(description="Brief justification for the score")
 
 
+class CombinedEvaluationResult(BaseModel):
+    """
+    Schema for the clarity, relevance and harmfulness evaluations made in one call.
+    """
+
+    clarity: EvaluationResult = Field(description="Clarity evaluation")
+    relevance: EvaluationResult = Field(description="Relevance evaluation")
+    harmfulness: EvaluationResult = Field(description="Harmfulness evaluation")
+    safety_confidence: float = Field(
+        description="Confidence in the harmfulness score from 0 (unsure) to 1 (certain)"
+    )
+
+
+class TopicValidationResponse(BaseModel):
+    """
+    Schema for topic validation response.
+    """
+
+    is_topic_valid: bool = Field(
+        description="True if the topic is valid, False otherwise."
+    )
+
+
+class OutlineValidationResponse(BaseModel):
+    """
+    Schema for outline validation response.
+    """
+
+    is_outline_valid: bool = Field(
+        description="True if the outline strictly follows the required structure: Introduction, one or more distinct main points, and conclusion. False otherwise."
+    )
+    reason: str = Field(
+        description="A concise explanation of the validation result. If invalid, specify which structural element is missing or incorrect."
+    )
+
+
+class SectionDraft(BaseModel):
+    """
+    Text generated for one top level section of the outline.
+    """
+
+    index: int = Field(description="Position of the section in the outline")
+    number: str = Field(description="Section number in the outline")
+    text: str = Field(description="Generated text, empty if generation failed")
+
+
+class SectionTask(TypedDict):
+    """
+    Input sent to the generate_section node for one section of the outline.
+    """
+
+    topic: str
+    outline: str
+    index: int
+    number: str
+    section: str
+
+
+class LeafTask(TypedDict):
+    """
+    Input sent to the generate_leaf node for one leaf section of a long outline.
+    """
+
+    topic: str
+    summary: str
+    index: int
+    number: str
+    path: str  # Headings of the ancestors of the leaf
+    section: str  # Heading of the leaf
+    headings: str  # Headings opened by this leaf, written before its text
+
+
+class DocGenOptions(BaseModel):
+    """
+    Options selecting how DocGen generates and evaluates documents.
+    """
+
+    generation_mode: Literal["single", "sections", "hierarchical"] = Field(
+        default="single",
+        description="'single' generates the document in one call, 'sections' generates the outline sections concurrently, 'hierarchical' generates a long outline leaf by leaf. Wall time grows with the number of sections divided by max_concurrency, and every section draft is kept in the run state, so memory grows with the document",
+    )
+    main_points: int = Field(
+        default=6, ge=1, description="Main points of the outline in 'hierarchical' mode"
+    )
+    outline_depth: int = Field(
+        default=3,
+        ge=2,
+        description="Maximum depth of the outline in 'hierarchical' mode, e.g. 3 for 2.1.1",
+    )
+    max_concurrency: int = Field(
+        default=4, ge=1, description="Maximum number of graph tasks run concurrently"
+    )
+    topic_prefilter: bool = Field(
+        default=True,
+        description="Reject clearly invalid topics locally, any other topic is checked by the LLM validator",
+    )
+    semantic_outline_check: bool = Field(
+        default=False,
+        description="Also ask the LLM whether a structurally valid outline is relevant to the topic",
+    )
+    speculative_generation: bool = Field(
+        default=False,
+        description="Start generating the document while the outline is validated by the LLM ('single' mode with semantic_outline_check only, the local structure check is too fast to overlap)",
+    )
+    background_evaluation: bool = Field(
+        default=False,
+        description="Deliver the document as soon as it is generated and the evaluation summary later",
+    )
+    safety_gate: bool = Field(
+        default=False,
+        description="Withhold the document until the safety evaluation has passed",
+    )
+    evaluation_mode: Literal["separate", "combined"] = Field(
+        default="separate",
+        description="'separate' evaluates each criterion with gpt-4.1, 'combined' scores all criteria in one call to evaluation_model and escalates borderline scores to gpt-4.1",
+    )
+    evaluation_model: Literal["gpt-4.1-mini", "gpt-4.1-nano"] = Field(
+        default="gpt-4.1-mini", description="Model of the combined evaluator"
+    )
+    safety_confidence_threshold: float = Field(
+        default=0.8,
+        ge=0,
+        le=1,
+        description="Combined safety scores with a lower confidence are escalated to gpt-4.1",
+    )
+    checkpoint: bool = Field(
+        default=False,
+        description="Checkpoint runs in SQLite so a failed run resumes from its last completed node",
+    )
+    checkpoint_path: str = Field(
+        default=DEFAULT_CHECKPOINT_PATH, description="SQLite file of the checkpoints"
+    )
+    cached_nodes: list[str] = Field(
+        default=[
+            "topic",
+            "validate",
+            "eval_clarity",
+            "eval_relevance",
+            "eval_safety",
+            "evaluate",
+        ],
+        description="Nodes whose model calls are served from the LLM response cache, 'topic' is the topic check of the draft node. The outline drafted by 'draft' is not cached by default, a rejected outline would be served again until it expires",
+    )
+
+    @field_validator("cached_nodes", mode="before")
+    @classmethod
+    def _split_node_names(cls, value: Any) -> Any:
+        # Environment variables hold a comma separated list
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(",") if name.strip()]
+        return value
+
+    @classmethod
+    def from_env(cls) -> "DocGenOptions":
+        """
+        Build the options from DOC_GEN_<OPTION> environment variables, e.g. DOC_GEN_GENERATION_MODE.
+        """
+        values = {
+            name: os.environ[f"DOC_GEN_{name.upper()}"]
+            for name in cls.model_fields
+            if f"DOC_GEN_{name.upper()}" in os.environ
+        }
+        return cls(**values)
+
+
 class State(TypedDict, total=False):
     """
     Represents the state of the workflow
@@ -60,6 +299,7 @@ class State(TypedDict, total=False):
 
     topic: str  # User selected topic
     outline: str | None  # Generated by AI
+    outline_sections: list[OutlineSection] | None  # Parsed outline tree
     document: str | None  # Generated by AI
     final_response: str | None  # Formulated final response to be returned to the user
     error_status: ErrorStatus  # To store error status
@@ -68,18 +308,56 @@ class State(TypedDict, total=False):
     relevance: EvaluationResult | None  # To store relevance evaluation
     harmfulness: EvaluationResult | None  # To store harmfulness evaluation
     evaluation_summary: str | None  # To store aggregate evaluation
+    context_summary: str | None  # Shared by the leaves in "hierarchical" mode
+    section_drafts: Annotated[
+        list[SectionDraft], operator.add
+    ]  # Sections (or leaves) generated concurrently
 
 
 class DocGen:
     """
     DocGen class for generating documentation on a topic prompted by the user.
+
+    The engine holds no per-request state, so a single instance (with its compiled
+    graph and model clients) can be shared by all concurrent sessions.
     """
 
-    def __init__(self) -> None:
+    _instance: "DocGen | None" = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "DocGen":
+        """
+        Returns the process-wide DocGen engine
+        """
+        # Use singleton to avoid rebuilding model clients and the graph per request
+        # and to keep the HTTP connections of the model clients warm
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(DocGenOptions.from_env())
+        return cls._instance
+
+    def __init__(self, options: DocGenOptions | None = None) -> None:
         """
         Initialize the DocGen class.
         """
+        self.options = options or DocGenOptions()
         self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self._topic_filter = TopicPreFilter()
+        self._initialize_models()
+        self._build_chains()
+        self._graph = self._build_workflow()
+        # Checkpointed graphs per event loop, the SQLite saver is bound to its loop
+        self._checkpointed_graphs: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, CompiledStateGraph[State]
+        ] = weakref.WeakKeyDictionary()
+
+    def _initialize_models(self) -> None:
+        """
+        Create the chat model clients shared by all graph runs.
+        """
         self._gllm_41 = AzureAIChatCompletionsModel(
             endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
             credential=os.getenv("GITHUB_TOKEN"),
@@ -100,9 +378,102 @@ class DocGen:
             model="openai/gpt-4.1-nano",  # Lower reasoning and accuracy
             api_version="2024-08-01-preview",
         )
-        self._graph = self._build_workflow()
 
-    def _build_workflow(self) -> CompiledStateGraph:
+    def _model_for(self, node: str, model: BaseChatModel) -> BaseChatModel:
+        """
+        Returns the model to use in node, backed by the LLM response cache if the node opted in.
+        """
+        if node in self.options.cached_nodes:
+            return with_llm_cache(model)
+        return model
+
+    def _build_chains(self) -> None:
+        """
+        Build the prompt | model chains once; they are stateless and shared by all runs.
+        """
+        self._topic_chain = PROMPT_FOR_TOPIC_VALIDATION | self._model_for(
+            "topic", self._gllm_41_mini
+        ).with_structured_output(TopicValidationResponse)
+        outline_prompt = (
+            PROMPT_FOR_LONG_OUTLINE_GENERATION.partial(
+                main_points=str(self.options.main_points),
+                depth=str(self.options.outline_depth),
+            )
+            if self.options.generation_mode == "hierarchical"
+            else PROMPT_FOR_OUTLINE_GENERATION
+        )
+        self._outline_chain = (
+            outline_prompt | self._model_for("draft", self._gllm_41)
+        ).with_config(tags=[STREAM_TAG])
+        self._outline_validation_chain = (
+            PROMPT_FOR_OUTLINE_VALIDATION
+            | self._model_for("validate", self._gllm_41).with_structured_output(
+                OutlineValidationResponse
+            )
+        )
+        self._document_chain = (
+            PROMPT_FOR_DOCUMENT_GENERATION | self._model_for("generate", self._gllm_41)
+        ).with_config(tags=[STREAM_TAG])
+        self._section_chain = PROMPT_FOR_SECTION_GENERATION | self._model_for(
+            "generate_section", self._gllm_41
+        )
+        self._summary_chain = PROMPT_FOR_CONTEXT_SUMMARY | self._model_for(
+            "summarise", self._gllm_41_mini
+        )
+        # The leaves are streamed as whole sections, not token by token, which
+        # saves a callback per token across hundreds of concurrent leaves
+        leaf_model = self._model_for("generate_leaf", self._gllm_41).model_copy(
+            update={"disable_streaming": True}
+        )
+        self._leaf_chain = (PROMPT_FOR_LEAF_GENERATION | leaf_model).with_config(
+            tags=[TAG_NOSTREAM]
+        )
+        self._clarity_chain = PROMPT_FOR_CLARITY_EVALUATION | self._model_for(
+            "eval_clarity", self._gllm_41
+        ).with_structured_output(EvaluationResult)
+        self._relevance_chain = PROMPT_FOR_RELEVANCE_EVALUATION | self._model_for(
+            "eval_relevance", self._gllm_41
+        ).with_structured_output(EvaluationResult)
+        self._harmfulness_chain = PROMPT_FOR_HARMFULNESS_EVALUATION | self._model_for(
+            "eval_safety", self._gllm_41
+        ).with_structured_output(EvaluationResult)
+        evaluation_model = (
+            self._gllm_41_nano
+            if self.options.evaluation_model == "gpt-4.1-nano"
+            else self._gllm_41_mini
+        )
+        self._combined_evaluation_chain = (
+            PROMPT_FOR_COMBINED_EVALUATION
+            | self._model_for("evaluate", evaluation_model).with_structured_output(
+                CombinedEvaluationResult
+            )
+        )
+        # gpt-4.1 evaluators the combined evaluator escalates borderline scores to
+        self._escalation_chains = {
+            "clarity": PROMPT_FOR_CLARITY_EVALUATION
+            | self._model_for("evaluate", self._gllm_41).with_structured_output(
+                EvaluationResult
+            ),
+            "relevance": PROMPT_FOR_RELEVANCE_EVALUATION
+            | self._model_for("evaluate", self._gllm_41).with_structured_output(
+                EvaluationResult
+            ),
+            "harmfulness": PROMPT_FOR_HARMFULNESS_EVALUATION
+            | self._model_for("evaluate", self._gllm_41).with_structured_output(
+                EvaluationResult
+            ),
+        }
+
+    @property
+    def graph(self) -> CompiledStateGraph[State]:
+        """
+        Returns the compiled workflow graph.
+        """
+        return self._graph
+
+    def _build_workflow(
+        self, checkpointer: AsyncSqliteSaver | None = None
+    ) -> CompiledStateGraph[State]:
         """
         Build the workflow for the document generation.
         """
@@ -117,6 +488,7 @@ class DocGen:
         workflow_builder.add_node("eval_clarity", self._eval_clarity)
         workflow_builder.add_node("eval_relevance", self._eval_relevance)
         workflow_builder.add_node("eval_safety", self._eval_safety)
+        workflow_builder.add_node("evaluate", self._evaluate)
         workflow_builder.add_node("aggregate", self._aggregate)
 
         # Add edges and conditional edges
@@ -124,40 +496,90 @@ class DocGen:
         workflow_builder.add_conditional_edges(
             "draft", self._should_continue, {True: "validate", False: "finalise"}
         )
-        workflow_builder.add_conditional_edges(
-            "validate", self._should_continue, {True: "generate", False: "finalise"}
-        )
+        route_after_generation: dict[Hashable, str] = {
+            "eval_clarity": "eval_clarity",
+            "eval_relevance": "eval_relevance",
+            "eval_safety": "eval_safety",
+            "evaluate": "evaluate",
+            "finalise": "finalise",
+        }
+        if self.options.generation_mode == "sections":
+            # Fan out one generate_section task per outline section, then stitch
+            workflow_builder.add_node(
+                "generate_section",
+                self._generate_section,  # type: ignore[arg-type]
+            )
+            workflow_builder.add_node("stitch", self._stitch)
+            workflow_builder.add_conditional_edges(
+                "validate",
+                self._route_to_sections,
+                ["generate_section", "generate", "finalise"],
+            )
+            workflow_builder.add_edge("generate_section", "stitch")
+            workflow_builder.add_conditional_edges(
+                "stitch",
+                self._route_after_generation,  # type: ignore[arg-type]
+                route_after_generation,
+            )
+        elif self.options.generation_mode == "hierarchical":
+            # Summarise the outline once, then fan out one task per leaf and stitch
+            workflow_builder.add_node("summarise", self._summarise)
+            workflow_builder.add_node(
+                "generate_leaf",
+                self._generate_leaf,  # type: ignore[arg-type]
+            )
+            workflow_builder.add_node("stitch", self._stitch)
+            workflow_builder.add_conditional_edges(
+                "validate",
+                self._should_continue,
+                {True: "summarise", False: "finalise"},
+            )
+            workflow_builder.add_conditional_edges(
+                "summarise",
+                self._route_to_leaves,
+                ["generate_leaf", "generate", "finalise"],
+            )
+            workflow_builder.add_edge("generate_leaf", "stitch")
+            workflow_builder.add_conditional_edges(
+                "stitch",
+                self._route_after_generation,  # type: ignore[arg-type]
+                route_after_generation,
+            )
+        elif self.options.speculative_generation:
+            # validate returns the speculatively generated document
+            workflow_builder.add_conditional_edges(
+                "validate",
+                self._route_after_generation,  # type: ignore[arg-type]
+                route_after_generation,
+            )
+        else:
+            workflow_builder.add_conditional_edges(
+                "validate",
+                self._should_continue,
+                {True: "generate", False: "finalise"},
+            )
         workflow_builder.add_conditional_edges(
             "generate",
             self._route_after_generation,  # type: ignore[arg-type]
-            {
-                "eval_clarity": "eval_clarity",
-                "eval_relevance": "eval_relevance",
-                "eval_safety": "eval_safety",
-                "finalise": "finalise",
-            },
+            route_after_generation,
         )
 
         workflow_builder.add_edge("eval_clarity", "aggregate")
         workflow_builder.add_edge("eval_relevance", "aggregate")
         workflow_builder.add_edge("eval_safety", "aggregate")
+        workflow_builder.add_edge("evaluate", "aggregate")
         workflow_builder.add_edge("aggregate", "finalise")
 
         workflow_builder.add_edge("finalise", END)
 
         # Compile the graph
-        graph = workflow_builder.compile()
-
-        try:
-            png_data = graph.get_graph().draw_mermaid_png()
-            with open("src/graph_examples/doc_generator/doc_gen_graph.png", "wb") as f:
-                f.write(png_data)
-        except Exception as e:
-            self.logger.exception("Could not generate graph PNG: %s", e)
-
-        return graph
+        # The diagram is rendered at build time by `render_graphs`, not here
+        return cast(
+            CompiledStateGraph[State],
+            workflow_builder.compile(checkpointer=checkpointer),
+        )
 
-    def _draft(self, state: State) -> State:
+    async def _draft(self, state: State) -> State:
         """
         Generate an outline for the topic prompted by the user.
         """
@@ -170,32 +592,39 @@ class DocGen:
             }
 
         # check if topic is not gibberish
-        class TopicValidationResponse(BaseModel):
-            """
-            Schema for topic validation response.
-            """
-
-            is_topic_valid: bool = Field(
-                description="True if the topic is valid, False otherwise."
-            )
-
-        topic_validator_llm = self._gllm_41_mini.with_structured_output(
-            TopicValidationResponse
-        )
-        topic_chain = PROMPT_FOR_TOPIC_VALIDATION | topic_validator_llm
-        topic_validation_response: TopicValidationResponse = topic_chain.invoke(
-            {"topic": topic}
-        )
-        if not topic_validation_response.is_topic_valid:
+        if not await self._is_topic_valid(topic):
             return {
                 "error_status": ErrorStatus.TOPIC_IS_GIBBERISH,
                 "error_reason": "A valid topic is required.",
             }
 
-        outline_chain = PROMPT_FOR_OUTLINE_GENERATION | self._gllm_41
-        outline = outline_chain.invoke({"topic": topic})
+        outline = await self._outline_chain.ainvoke({"topic": topic})
+
+        return {"outline": cast(str, outline.content)}
 
-        return {"outline": outline.content}
+    async def _is_topic_valid(self, topic: str) -> bool:
+        """
+        Reject clearly invalid topics locally, validate the others with the LLM validator.
+        """
+        decision = (
+            self._topic_filter.classify(topic)
+            if self.options.topic_prefilter
+            else TopicDecision.ESCALATE
+        )
+        self.metrics.increment(f"topic_prefilter_{decision.name.lower()}")
+        self.logger.debug(
+            "Topic pre-filter: %s (LLM validations avoided: %d, escalated: %d)",
+            decision.name,
+            self.metrics.counter("topic_prefilter_reject"),
+            self.metrics.counter("topic_prefilter_escalate"),
+        )
+        if decision is TopicDecision.REJECT:
+            return False
+
+        topic_validation_response = cast(
+            TopicValidationResponse, await self._topic_chain.ainvoke({"topic": topic})
+        )
+        return topic_validation_response.is_topic_valid
 
     def _should_continue(self, state: State) -> bool:
         """
@@ -203,9 +632,73 @@ class DocGen:
         """
         return state.get("error_status") == ErrorStatus.NO_ERROR
 
-    def _validate(self, state: State) -> State:
+    async def _validate(self, state: State) -> State:
         """
         Validate the outline generated by the AI.
+
+        With speculative_generation and semantic_outline_check the document is
+        generated while the LLM validates the outline and returned with the
+        validation result; the generation is cancelled if the outline turns out to
+        be invalid. Without the LLM check nothing would overlap the generation.
+        """
+        if (
+            not self.options.speculative_generation
+            or not self.options.semantic_outline_check
+            or self.options.generation_mode != "single"
+            or not state.get("outline")
+        ):
+            return await self._validate_outline(state)
+
+        start = time.perf_counter()
+        generation = asyncio.create_task(self._generate(state))
+        try:
+            response = await self._validate_outline(state)
+            validation_seconds = time.perf_counter() - start
+            if "error_status" in response:
+                self._record_speculation(hit=False, seconds_saved=0.0)
+                return response
+
+            response.update(await generation)
+            generation_seconds = time.perf_counter() - start
+            self._record_speculation(
+                hit=True, seconds_saved=min(validation_seconds, generation_seconds)
+            )
+            return response
+        finally:
+            # Also reached when the run itself is cancelled, so no stream is left
+            # running (and billed) after the node has returned
+            await self._cancel(generation)
+
+    @staticmethod
+    async def _cancel(task: asyncio.Task[Any]) -> None:
+        """
+        Cancel the task, if still running, and wait for it to finish.
+        """
+        if task.done():
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    def _record_speculation(self, hit: bool, seconds_saved: float) -> None:
+        """
+        Record the outcome of a speculative generation.
+        """
+        self.metrics.increment("speculation_hits" if hit else "speculation_misses")
+        self.metrics.observe("speculation_seconds_saved", seconds_saved)
+        hits = self.metrics.counter("speculation_hits")
+        total = hits + self.metrics.counter("speculation_misses")
+        self.logger.info(
+            "Speculative generation %s, saved %.2fs (hit rate %.0f%% of %d)",
+            "kept" if hit else "discarded",
+            seconds_saved,
+            100 * hits / total,
+            total,
+        )
+
+    async def _validate_outline(self, state: State) -> State:
+        """
+        Check the outline structure locally, falling back to the LLM validator.
         """
         outline = state.get("outline", "")
         if not outline:
@@ -214,25 +707,39 @@ class DocGen:
                 "error_reason": "Outline is empty",
             }
 
-        # schema for outline validation
-        class OutlineValidationResponse(BaseModel):
-            """
-            Schema for outline validation response.
-            """
+        # Structure is checked locally; the LLM is only needed when the outline
+        # cannot be parsed or when a semantic relevance check is requested
+        sections = parse_outline(outline)
+        if not sections:
+            self.metrics.increment("outline_validation_llm")
+            return await self._validate_with_llm(outline, state["topic"])
 
-            is_outline_valid: bool = Field(
-                description="True if the outline strictly follows the required structure: Introduction, one or more distinct main points, and conclusion. False otherwise."
-            )
-            reason: str = Field(
-                description="A concise explanation of the validation result. If invalid, specify which structural element is missing or incorrect."
-            )
+        self.metrics.increment("outline_validation_local")
+        reason = validate_outline_structure(sections)
+        if reason:
+            return {
+                "error_status": ErrorStatus.OUTLINE_VALIDATION_FAILED,
+                "error_reason": "Outline validation failed - " + reason,
+            }
+
+        if self.options.semantic_outline_check:
+            self.metrics.increment("outline_validation_llm")
+            response = await self._validate_with_llm(outline, state["topic"])
+            if "error_status" in response:
+                return response
 
-        validator_llm = self._gllm_41.with_structured_output(OutlineValidationResponse)
-        validator_chain = PROMPT_FOR_OUTLINE_VALIDATION | validator_llm
+        return {"outline_sections": sections}
 
+    async def _validate_with_llm(self, outline: str, topic: str) -> State:
+        """
+        Validate the outline with the LLM validator.
+        """
         try:
-            validator_response: OutlineValidationResponse = validator_chain.invoke(
-                {"outline": outline, "topic": state["topic"]}
+            validator_response = cast(
+                OutlineValidationResponse,
+                await self._outline_validation_chain.ainvoke(
+                    {"outline": outline, "topic": topic}
+                ),
             )
             # self.logger.debug("Validator response: %s", validator_response.dict())
             if validator_response.is_outline_valid:
@@ -244,13 +751,14 @@ class DocGen:
                     + validator_response.reason,
                 }
         except Exception as e:
+            self._raise_if_resumable(e)
             return {
                 "error_status": ErrorStatus.OUTLINE_VALIDATION_FAILED,
                 "error_reason": "Outline validation failed - Exception occured - "
                 + str(e),
             }
 
-    def _generate(self, state: State) -> State:
+    async def _generate(self, state: State) -> State:
         """
         Generate the document based on the outline.
         """
@@ -259,8 +767,9 @@ class DocGen:
         ]  # .get is not used here as outline is guaranteed to be present
         topic = state["topic"]
 
-        doc_chain = PROMPT_FOR_DOCUMENT_GENERATION | self._gllm_41
-        document = doc_chain.invoke({"outline": outline, "topic": topic})
+        document = await self._document_chain.ainvoke(
+            {"outline": outline, "topic": topic}
+        )
 
         if not document.content:
             return {
@@ -268,25 +777,182 @@ class DocGen:
                 "error_reason": "Document generation failed",
             }
 
-        return {"document": document.content}
+        return {"document": cast(str, document.content)}
+
+    def _route_to_sections(self, state: State) -> list[Send] | str:
+        """
+        Send each top level outline section to generate_section.
+        """
+        if not self._should_continue(state):
+            return "finalise"
+
+        sections = state.get("outline_sections") or parse_outline(
+            state["outline"] or ""
+        )
+        if not sections:
+            # Fall back to generating the whole document in a single call
+            self.logger.warning("Could not parse outline into sections")
+            return "generate"
+
+        return [
+            Send(
+                "generate_section",
+                {
+                    "topic": state["topic"],
+                    "outline": state["outline"],
+                    "index": index,
+                    "number": section.number,
+                    "section": section.render(),
+                },
+            )
+            for index, section in enumerate(sections)
+        ]
+
+    async def _generate_section(self, task: SectionTask) -> State:
+        """
+        Generate the text of one outline section.
+        """
+        try:
+            section = await self._section_chain.ainvoke(
+                {
+                    "outline": task["outline"],
+                    "topic": task["topic"],
+                    "section": task["section"],
+                }
+            )
+            text: str = section.text
+        except Exception as e:
+            self._raise_if_resumable(e)
+            # error_status cannot be written by parallel tasks, stitch reports it
+            self.logger.exception("Section %s generation failed: %s", task["number"], e)
+            text = ""
+
+        return {
+            "section_drafts": [
+                SectionDraft(index=task["index"], number=task["number"], text=text)
+            ]
+        }
+
+    async def _summarise(self, state: State) -> State:
+        """
+        Summarise the outline once for all leaves, so they stay consistent.
+        """
+        try:
+            summary = await self._summary_chain.ainvoke(
+                {"outline": state["outline"], "topic": state["topic"]}
+            )
+            return {"context_summary": summary.text}
+        except Exception as e:
+            self._raise_if_resumable(e)
+            # The leaves can still be written from the outline path alone
+            self.logger.warning("Context summary failed: %s", e)
+            return {"context_summary": ""}
+
+    def _route_to_leaves(self, state: State) -> list[Send] | str:
+        """
+        Send each leaf section of the outline, at any depth, to generate_leaf.
+        """
+        if not self._should_continue(state):
+            return "finalise"
+
+        sections = state.get("outline_sections") or parse_outline(
+            state["outline"] or ""
+        )
+        if not sections:
+            # Fall back to generating the whole document in a single call
+            self.logger.warning("Could not parse outline into sections")
+            return "generate"
+
+        tasks: list[Send] = []
+        opened: tuple[OutlineSection, ...] = ()
+        for index, (ancestors, leaf) in enumerate(iter_leaves(sections)):
+            # Headings of the ancestors not already written by an earlier leaf
+            new = [a for a in ancestors if all(a is not o for o in opened)]
+            opened = ancestors
+            tasks.append(
+                Send(
+                    "generate_leaf",
+                    {
+                        "topic": state["topic"],
+                        "summary": state.get("context_summary") or "",
+                        "index": index,
+                        "number": leaf.number,
+                        "path": " > ".join(a.heading for a in ancestors),
+                        "section": leaf.heading,
+                        "headings": "\n\n".join(a.heading for a in new),
+                    },
+                )
+            )
+        self.logger.info("Generating %d leaf sections", len(tasks))
+        return tasks
+
+    async def _generate_leaf(self, task: LeafTask) -> State:
+        """
+        Generate the text of one leaf section, preceded by the headings it opens.
+        """
+        try:
+            leaf = await self._leaf_chain.ainvoke(
+                {
+                    "summary": task["summary"],
+                    "topic": task["topic"],
+                    "path": task["path"],
+                    "section": task["section"],
+                }
+            )
+            body = leaf.text.strip()
+            text = (
+                "\n\n".join(filter(None, [task["headings"], task["section"], body]))
+                if body
+                else ""
+            )
+        except Exception as e:
+            self._raise_if_resumable(e)
+            # error_status cannot be written by parallel tasks, stitch reports it
+            self.logger.exception("Section %s generation failed: %s", task["number"], e)
+            text = ""
+
+        return {
+            "section_drafts": [
+                SectionDraft(index=task["index"], number=task["number"], text=text)
+            ]
+        }
+
+    async def _stitch(self, state: State) -> State:
+        """
+        Stitch the generated sections back together in outline order.
+        """
+        drafts = sorted(state.get("section_drafts", []), key=lambda d: d.index)
+        failed = [draft.number for draft in drafts if not draft.text.strip()]
+        if not drafts or failed:
+            return {
+                "error_status": ErrorStatus.DOCUMENT_GENERATION_FAILED,
+                "error_reason": "Document generation failed for sections "
+                + ", ".join(failed),
+            }
+
+        # Light coherence pass: consistent spacing between and within sections
+        parts = [re.sub(r"\n{3,}", "\n\n", draft.text.strip()) for draft in drafts]
+        return {"document": "\n\n".join(parts)}
 
     def _route_after_generation(
         self, state: State
     ) -> (
         list[Literal["eval_clarity", "eval_relevance", "eval_safety"]]
-        | Literal["finalise"]
+        | Literal["evaluate", "finalise"]
     ):
         """
         Route the document to the appropriate evaluation step.
         """
-        if state.get("error_status") == ErrorStatus.NO_ERROR:
+        if state.get("error_status") != ErrorStatus.NO_ERROR:
+            return "finalise"
+        elif self.options.evaluation_mode == "combined":
+            return "evaluate"
+        else:
             return [
                 "eval_clarity",
                 "eval_relevance",
                 "eval_safety",
             ]
-        else:
-            return "finalise"
 
     async def _eval_clarity(self, state: State) -> State:
         """
@@ -299,17 +965,16 @@ class DocGen:
             "document"
         ]  # .get is not used here as document is guaranteed to be present
 
-        clarity_chain = (
-            PROMPT_FOR_CLARITY_EVALUATION
-            | self._gllm_41.with_structured_output(EvaluationResult)
-        )
-
         try:
-            clarity: EvaluationResult = await clarity_chain.ainvoke(
-                {"document": document, "topic": topic}
+            clarity = cast(
+                EvaluationResult,
+                await self._clarity_chain.ainvoke(
+                    {"document": document, "topic": topic}
+                ),
             )
             return {"clarity": clarity}
         except Exception as e:
+            self._raise_if_resumable(e)
             return {
                 "error_status": ErrorStatus.CLARITY_EVALUATION_FAILED,
                 "error_reason": "Clarity evaluation failed - Exception occured - "
@@ -327,17 +992,16 @@ class DocGen:
             "document"
         ]  # .get is not used here as document is guaranteed to be present
 
-        relevance_chain = (
-            PROMPT_FOR_RELEVANCE_EVALUATION
-            | self._gllm_41.with_structured_output(EvaluationResult)
-        )
-
         try:
-            relevance: EvaluationResult = await relevance_chain.ainvoke(
-                {"document": document, "topic": topic}
+            relevance = cast(
+                EvaluationResult,
+                await self._relevance_chain.ainvoke(
+                    {"document": document, "topic": topic}
+                ),
             )
             return {"relevance": relevance}
         except Exception as e:
+            self._raise_if_resumable(e)
             return {
                 "error_status": ErrorStatus.RELEVANCE_EVALUATION_FAILED,
                 "error_reason": "Relevance evaluation failed - Exception occured - "
@@ -355,24 +1019,139 @@ class DocGen:
             "document"
         ]  # .get is not used here as document is guaranteed to be present
 
-        harmfulness_chain = (
-            PROMPT_FOR_HARMFULNESS_EVALUATION
-            | self._gllm_41.with_structured_output(EvaluationResult)
-        )
-
         try:
-            harmfulness: EvaluationResult = await harmfulness_chain.ainvoke(
-                {"document": document, "topic": topic}
+            harmfulness = cast(
+                EvaluationResult,
+                await self._harmfulness_chain.ainvoke(
+                    {"document": document, "topic": topic}
+                ),
             )
             return {"harmfulness": harmfulness}
         except Exception as e:
+            self._raise_if_resumable(e)
             return {
                 "error_status": ErrorStatus.HARMFULNESS_EVALUATION_FAILED,
                 "error_reason": "Harmfulness evaluation failed - Exception occured - "
                 + str(e),
             }
 
-    def _aggregate(self, state: State) -> State:
+    async def _evaluate(self, state: State) -> State:
+        """
+        Evaluate clarity, relevance and harmfulness in one call to the evaluation model.
+
+        Borderline scores, low confidence safety scores and criteria the evaluation
+        model failed to score are re-evaluated by gpt-4.1.
+        """
+        topic = state["topic"]
+        document = state["document"]
+        inputs = {"document": document, "topic": topic}
+        screening_usage = UsageMetadataCallbackHandler()
+        escalation_usage = UsageMetadataCallbackHandler()
+        start = time.perf_counter()
+
+        results: dict[str, EvaluationResult] = {}
+        try:
+            screening = cast(
+                CombinedEvaluationResult,
+                await self._combined_evaluation_chain.ainvoke(
+                    inputs, config={"callbacks": [screening_usage]}
+                ),
+            )
+            results = {
+                "clarity": screening.clarity,
+                "relevance": screening.relevance,
+                "harmfulness": screening.harmfulness,
+            }
+            escalate = [
+                name
+                for name, result in results.items()
+                if self._is_borderline(name, result, screening.safety_confidence)
+            ]
+        except Exception as e:
+            self.logger.warning("Combined evaluation failed, escalating: %s", e)
+            escalate = list(self._escalation_chains)
+        screening_seconds = time.perf_counter() - start
+
+        outcomes = await asyncio.gather(
+            *(
+                self._escalation_chains[name].ainvoke(
+                    inputs, config={"callbacks": [escalation_usage]}
+                )
+                for name in escalate
+            ),
+            return_exceptions=True,
+        )
+        for name, outcome in zip(escalate, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                self._raise_if_resumable(outcome)
+                error = ErrorStatus[f"{name.upper()}_EVALUATION_FAILED"]
+                return {
+                    "error_status": error,
+                    "error_reason": f"{name.capitalize()} evaluation failed - "
+                    f"Exception occured - {outcome}",
+                }
+            results[name] = cast(EvaluationResult, outcome)
+
+        self._report_evaluation(
+            escalate, screening_usage, escalation_usage, screening_seconds, start
+        )
+        return {
+            "clarity": results["clarity"],
+            "relevance": results["relevance"],
+            "harmfulness": results["harmfulness"],
+        }
+
+    def _is_borderline(
+        self, name: str, result: EvaluationResult, safety_confidence: float
+    ) -> bool:
+        """
+        Check if a combined evaluation score needs to be confirmed by gpt-4.1.
+        """
+        if name == "harmfulness":
+            # Anything short of clearly safe is confirmed by the larger model
+            return (
+                result.score < 3
+                or safety_confidence < self.options.safety_confidence_threshold
+            )
+        return result.score == BORDERLINE_SCORE
+
+    def _report_evaluation(
+        self,
+        escalated: list[str],
+        screening_usage: UsageMetadataCallbackHandler,
+        escalation_usage: UsageMetadataCallbackHandler,
+        screening_seconds: float,
+        start: float,
+    ) -> None:
+        """
+        Record the token and latency savings of a combined evaluation.
+        """
+        screening_tokens = sum(
+            usage["input_tokens"] for usage in screening_usage.usage_metadata.values()
+        )
+        escalation_tokens = sum(
+            usage["input_tokens"] for usage in escalation_usage.usage_metadata.values()
+        )
+        # The separate evaluators send the document to gpt-4.1 three times
+        saved_tokens = 3 * screening_tokens - escalation_tokens
+        seconds = time.perf_counter() - start
+
+        self.metrics.increment("evaluation_escalations", len(escalated))
+        self.metrics.observe("evaluation_seconds", seconds)
+        self.metrics.observe("evaluation_gpt41_input_tokens_saved", saved_tokens)
+        self.logger.info(
+            "Combined evaluation in %.2fs (%s %.2fs): %d input tokens, escalated %s "
+            "with %d gpt-4.1 input tokens, ~%d gpt-4.1 input tokens saved",
+            seconds,
+            self.options.evaluation_model,
+            screening_seconds,
+            screening_tokens,
+            ", ".join(escalated) or "nothing",
+            escalation_tokens,
+            saved_tokens,
+        )
+
+    async def _aggregate(self, state: State) -> State:
         """
         Aggregate the evaluations.
         """
@@ -390,11 +1169,21 @@ class DocGen:
 
         return {"evaluation_summary": evaluation_summary}
 
-    def _finalise(self, state: State) -> State:
+    async def _finalise(self, state: State) -> State:
         """
         Finalize the response.
         """
         error = state.get("error_status")
+        if (
+            error == ErrorStatus.NO_ERROR
+            and self.options.safety_gate
+            and not self._passes_safety_gate(state)
+        ):
+            return {
+                "error_status": ErrorStatus.DOCUMENT_FAILED_SAFETY_GATE,
+                "final_response": f"Error: {ErrorStatus.DOCUMENT_FAILED_SAFETY_GATE.name} "
+                "The generated document did not pass the safety evaluation.",
+            }
         if error == ErrorStatus.NO_ERROR:
             return {"final_response": state["document"]}
         elif (
@@ -426,14 +1215,236 @@ class DocGen:
 
         return {"final_response": "Error: Unknown error"}
 
-    async def respond(self, input: str | None) -> tuple[str, str]:
+    def _raise_if_resumable(self, error: Exception) -> None:
+        """
+        Re-raise transient errors of a checkpointed run instead of recording them.
+
+        The run then stops with the failed node pending, and the next run with the
+        same thread id resumes from it instead of failing the whole document.
+        """
+        if self.options.checkpoint and is_transient_error(error):
+            raise error
+
+    def _passes_safety_gate(self, state: Mapping[str, Any]) -> bool:
+        """
+        Check if the document was evaluated as not harmful.
+
+        A missing or failed harmfulness evaluation does not pass the gate.
+        """
+        harmfulness: EvaluationResult | None = state.get("harmfulness")
+        return harmfulness is not None and harmfulness.score > UNSAFE_HARMFULNESS_SCORE
+
+    def _run_config(self, thread_id: str | None = None) -> RunnableConfig:
+        """
+        Returns the config for a graph run.
+        """
+        # Bounds the section fan-out (and evaluators) running at the same time
+        config: RunnableConfig = {"max_concurrency": self.options.max_concurrency}
+        if thread_id is not None:
+            config["configurable"] = {"thread_id": thread_id}
+        return config
+
+    def _checkpointed_graph(self) -> CompiledStateGraph[State]:
+        """
+        Returns the graph compiled with the SQLite checkpointer of the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        graph = self._checkpointed_graphs.get(loop)
+        if graph is None:
+            os.makedirs(os.path.dirname(self.options.checkpoint_path), exist_ok=True)
+            # The connection is opened by the saver on first use
+            checkpointer = AsyncSqliteSaver(
+                aiosqlite.connect(self.options.checkpoint_path)
+            )
+            graph = self._build_workflow(checkpointer=checkpointer)
+            self._checkpointed_graphs[loop] = graph
+        return graph
+
+    async def _prepare_run(
+        self, input: str | None, thread_id: str | None
+    ) -> tuple[CompiledStateGraph[State], State | None, RunnableConfig]:
+        """
+        Returns the graph, input and config of a run, resuming the thread if it failed.
+        """
+        initial: State = {"topic": input, "error_status": ErrorStatus.NO_ERROR}  # type: ignore[typeddict-item]
+        if not self.options.checkpoint or thread_id is None:
+            return self._graph, initial, self._run_config()
+
+        graph = self._checkpointed_graph()
+        config = self._run_config(thread_id)
+        snapshot = await graph.aget_state(config)
+        if snapshot.next and snapshot.values.get("topic") == input:
+            self.metrics.increment("runs_resumed")
+            self.logger.info(
+                "Resuming run %s at %s", thread_id, ", ".join(snapshot.next)
+            )
+            # A None input continues from the last checkpoint
+            return graph, None, config
+
+        if snapshot.values:
+            # Left over from a run on another topic
+            await graph.checkpointer.adelete_thread(thread_id)  # type: ignore[union-attr]
+        return graph, initial, config
+
+    async def _complete_run(
+        self, graph: CompiledStateGraph[State], thread_id: str | None
+    ) -> None:
+        """
+        Remove the checkpoints of a completed run, only failed runs are kept to resume.
+        """
+        if graph is not self._graph and thread_id is not None:
+            await graph.checkpointer.adelete_thread(thread_id)  # type: ignore[union-attr]
+
+    async def aclose(self) -> None:
+        """
+        Close the checkpoint database of the running loop, if it was opened.
+        """
+        graph = self._checkpointed_graphs.pop(asyncio.get_running_loop(), None)
+        if graph is not None:
+            await graph.checkpointer.conn.close()  # type: ignore[union-attr]
+
+    async def arun(self, input: str | None, thread_id: str | None = None) -> State:
+        """
+        Run the workflow for the user input and return the final state.
+
+        With checkpointing enabled, a thread_id identifies the run: if an earlier run
+        with the same thread_id and topic failed, it is resumed from its last
+        completed node.
+        """
+        graph, graph_input, config = await self._prepare_run(input, thread_id)
+        response = await graph.ainvoke(graph_input, config=config)
+        await self._complete_run(graph, thread_id)
+        return cast(State, response)
+
+    async def respond(
+        self, input: str | None, thread_id: str | None = None
+    ) -> tuple[str, str]:
         """
         Respond to the user input.
         """
-        response = await self._graph.ainvoke(
-            {"topic": input, "error_status": ErrorStatus.NO_ERROR}
-        )
+        response = await self.arun(input, thread_id)
         self.logger.debug("Response: %s", response)
-        return response.get("final_response", ""), response.get(
-            "evaluation_summary", ""
-        )
+        final_response = response.get("final_response") or ""
+        evaluation_summary = response.get("evaluation_summary") or ""
+        return final_response, evaluation_summary
+
+    async def astream_document(
+        self, input: str | None, thread_id: str | None = None
+    ) -> AsyncIterator[tuple[str, str]]:
+        """
+        Respond to the user input, streaming the outline and document tokens.
+
+        Yields (text so far, evaluation summary) pairs while the outline and then the
+        document are generated. The last pair is the final response together with
+        the evaluation summary, once the evaluators have completed.
+
+        The thread_id resumes a failed run as described in arun().
+
+        In 'sections' and 'hierarchical' mode the document is assembled while the
+        sections complete: each section is yielded as soon as all sections before it
+        are done, and the out of order sections are held only until then.
+
+        With background_evaluation the finished document is yielded with
+        EVALUATION_PENDING as soon as it is generated. With safety_gate the document
+        (including its tokens) is only yielded once the safety evaluation has passed.
+        """
+        start = time.perf_counter()
+        first_token_received = False
+        streaming_node = None
+        text = ""
+        document = ""
+        document_delivered = False
+        response: dict[str, Any] = {}
+        pending_drafts: dict[int, str] = {}
+        next_draft = 0
+
+        graph, graph_input, config = await self._prepare_run(input, thread_id)
+        # With a list of stream modes, the graph yields (mode, chunk) pairs
+        mode: str
+        chunk: Any
+        async for mode, chunk in graph.astream(
+            graph_input,
+            config=config,
+            stream_mode=["messages", "updates", "values"],
+        ):
+            if mode == "values":
+                response = chunk
+                continue
+
+            if mode == "updates":
+                for node, update in chunk.items():
+                    update = update or {}
+                    if update.get("section_drafts") and not self.options.safety_gate:
+                        pending_drafts.update(
+                            (draft.index, draft.text.strip())
+                            for draft in update["section_drafts"]
+                        )
+                        if next_draft in pending_drafts:
+                            if streaming_node != "stitch":
+                                streaming_node = "stitch"
+                                text = ""
+                            while next_draft in pending_drafts:
+                                section = pending_drafts.pop(next_draft)
+                                text = f"{text}\n\n{section}" if text else section
+                                next_draft += 1
+                            yield text, ""
+
+                    document = update.get("document") or document
+                    deliver = (
+                        node in ("eval_safety", "evaluate")
+                        and self._passes_safety_gate(update)
+                        if self.options.safety_gate
+                        else bool(update.get("document"))
+                    )
+                    if (
+                        self.options.background_evaluation
+                        and deliver
+                        and document
+                        and not document_delivered
+                    ):
+                        document_delivered = True
+                        self.metrics.observe(
+                            "time_to_document_seconds", time.perf_counter() - start
+                        )
+                        yield document, EVALUATION_PENDING
+                continue
+
+            message, metadata = chunk
+            if STREAM_TAG not in metadata.get("tags", []) or not message.text:
+                continue
+
+            node = metadata.get("langgraph_node")
+            if self.options.safety_gate and node in ("generate", "validate"):
+                # Document tokens are withheld until the safety evaluation passes
+                continue
+
+            if not first_token_received:
+                first_token_received = True
+                ttft = time.perf_counter() - start
+                self.metrics.observe("time_to_first_token_seconds", ttft)
+                self.logger.info("Time to first token: %.3fs", ttft)
+
+            # Outline tokens are replaced by the document tokens once generation starts
+            if node != streaming_node:
+                streaming_node = node
+                text = ""
+            text += message.text
+            yield text, ""
+
+        await self._complete_run(graph, thread_id)
+        self.logger.debug("Response: %s", response)
+        final_response = response.get("final_response", "")
+        evaluation_summary = response.get("evaluation_summary", "")
+        if document_delivered and response.get("error_status") in (
+            ErrorStatus.CLARITY_EVALUATION_FAILED,
+            ErrorStatus.RELEVANCE_EVALUATION_FAILED,
+        ):
+            # The delivered document stays, the failed evaluation is reported with
+            # the results of the evaluations that completed
+            final_response, evaluation_summary = (
+                document,
+                f"{evaluation_summary}\n{final_response}"
+                if evaluation_summary
+                else final_response,
+            )
+        yield final_response, evaluation_summary
@@ -1,73 +1,79 @@
+import asyncio
+import hashlib
 import os
-import tempfile
+import sys
+import time
+from collections.abc import AsyncIterator
 
 import gradio as gr
 from dotenv import load_dotenv
-from fpdf import FPDF
 
 from graph_examples.doc_generator.doc_gen import DocGen
+from graph_examples.doc_generator.doc_gen_pdf import export_pdf
 from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
 
 load_dotenv(override=True)
 logger = get_logger(__name__)
+metrics = get_metrics(__name__)
 
 
-async def doc_gen(input: str | None) -> tuple[str | None, str | None]:
+async def doc_gen(
+    input: str | None, request: gr.Request
+) -> AsyncIterator[tuple[str | None, str | None]]:
     """
     Generate a document on the topic prompted by the user (async).
+
+    Tokens are streamed into the output box as they arrive. A failed run is resumed
+    when the same topic is submitted again in the same session (DOC_GEN_CHECKPOINT).
     """
-    doc_gen = DocGen()
-    # Await the async respond method
-    response, eval_summary = await doc_gen.respond(input)
-    return response, eval_summary
+    doc_gen = DocGen.get_instance()
+    topic_hash = hashlib.sha256((input or "").encode()).hexdigest()[:16]
+    thread_id = f"app:{request.session_hash}:{topic_hash}"
+    # Gradio re-renders the outputs on every yield
+    async for response, eval_summary in doc_gen.astream_document(input, thread_id):
+        yield response, eval_summary
 
 
-def save_as_pdf(output_text: str) -> str | None:
+async def save_as_pdf(output_text: str) -> str | None:
     """
     Save the output text as a PDF file.
+
+    The PDF is rendered in a worker thread, so other sessions are not blocked, and
+    reused when the same document is downloaded again.
     """
-    # Validate output-text
-    if not output_text or output_text.strip() == "":
-        return None
-
-    # Create a PDF object
-    pdf = FPDF()
-
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    font_path = os.path.join(current_dir, "fonts", "DejaVuSans.ttf")
-
-    pdf.add_page()
-
-    try:
-        pdf.add_font("DejaVu", "", font_path, uni=True)
-        pdf.set_font("DejaVu", size=12)
-    except RuntimeError:
-        logger.exception("Could not load font at %s", font_path)
-        pdf.set_font("Arial", size=12)
-
-    # Add content to PDF
-    # Handle line breaks and ensure text fits within page width
-    for line in output_text.split("\n"):
-        if line.strip():  # skip empty lines
-            pdf.multi_cell(0, 6, txt=line, align="L")
-        else:
-            pdf.ln(3)
-
-    # Save to a temporary file
-    temp_file = tempfile.NamedTemporaryFile(
-        delete=False, suffix=".pdf", prefix="document_"
-    )
-    temp_file.close()
-    logger.info("Saving PDF to file %s", temp_file.name)
-    pdf.output(temp_file.name)
+    return await asyncio.to_thread(export_pdf, output_text)
 
-    return temp_file.name
+
+def warm_up_engine() -> float:
+    """
+    Build the shared DocGen engine before the first request and return the setup time.
+    """
+    start = time.perf_counter()
+    DocGen.get_instance()
+    elapsed = time.perf_counter() - start
+    metrics.observe("engine_startup_seconds", elapsed)
+    # Without the shared engine this setup cost was paid on every submit
+    logger.info(
+        "DocGen engine ready in %.3fs (setup time saved on every request)", elapsed
+    )
+    return elapsed
 
 
 def main() -> None:
     """
     Main function to run the document generator app.
+
+    `doc_gen batch ...` runs the headless batch generator instead of the app.
     """
+    if sys.argv[1:2] == ["batch"]:
+        from graph_examples.doc_generator.doc_gen_batch import main as batch_main
+
+        batch_main(sys.argv[2:])
+        return
+
+    warm_up_engine()
+
     title = os.path.splitext(os.path.basename(__file__))[0]
 
     # Use gr.blocks for custom layout
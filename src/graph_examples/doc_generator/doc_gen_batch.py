@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import random
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, cast
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from graph_examples.doc_generator.doc_gen import (
+    DocGen,
+    ErrorStatus,
+    EvaluationResult,
+    State,
+)
+from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+
+load_dotenv(override=True)
+logger = get_logger(__name__)
+metrics = get_metrics(__name__)
+
+# Output statuses that are retried when the batch is resumed
+RETRYABLE_STATUSES = frozenset({"RATE_LIMITED", "EXCEPTION"})
+
+_RATE_LIMIT_MARKERS = ("429", "too many requests", "rate limit", "ratelimit")
+
+
+class BatchTopic(BaseModel):
+    """
+    Topic read from the batch input file.
+    """
+
+    id: str = Field(description="Identifier used to resume the batch")
+    topic: str = Field(description="Topic of the document")
+
+
+class BatchResult(BaseModel):
+    """
+    Result written to the batch output file for one topic.
+    """
+
+    id: str
+    topic: str
+    status: str = Field(description="ErrorStatus name, RATE_LIMITED or EXCEPTION")
+    document: str | None = None
+    evaluation_summary: str | None = None
+    scores: dict[str, int] = Field(default_factory=dict)
+    error_reason: str | None = None
+    attempts: int = 1
+    seconds: float = 0.0
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when a run failed because the model endpoint returned 429.
+    """
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that halves on rate limiting and recovers one slot at a time.
+
+    Every 429 halves the number of concurrent runs (down to 1) and pauses new runs
+    until the retry delay has passed. After `limit` consecutive successes the limit
+    grows by one again, up to the configured maximum.
+    """
+
+    def __init__(self, max_limit: int) -> None:
+        """
+        Initialize the AdaptiveConcurrencyLimiter.
+        """
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Wait for a free slot (and the end of any backoff pause) and hold it.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        try:
+            pause = self._resume_at - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            yield
+        finally:
+            async with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """
+        Record a successful run.
+        """
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self._successes = 0
+            self.limit += 1
+            logger.info("Concurrency limit raised to %d", self.limit)
+
+    def on_rate_limited(self, delay: float) -> None:
+        """
+        Record a rate limited run that will be retried after delay seconds.
+        """
+        self._successes = 0
+        self.limit = max(1, self.limit // 2)
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        logger.warning(
+            "Rate limited, concurrency limit lowered to %d, pausing %.1fs",
+            self.limit,
+            delay,
+        )
+
+
+def _retry_after(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_rate_limited(error: BaseException | str) -> bool:
+    """
+    Check if an exception (or an error reason recorded by a graph node) is a 429.
+    """
+    if isinstance(error, BaseException):
+        for status in (
+            getattr(error, "status_code", None),
+            getattr(getattr(error, "response", None), "status_code", None),
+        ):
+            if status == 429:
+                return True
+    text = str(error).lower()
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
+
+
+def read_topics(path: str) -> Iterator[BatchTopic]:
+    """
+    Read the topics from a JSONL file ({"topic": ..., "id": ...} per line) or a
+    CSV file with a "topic" column and an optional "id" column.
+
+    Topics without an id are identified by the topic text.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.lower().endswith(".csv"):
+            rows: Iterator[dict[str, Any]] = csv.DictReader(file)
+        else:
+            rows = (json.loads(line) for line in file if line.strip())
+        for row in rows:
+            topic = str(row.get("topic") or "").strip()
+            if not topic:
+                logger.warning("Skipping input row without a topic: %s", row)
+                continue
+            yield BatchTopic(id=str(row.get("id") or topic), topic=topic)
+
+
+def completed_ids(path: str) -> set[str]:
+    """
+    Returns the ids already completed in an existing output file.
+
+    A line left incomplete by an interrupted run is removed from the file, and
+    results that failed with a retryable status are not counted as completed.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as file:
+        content = file.read()
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            logger.warning("Removing incomplete last line from %s", path)
+            file.truncate(end)
+
+    done: set[str] = set()
+    for line in content[:end].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        result = BatchResult.model_validate_json(line)
+        if result.status in RETRYABLE_STATUSES:
+            done.discard(result.id)
+        else:
+            done.add(result.id)
+    return done
+
+
+def _to_result(item: BatchTopic, state: State) -> BatchResult:
+    error = state.get("error_status", ErrorStatus.NO_ERROR)
+    scores = {
+        name: evaluation.score
+        for name in ("clarity", "relevance", "harmfulness")
+        if (evaluation := cast(EvaluationResult | None, state.get(name))) is not None
+    }
+    return BatchResult(
+        id=item.id,
+        topic=item.topic,
+        status=error.name,
+        document=state.get("document") if error == ErrorStatus.NO_ERROR else None,
+        evaluation_summary=state.get("evaluation_summary"),
+        scores=scores,
+        error_reason=state.get("error_reason")
+        if error != ErrorStatus.NO_ERROR
+        else None,
+    )
+
+
+async def generate_one(
+    doc_gen: DocGen,
+    item: BatchTopic,
+    limiter: AdaptiveConcurrencyLimiter,
+    max_retries: int,
+    base_delay: float,
+) -> BatchResult:
+    """
+    Generate the document for one topic, retrying rate limited runs with backoff.
+    """
+    start = time.perf_counter()
+    for attempt in range(1, max_retries + 2):
+        try:
+            async with limiter.slot():
+                # A rate limited run resumes from its checkpoint on the next attempt
+                state = await doc_gen.arun(item.topic, thread_id=f"batch:{item.id}")
+            reason = state.get("error_reason") or ""
+            if state.get("error_status") != ErrorStatus.NO_ERROR and is_rate_limited(
+                reason
+            ):
+                # The graph nodes record model errors in the state instead of raising
+                raise RateLimitedError(reason)
+            limiter.on_success()
+            result = _to_result(item, state)
+        except Exception as e:
+            if not is_rate_limited(e):
+                logger.exception("Topic %s failed", item.id)
+                result = BatchResult(
+                    id=item.id,
+                    topic=item.topic,
+                    status="EXCEPTION",
+                    error_reason=str(e),
+                )
+            elif attempt > max_retries:
+                result = BatchResult(
+                    id=item.id,
+                    topic=item.topic,
+                    status="RATE_LIMITED",
+                    error_reason=str(e),
+                )
+            else:
+                metrics.increment("rate_limited")
+                delay = _retry_after(e) or base_delay * 2 ** (attempt - 1)
+                limiter.on_rate_limited(delay * random.uniform(1.0, 1.5))
+                continue
+
+        result.attempts = attempt
+        result.seconds = round(time.perf_counter() - start, 3)
+        return result
+
+    raise AssertionError("unreachable")
+
+
+async def run_batch(
+    doc_gen: DocGen,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    max_retries: int = 5,
+    base_delay: float = 2.0,
+    resume: bool = False,
+) -> int:
+    """
+    Generate documents for all topics of the input file, streaming results as JSONL.
+
+    Args:
+        doc_gen (DocGen): Engine used for every topic.
+        input_path (str): JSONL or CSV file with the topics.
+        output_path (str): JSONL file the results are appended to as they complete.
+        concurrency (int, optional): Maximum number of topics generated at the same time.
+        max_retries (int, optional): Retries of a rate limited topic before giving up.
+        base_delay (float, optional): First backoff delay when no Retry-After is given.
+        resume (bool, optional): Skip the topics already completed in output_path.
+
+    Returns:
+        int: Number of topics processed in this run.
+    """
+    done = completed_ids(output_path) if resume else set()
+    pending = [item for item in read_topics(input_path) if item.id not in done]
+    logger.info(
+        "Generating %d documents (%d already completed)", len(pending), len(done)
+    )
+
+    limiter = AdaptiveConcurrencyLimiter(concurrency)
+    start = time.perf_counter()
+    try:
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            tasks = [
+                asyncio.create_task(
+                    generate_one(doc_gen, item, limiter, max_retries, base_delay)
+                )
+                for item in pending
+            ]
+            for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+                result = await task
+                output.write(result.model_dump_json() + "\n")
+                output.flush()
+                metrics.increment(f"status_{result.status.lower()}")
+                logger.info(
+                    "[%d/%d] %s: %s", completed, len(pending), result.id, result.status
+                )
+    finally:
+        # The open checkpoint database would keep the process alive
+        await doc_gen.aclose()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Batch completed in %.1fs (%.2f topics/s, %d rate limited retries)",
+        elapsed,
+        len(pending) / elapsed if elapsed else 0.0,
+        metrics.counter("rate_limited"),
+    )
+    return len(pending)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Entry point of `doc_gen batch`.
+    """
+    parser = argparse.ArgumentParser(
+        prog="doc_gen batch",
+        description="Generate documents for the topics of a JSONL or CSV file.",
+    )
+    parser.add_argument("input", help="JSONL or CSV file with a 'topic' field")
+    parser.add_argument(
+        "-o", "--output", required=True, help="JSONL file the results are written to"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="Maximum concurrent topics"
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=5, help="Retries of a rate limited topic"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to the output file and skip the topics already completed",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if not args.resume and os.path.exists(args.output):
+        parser.error(f"{args.output} exists, pass --resume to continue it")
+
+    asyncio.run(
+        run_batch(
+            DocGen.get_instance(),
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            max_retries=args.max_retries,
+            resume=args.resume,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import re
+from collections.abc import Iterator
+
+from pydantic import BaseModel, Field
+
+# Matches numbered outline lines such as "2. Title", "2.1 Title" or "**2.1. Title**"
+_SECTION_LINE = re.compile(
+    r"^\s*(?:#+\s*)?(?:\*\*)?(?P<number>\d+(?:\.\d+)*)\.?\s+(?P<title>.+?)(?:\*\*)?\s*$"
+)
+
+
+class OutlineSection(BaseModel):
+    """
+    Numbered section of an outline with its subsections.
+    """
+
+    number: str = Field(description="Section number, e.g. '2' or '2.1'")
+    title: str = Field(description="Section title")
+    subsections: list["OutlineSection"] = Field(default_factory=list)
+
+    @property
+    def heading(self) -> str:
+        """
+        Returns the numbered heading of the section, e.g. '2. Title' or '2.1 Title'.
+        """
+        separator = ". " if "." not in self.number else " "
+        return f"{self.number}{separator}{self.title}"
+
+    def render(self) -> str:
+        """
+        Returns the section and its subsections in the numbered outline format.
+        """
+        lines = [self.heading]
+        lines.extend(subsection.render() for subsection in self.subsections)
+        return "\n".join(lines)
+
+
+def parse_outline(outline: str) -> list[OutlineSection]:
+    """
+    Parse a numbered outline into its top level sections.
+
+    Args:
+        outline (str): Outline in the format produced by PROMPT_FOR_OUTLINE_GENERATION.
+
+    Returns:
+        list[OutlineSection]: Top level sections in document order. Lines that are not
+        numbered are ignored, so an empty list means the outline could not be parsed.
+    """
+    sections: list[OutlineSection] = []
+    by_number: dict[str, OutlineSection] = {}
+
+    for line in outline.splitlines():
+        match = _SECTION_LINE.match(line)
+        if not match:
+            continue
+
+        section = OutlineSection(
+            number=match.group("number"), title=match.group("title").strip()
+        )
+        parent_number = section.number.rpartition(".")[0]
+        parent = by_number.get(parent_number) if parent_number else None
+        if parent is not None:
+            parent.subsections.append(section)
+        else:
+            sections.append(section)
+        by_number[section.number] = section
+
+    return sections
+
+
+def iter_leaves(
+    sections: list[OutlineSection], ancestors: tuple[OutlineSection, ...] = ()
+) -> Iterator[tuple[tuple[OutlineSection, ...], OutlineSection]]:
+    """
+    Walk the outline in document order and yield every section without subsections.
+
+    Args:
+        sections (list[OutlineSection]): Sections returned by parse_outline.
+        ancestors (tuple[OutlineSection, ...], optional): Parents of sections.
+
+    Returns:
+        Iterator[tuple[tuple[OutlineSection, ...], OutlineSection]]: The ancestors
+        (top level first) and the leaf section.
+    """
+    for section in sections:
+        if section.subsections:
+            yield from iter_leaves(section.subsections, (*ancestors, section))
+        else:
+            yield ancestors, section
+
+
+def _check_numbering(sections: list[OutlineSection], prefix: str) -> str | None:
+    for position, section in enumerate(sections, start=1):
+        expected = f"{prefix}{position}"
+        if section.number != expected:
+            return f"Section {section.number} should be numbered {expected}"
+        error = _check_numbering(section.subsections, f"{expected}.")
+        if error:
+            return error
+    return None
+
+
+def validate_outline_structure(sections: list[OutlineSection]) -> str | None:
+    """
+    Check the required outline structure locally.
+
+    Args:
+        sections (list[OutlineSection]): Top level sections returned by parse_outline.
+
+    Returns:
+        str | None: None if the outline has an introduction, one or more main points
+        with numbered subsections and a conclusion, otherwise the reason it does not.
+    """
+    if len(sections) < 3:
+        return "An introduction, at least one main point and a conclusion are required"
+    if "introduction" not in sections[0].title.lower():
+        return "The first section must be the Introduction"
+    if "conclusion" not in sections[-1].title.lower():
+        return "The last section must be the Conclusion"
+
+    for section in sections[1:-1]:
+        if not section.subsections:
+            return f"Main point {section.number} has no subsections"
+
+    return _check_numbering(sections, "")
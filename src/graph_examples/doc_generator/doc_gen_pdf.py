@@ -0,0 +1,191 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+
+from fpdf import FPDF, set_global
+
+from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+
+logger = get_logger(__name__)
+metrics = get_metrics(__name__)
+
+FONT_FAMILY = "DejaVu"
+FONT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fonts", "DejaVuSans.ttf"
+)
+DEFAULT_PDF_DIR = os.path.join(tempfile.gettempdir(), "doc_gen_pdfs")
+DEFAULT_PDF_BUDGET_BYTES = 100 * 1024 * 1024
+
+# Bump when the layout changes, so cached PDFs are not reused
+_LAYOUT_VERSION = "1"
+
+# The parsed font is cached in memory, so fpdf does not need to write .pkl metric
+# files next to the font in the package folder
+set_global("FPDF_CACHE_MODE", 1)
+
+_font_lock = threading.Lock()
+_font_template: dict[str, Any] | None = None
+_eviction_lock = threading.Lock()
+
+
+def _add_font(pdf: FPDF) -> None:
+    """
+    Add the DejaVu font to the PDF, parsing the TTF file only once per process.
+
+    add_font() parses the font metrics from the TTF file on every call. The parsed entries are kept and copied into later documents; only the
+    glyph subset and object numbers are per document.
+    """
+    global _font_template
+    with _font_lock:
+        if _font_template is None:
+            pdf.add_font(FONT_FAMILY, "", FONT_PATH, uni=True)
+            fontkey = FONT_FAMILY.lower()
+            font = dict(pdf.fonts[fontkey])
+            # The subset grows with the glyphs used by this document
+            font["subset"] = list(font["subset"])
+            _font_template = {
+                "fontkey": fontkey,
+                "font": font,
+                "font_files": {
+                    name: dict(entry) for name, entry in pdf.font_files.items()
+                },
+            }
+            return
+
+    fontkey = _font_template["fontkey"]
+    font = dict(_font_template["font"])
+    font["i"] = len(pdf.fonts) + 1
+    font["subset"] = list(font["subset"])
+    pdf.fonts[fontkey] = font
+    for name, entry in _font_template["font_files"].items():
+        pdf.font_files[name] = dict(entry)
+
+
+def render_pdf(text: str, path: str) -> None:
+    """
+    Render the text into a PDF file at path.
+    """
+    pdf = FPDF()
+    pdf.add_page()
+
+    try:
+        _add_font(pdf)
+        pdf.set_font(FONT_FAMILY, size=12)
+    except RuntimeError:
+        logger.exception("Could not load font at %s", FONT_PATH)
+        pdf.set_font("Arial", size=12)
+
+    # Handle line breaks and ensure text fits within page width
+    for line in text.split("\n"):
+        if line.strip():  # skip empty lines
+            pdf.multi_cell(0, 6, txt=line, align="L")
+        else:
+            pdf.ln(3)
+
+    pdf.output(path)
+
+
+def evict_pdfs(directory: str, budget_bytes: int, keep: str | None = None) -> int:
+    """
+    Delete the least recently used PDFs until the directory fits the disk budget.
+
+    Args:
+        directory (str): Directory of the exported PDFs.
+        budget_bytes (int): Maximum total size of the PDFs.
+        keep (str | None, optional): File never evicted, e.g. the one just exported.
+
+    Returns:
+        int: Number of deleted files.
+    """
+    with _eviction_lock:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".pdf") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        # The modification time is refreshed on every cache hit
+        for _, size, path in sorted(entries):
+            if total <= budget_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+
+    if deleted:
+        metrics.increment("pdf_evictions", deleted)
+        logger.info("Evicted %d PDFs from %s", deleted, directory)
+    return deleted
+
+
+def export_pdf(
+    text: str | None,
+    directory: str | None = None,
+    budget_bytes: int | None = None,
+) -> str | None:
+    """
+    Export the text as a PDF file, reusing the file when the text was exported before.
+
+    Files are named by the hash of their content, so the same document is rendered
+    only once. Blocking; run it in a worker thread from async code.
+
+    Args:
+        text (str | None): Text of the document.
+        directory (str | None, optional): Directory of the PDFs. Defaults to
+            DOC_GEN_PDF_DIR or a doc_gen_pdfs folder in the temp directory.
+        budget_bytes (int | None, optional): Disk budget of the directory. Defaults
+            to DOC_GEN_PDF_BUDGET_MB or 100 MB.
+
+    Returns:
+        str | None: Path of the PDF, or None if the text is empty.
+    """
+    if not text or text.strip() == "":
+        return None
+
+    pdf_dir: str = directory or os.getenv("DOC_GEN_PDF_DIR") or DEFAULT_PDF_DIR
+    if budget_bytes is None:
+        budget_mb = os.getenv("DOC_GEN_PDF_BUDGET_MB")
+        budget_bytes = (
+            int(float(budget_mb) * 1024 * 1024)
+            if budget_mb
+            else DEFAULT_PDF_BUDGET_BYTES
+        )
+    os.makedirs(pdf_dir, exist_ok=True)
+
+    digest = hashlib.sha256(f"{_LAYOUT_VERSION}\x00{text}".encode()).hexdigest()
+    path = os.path.join(pdf_dir, f"document_{digest[:32]}.pdf")
+    if os.path.exists(path):
+        # Mark as recently used for the LRU eviction
+        os.utime(path)
+        metrics.increment("pdf_cache_hits")
+        logger.info("Reusing PDF %s", path)
+        return path
+
+    metrics.increment("pdf_cache_misses")
+    start = time.perf_counter()
+    # Rendered under a temporary name, so a concurrent export never sees a partial file
+    fd, temp_path = tempfile.mkstemp(suffix=".pdf.tmp", dir=pdf_dir)
+    os.close(fd)
+    try:
+        render_pdf(text, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    elapsed = time.perf_counter() - start
+    metrics.observe("pdf_render_seconds", elapsed)
+    logger.info("Saving PDF to file %s (%.3fs)", path, elapsed)
+
+    evict_pdfs(pdf_dir, budget_bytes, keep=path)
+    return path
@@ -176,3 +176,110 @@ PROMPT_FOR_HARMFULNESS_EVALUATION = ChatPromptTemplate.from_messages(
     ]
 )
 # ----- END OF PROMPT FOR HARMFULNESS EVALUATION -----
+
+SYSTEM_PROMPT_FOR_SECTION_GENERATION = SystemMessagePromptTemplate.from_template("""
+    You are a skilled writer working on one part of a larger document on the given TOPIC. The full OUTLINE is provided for context only. Write ONLY the SECTION given below, formatted in the manner of high-quality PDF reading materials. For each point in the SECTION, expand with clear explanations and include one relevant example. Write in clear, polished prose without using Markdown formatiing (do not use **, ---, or similar symbols). Ensure each explanation is concise, clear, and does not exceed ten lines. Start with the section heading and use the section and subsection numbering exactly as given. Do not write any other section of the outline.
+""")
+
+PROMPT_FOR_SECTION_GENERATION = ChatPromptTemplate.from_messages(
+    [
+        (SYSTEM_PROMPT_FOR_SECTION_GENERATION),
+        (
+            HumanMessagePromptTemplate.from_template(
+                """OUTLINE: {outline}\n TOPIC: {topic}\n SECTION: {section}"""
+            )
+        ),
+    ]
+)
+# ----- END OF PROMPT FOR SECTION GENERATION -----
+
+SYSTEM_PROMPT_FOR_COMBINED_EVALUATION = SystemMessagePromptTemplate.from_template("""
+    Evaluate the provided DOCUMENT in relation to the given TOPIC for clarity, relevance and harmfulness, following the CRITERIA below. Reflect step-by-step internally on how the DOCUMENT addresses the TOPIC and meets each of the specified standards before assigning the final scores. Also state how confident you are, from 0 to 1, in the harmfulness score.
+
+    # CLARITY CRITERIA
+    - Score 1: The DOCUMENT is confusing, unclear, or not concise.
+    - Score 2: The DOCUMENT is clear and concise OR average.
+    - Score 3: The DOCUMENT is clear, concise, and well-explained.
+
+    # RELEVANCE CRITERIA
+    - Score 1: The DOCUMENT is not relevant to the TOPIC.
+    - Score 2: The DOCUMENT is relevant to the TOPIC OR average.
+    - Score 3: The DOCUMENT is relevant to the TOPIC and well-explained.
+
+    # HARMFULNESS CRITERIA
+    - Score 1: The DOCUMENT is harmful or inappropriate that includes hate speech, discrimination, or other forms of harassment.
+    - Score 2: The DOCUMENT is not harmful or inappropriate OR average.
+    - Score 3: The DOCUMENT is not harmful or inappropriate and well-explained.
+""")
+
+PROMPT_FOR_COMBINED_EVALUATION = ChatPromptTemplate.from_messages(
+    [
+        (SYSTEM_PROMPT_FOR_COMBINED_EVALUATION),
+        (
+            HumanMessagePromptTemplate.from_template(
+                """DOCUMENT: {document}\n TOPIC: {topic}"""
+            )
+        ),
+    ]
+)
+# ----- END OF PROMPT FOR COMBINED EVALUATION -----
+
+SYSTEM_PROMPT_FOR_LONG_OUTLINE_GENERATION = SystemMessagePromptTemplate.from_template("""
+    Generate a clear and structured outline for a long document on the topic provided as TOPIC.
+    The outline should include an introduction, {main_points} main points, and a conclusion.
+    Use appropriate numbered section formatting, with main sections numbered as 1, 2, 3, etc., subsections as 1.1, 1.2, etc., and deeper levels as 1.1.1, 1.1.2, etc.
+    Nest subsections up to {depth} levels deep where the topic needs more detail; every main point must have at least two subsections.
+
+    Before finalizing the outline, think carefully about what logical structure best presents the topic, organizing the introduction,
+    main points with supporting subsections, and conclusion in a coherent flow.
+    Only after this reasoning, present your final outline in the required format.
+
+    # Output Format
+    - Respond with a structured outline, using numbered sections and subsections as specified, one heading per line.
+    - The outline should start with an "Introduction" (section 1), followed by the main points, and end with a "Conclusion" as the last section.
+    - Do not add any text other than the numbered headings.
+""")
+
+PROMPT_FOR_LONG_OUTLINE_GENERATION = ChatPromptTemplate.from_messages(
+    [
+        (SYSTEM_PROMPT_FOR_LONG_OUTLINE_GENERATION),
+        (HumanMessagePromptTemplate.from_template("""TOPIC: {topic}""")),
+    ]
+)
+# ----- END OF PROMPT FOR LONG OUTLINE GENERATION -----
+
+SYSTEM_PROMPT_FOR_CONTEXT_SUMMARY = SystemMessagePromptTemplate.from_template("""
+    You are planning a long document on the given TOPIC that several writers will write in parallel, each one writing a single subsection of the OUTLINE.
+    Write a short summary of the document for the writers: one or two sentences on the purpose and audience of the document, then one sentence per main section of the OUTLINE stating what it covers and what it must leave to the other sections.
+    Keep the summary under 300 words and do not use Markdown formatting.
+""")
+
+PROMPT_FOR_CONTEXT_SUMMARY = ChatPromptTemplate.from_messages(
+    [
+        (SYSTEM_PROMPT_FOR_CONTEXT_SUMMARY),
+        (
+            HumanMessagePromptTemplate.from_template(
+                """OUTLINE: {outline}\n TOPIC: {topic}"""
+            )
+        ),
+    ]
+)
+# ----- END OF PROMPT FOR CONTEXT SUMMARY -----
+
+SYSTEM_PROMPT_FOR_LEAF_GENERATION = SystemMessagePromptTemplate.from_template("""
+    You are a skilled writer working on one subsection of a long document on the given TOPIC. The SUMMARY describes the whole document and what each section covers, and PATH gives the headings this subsection belongs to.
+    Write ONLY the body text of the SUBSECTION, formatted in the manner of high-quality PDF reading materials: clear explanations with one relevant example, in polished prose without Markdown formatting (do not use **, ---, or similar symbols).
+    Do not repeat the heading, do not write an introduction or conclusion for the whole document, and do not cover the topics of other sections. Keep it under twenty lines.
+""")
+
+PROMPT_FOR_LEAF_GENERATION = ChatPromptTemplate.from_messages(
+    [
+        (SYSTEM_PROMPT_FOR_LEAF_GENERATION),
+        (
+            HumanMessagePromptTemplate.from_template(
+                """SUMMARY: {summary}\n TOPIC: {topic}\n PATH: {path}\n SUBSECTION: {section}"""
+            )
+        ),
+    ]
+)
+# ----- END OF PROMPT FOR LEAF GENERATION -----
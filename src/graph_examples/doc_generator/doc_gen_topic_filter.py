@@ -0,0 +1,126 @@
+import re
+from enum import Enum, auto
+
+# Frequent English words; used for the dictionary ratio and, through their
+# character bigrams, for the n-gram plausibility score.
+COMMON_WORDS = frozenset(
+    """
+    a about above across after again against age all also among an analysis and
+    animal animals application applications approach are area art as at based
+    basics be because been before benefits best between biology body book brain
+    business but by can care case cell challenges change child children city
+    climate communication community company comparison computer computing
+    concept conflict control country culture data design development different
+    digital disease do does during earth economic economics economy education
+    effect effects energy engineering environment environmental era ethics
+    europe evolution example experience family financial first food for from
+    future game global good government great green growth guide health healthy
+    help his history home how human ideas impact importance in industry
+    information innovation intelligence internet into introduction is issues it
+    its knowledge language languages law leadership learning life light local
+    machine management market marketing media medicine mental method methods
+    model modern money music national natural nature network new news not
+    of on online or organization other our over overview people performance
+    person personal physical planet policy political politics population power
+    practice practices principles problem process product production program
+    programming public quality quantum renewable research resources revolution
+    rights risk role science sciences security small social society software
+    solar space sports strategies strategy study success sustainable system
+    systems teaching technology that the their theory these this through time
+    to today tourism trade training travel trends under understanding united
+    university urban use using versus war water way ways we what when where
+    which why with women work workplace world writing year young your youth
+    """.split()
+)
+
+# Runs of adjacent keys, words made of them are keyboard mashing (e.g. "asdf")
+_KEYBOARD_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+
+
+def _bigrams(word: str) -> list[str]:
+    # Word boundaries are part of the bigrams, e.g. "^q" and "m$"
+    padded = f"^{word}$"
+    return [padded[i : i + 2] for i in range(len(padded) - 1)]
+
+
+_COMMON_BIGRAMS = frozenset(
+    bigram for word in COMMON_WORDS for bigram in _bigrams(word)
+)
+_WORD = re.compile(r"[a-z]+")
+_VOWELS = frozenset("aeiouy")
+
+
+class TopicDecision(Enum):
+    """
+    Outcome of the local topic pre-filter.
+    """
+
+    REJECT = auto()  # Clearly gibberish, no LLM call needed
+    ESCALATE = auto()  # Possibly a topic, the LLM validator decides
+
+
+def _is_keyboard_run(word: str) -> bool:
+    return len(word) >= 4 and any(
+        word in row or word in row[::-1] for row in _KEYBOARD_ROWS
+    )
+
+
+class TopicPreFilter:
+    """
+    Fast local classifier that rejects clearly invalid topics.
+
+    The score combines the share of letters in the input, the share of character
+    bigrams seen in common English words and the share of dictionary words. Inputs
+    scoring at most the reject threshold, or made only of runs of adjacent keys,
+    are rejected. Everything else goes to the LLM validator, which also checks
+    that a topic is suitable: a topic of common words can still be harmful, so no
+    topic is accepted locally. Inputs without ASCII words, e.g. in another script,
+    are escalated too.
+    """
+
+    def __init__(self, reject_threshold: float = 0.5) -> None:
+        """
+        Initialize the TopicPreFilter.
+        """
+        self.reject_threshold = reject_threshold
+
+    def score(self, topic: str) -> float:
+        """
+        Returns the plausibility score of the topic, between 0 and 1.
+        """
+        text = topic.lower()
+        visible = [c for c in text if not c.isspace()]
+        words = _WORD.findall(text)
+        if not visible or not words:
+            return 0.0
+
+        letter_ratio = sum(c.isalpha() for c in visible) / len(visible)
+        bigrams = [bigram for word in words for bigram in _bigrams(word)]
+        bigram_ratio = sum(b in _COMMON_BIGRAMS for b in bigrams) / len(bigrams)
+        dictionary_ratio = sum(word in COMMON_WORDS for word in words) / len(words)
+        # Long words without any vowel are typical of keyboard mashing
+        vowelless = sum(len(w) > 3 and not (_VOWELS & set(w)) for w in words)
+        vowel_ratio = 1 - vowelless / len(words)
+
+        return (
+            0.2 * letter_ratio
+            + 0.5 * bigram_ratio
+            + 0.15 * min(1.0, 2 * dictionary_ratio)
+            + 0.15 * vowel_ratio
+        )
+
+    def classify(self, topic: str) -> TopicDecision:
+        """
+        Classify the topic as clearly invalid or as one for the LLM validator.
+        """
+        words = _WORD.findall(topic.lower())
+        if not words:
+            # Letters of another script cannot be scored locally
+            if any(c.isalpha() for c in topic):
+                return TopicDecision.ESCALATE
+            return TopicDecision.REJECT
+        if all(_is_keyboard_run(word) for word in words):
+            return TopicDecision.REJECT
+        if self.score(topic) <= self.reject_threshold:
+            return TopicDecision.REJECT
+        return TopicDecision.ESCALATE
@@ -0,0 +1,304 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "embedding_cache.sqlite"
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# SQLite limits the number of parameters of a statement
+_LOOKUP_BATCH_SIZE = 500
+
+
+class SQLiteEmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache with an in-memory LRU front.
+
+    Vectors are stored as float32 arrays keyed by the model, the kind of input
+    (document or query) and the text. The least recently used vectors are evicted
+    once the stored vectors exceed max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_entries: int = 256,
+    ) -> None:
+        """
+        Initialize the SQLiteEmbeddingCache.
+        """
+        self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        # float32 arrays, a list of Python floats takes about 8 times the memory
+        self._memory: OrderedDict[str, array[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_accessed_at "
+                "ON embeddings (accessed_at)"
+            )
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @staticmethod
+    def key(namespace: str, text: str) -> str:
+        """
+        Returns the cache key of a text embedded under namespace.
+        """
+        return hashlib.sha256(f"{namespace}\x00{text}".encode()).hexdigest()
+
+    def _remember(self, key: str, vector: array[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        Returns the cached vectors of the keys found in the cache.
+        """
+        found: dict[str, list[float]] = {}
+        now = time.time()
+        with self._lock:
+            missing = []
+            for key in keys:
+                cached = self._memory.get(key)
+                if cached is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = cached.tolist()
+                else:
+                    missing.append(key)
+
+            for start in range(0, len(missing), _LOOKUP_BATCH_SIZE):
+                batch = missing[start : start + _LOOKUP_BATCH_SIZE]
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob)
+                    found[key] = vector.tolist()
+                    self._remember(key, vector)
+
+            if found:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                        ((now, key) for key in found),
+                    )
+
+        hits = len(found)
+        self.metrics.increment("hits", hits)
+        self.metrics.increment("misses", len(keys) - hits)
+        return found
+
+    def update(self, vectors: dict[str, list[float]]) -> None:
+        """
+        Store vectors, evicting the least recently used ones beyond max_bytes.
+        """
+        now = time.time()
+        arrays = {key: array("f", vector) for key, vector in vectors.items()}
+        rows = [
+            (key, vector.tobytes(), len(vector) * vector.itemsize, now)
+            for key, vector in arrays.items()
+        ]
+
+        with self._lock, self._conn:
+            # Replaced entries are counted once
+            for start in range(0, len(rows), _LOOKUP_BATCH_SIZE):
+                batch = [row[0] for row in rows[start : start + _LOOKUP_BATCH_SIZE]]
+                self._size -= self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows
+            )
+            self._size += sum(row[2] for row in rows)
+            for key, vector in arrays.items():
+                self._remember(key, vector)
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Delete the least recently used quarter beyond the budget in one go, so
+        # the eviction does not run on every insert
+        target = self.max_bytes * 3 // 4
+        evicted = 0
+        while self._size > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY accessed_at LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._size -= size
+                evicted += 1
+        self.metrics.increment("evictions", evicted)
+        self.logger.info("Evicted %d embeddings from the cache", evicted)
+
+    def hit_rate(self) -> float:
+        """
+        Returns the share of lookups served from the cache.
+        """
+        hits = self.metrics.counter("hits")
+        total = hits + self.metrics.counter("misses")
+        return hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """
+        Remove every cached vector.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embeddings")
+            self._memory.clear()
+            self._size = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings model reading and writing the embedding cache.
+
+    Only the texts missing from the cache are sent to the wrapped model, once
+    even if they appear several times in a batch.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, cache: SQLiteEmbeddingCache, namespace: str
+    ) -> None:
+        """
+        Initialize the CachedEmbeddings.
+
+        Args:
+            embeddings (Embeddings): Model computing the missing vectors.
+            cache (SQLiteEmbeddingCache): Cache to use.
+            namespace (str): Model name and parameters, part of the cache key.
+        """
+        self.logger = get_logger(__name__)
+        self.embeddings = embeddings
+        self.cache = cache
+        self.namespace = namespace
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed documents, calling the model only for the texts not in the cache.
+        """
+        keys = [self.cache.key(f"{self.namespace}\x00document", t) for t in texts]
+        vectors = self.cache.lookup(keys)
+
+        missing = {
+            key: text
+            for key, text in zip(keys, texts, strict=True)
+            if key not in vectors
+        }
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing, computed, strict=True))
+            self.cache.update(new_vectors)
+            vectors.update(new_vectors)
+
+        self.logger.debug(
+            "Embedding cache: %d of %d documents cached (hit rate %.0f%%)",
+            len(texts) - len(missing),
+            len(texts),
+            self.cache.hit_rate() * 100,
+        )
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embed a query, calling the model only if it is not in the cache.
+        """
+        key = self.cache.key(f"{self.namespace}\x00query", text)
+        cached = self.cache.lookup([key])
+        if key in cached:
+            return cached[key]
+        vector: list[float] = self.embeddings.embed_query(text)
+        self.cache.update({key: vector})
+        return vector
+
+
+_cache: SQLiteEmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> SQLiteEmbeddingCache | None:
+    """
+    Returns the process-wide embedding cache configured from the environment.
+
+    EMBEDDING_CACHE=off disables the cache. EMBEDDING_CACHE_PATH and
+    EMBEDDING_CACHE_MAX_MB override the defaults.
+
+    Returns:
+        SQLiteEmbeddingCache | None: Shared cache, or None if caching is disabled.
+    """
+    global _cache
+    if os.getenv("EMBEDDING_CACHE", "on").lower() in ("off", "false", "0"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            max_mb = os.getenv("EMBEDDING_CACHE_MAX_MB")
+            _cache = SQLiteEmbeddingCache(
+                path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_bytes=int(float(max_mb) * 1024 * 1024)
+                if max_mb
+                else DEFAULT_MAX_BYTES,
+            )
+        return _cache
+
+
+def with_embedding_cache(
+    embeddings: Embeddings, cache: SQLiteEmbeddingCache | None = None
+) -> Embeddings:
+    """
+    Returns the embeddings model wrapped with the embedding cache.
+
+    The cache key includes the model name and dimensions of the model, so the
+    vectors of different models never mix.
+
+    Args:
+        embeddings (Embeddings): Model to wrap, e.g. AzureAIEmbeddingsModel.
+        cache (SQLiteEmbeddingCache | None, optional): Cache to use. Defaults to
+            get_embedding_cache().
+
+    Returns:
+        Embeddings: Cached model, or the model itself if caching is disabled.
+    """
+    cache = cache if cache is not None else get_embedding_cache()
+    if cache is None:
+        return embeddings
+    namespace = (
+        f"{getattr(embeddings, 'model_name', type(embeddings).__name__)}"
+        f"\x00{getattr(embeddings, 'dimensions', None)}"
+    )
+    return CachedEmbeddings(embeddings, cache, namespace)
@@ -0,0 +1,217 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite"
+)
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent LLM response cache with an in-memory LRU front.
+
+    Entries are keyed by the model configuration (llm_string, which includes the
+    model name, parameters and any bound tools/schema) and the rendered prompt,
+    i.e. the prompt template together with its inputs. Entries expire after
+    ttl_seconds and the least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float | None = 7 * 24 * 3600,
+        max_entries: int = 10_000,
+        memory_entries: int = 256,
+    ) -> None:
+        """
+        Initialize the SQLiteLLMCache.
+        """
+        self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        # Access times of memory hits, written to SQLite before the next eviction
+        self._pending_access: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at "
+                "ON llm_cache (accessed_at)"
+            )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _record(self, hit: bool) -> None:
+        self.metrics.increment("hits" if hit else "misses")
+        self.logger.debug(
+            "LLM cache %s (hits=%d, misses=%d)",
+            "hit" if hit else "miss",
+            self.metrics.counter("hits"),
+            self.metrics.counter("misses"),
+        )
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """
+        Look up a cached response for the prompt and model configuration.
+        """
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached and not self._is_expired(cached[0], now):
+                self._memory.move_to_end(key)
+                self._pending_access[key] = now
+                self._record(hit=True)
+                return cached[1]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute(
+                            "DELETE FROM llm_cache WHERE key = ?", (key,)
+                        )
+                self._memory.pop(key, None)
+                self._pending_access.pop(key, None)
+                self._record(hit=False)
+                return None
+
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            value: list[Generation] = [loads(item) for item in loads(row[0])]
+            self._remember(key, row[1], value)
+            self._record(hit=True)
+            return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """
+        Store a response, evicting expired and least recently used entries.
+        """
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        serialized = dumps([dumps(generation) for generation in return_val])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, serialized, now, now),
+            )
+            self._pending_access.pop(key, None)
+            # Memory hits count as accesses for the least recently used eviction
+            self._conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                (
+                    (accessed_at, pending_key)
+                    for pending_key, accessed_at in self._pending_access.items()
+                ),
+            )
+            self._pending_access.clear()
+            if self.ttl_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._remember(key, now, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        """
+        Remove every cached response.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._memory.clear()
+            self._pending_access.clear()
+
+
+_cache: SQLiteLLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> SQLiteLLMCache | None:
+    """
+    Returns the process-wide LLM response cache configured from the environment.
+
+    LLM_CACHE=off disables the cache. LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS and
+    LLM_CACHE_MAX_ENTRIES override the defaults.
+
+    Returns:
+        SQLiteLLMCache | None: Shared cache, or None if caching is disabled.
+    """
+    global _cache
+    if os.getenv("LLM_CACHE", "on").lower() in ("off", "false", "0"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL_SECONDS")
+            _cache = SQLiteLLMCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(ttl) if ttl else 7 * 24 * 3600,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+            )
+        return _cache
+
+
+def with_llm_cache[ModelT: BaseChatModel](
+    model: ModelT, cache: BaseCache | None = None
+) -> ModelT:
+    """
+    Returns a copy of the chat model that reads and writes the response cache.
+
+    The copy shares the HTTP client of the original model, so only the calls made
+    through the copy are cached. Works with AzureAIChatCompletionsModel and ChatOpenAI.
+
+    Args:
+        model (BaseChatModel): Chat model to wrap.
+        cache (BaseCache | None, optional): Cache to use. Defaults to get_llm_cache().
+
+    Returns:
+        BaseChatModel: Cached copy of the model, or the model itself if caching is disabled.
+    """
+    cache = cache if cache is not None else get_llm_cache()
+    if cache is None:
+        return model
+    cached_model: ModelT = model.model_copy(update={"cache": cache})
+    return cached_model
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Number of recent timing samples kept per metric for percentile calculation
+_MAX_SAMPLES = 1024
+
+
+class Metrics:
+    """
+    Thread-safe counters and timings for a single component.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Initialize the Metrics registry.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._timings: dict[str, deque[float]] = {}
+
+    def increment(self, key: str, value: int = 1) -> None:
+        """
+        Increment a counter.
+        """
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, key: str, seconds: float) -> None:
+        """
+        Record a timing sample in seconds.
+        """
+        with self._lock:
+            self._timings.setdefault(key, deque(maxlen=_MAX_SAMPLES)).append(seconds)
+
+    @contextmanager
+    def timer(self, key: str) -> Iterator[None]:
+        """
+        Time the enclosed block and record it under key.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(key, time.perf_counter() - start)
+
+    def counter(self, key: str) -> int:
+        """
+        Returns the current value of a counter.
+        """
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def percentile(self, key: str, pct: float) -> float | None:
+        """
+        Returns the pct-th percentile (0-100) of the recorded timings for key.
+        """
+        with self._lock:
+            samples = sorted(self._timings.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, round(pct / 100 * (len(samples) - 1)))
+        return samples[index]
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Returns counters and p50/p95 timings as a plain dictionary.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            keys = list(self._timings)
+        timings = {
+            key: {
+                "count": len(self._timings[key]),
+                "p50": self.percentile(key, 50),
+                "p95": self.percentile(key, 95),
+            }
+            for key in keys
+        }
+        return {"counters": counters, "timings": timings}
+
+
+_registry: dict[str, Metrics] = {}
+_registry_lock = threading.Lock()
+
+
+def get_metrics(name: str = __name__) -> Metrics:
+    """
+    Returns the process-wide Metrics registry for a component.
+
+    Args:
+        name (str, optional): Name of the component. Defaults to __name__ which is the current module name.
+
+    Returns:
+        Metrics: Shared metrics registry for the component.
+    """
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Metrics(name)
+        return _registry[name]
@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections.abc import Iterable
+
+from langchain_core.documents import Document
+
+from graph_examples.logger import get_logger
+
+BM25_INDEX_FILENAME = "bm25_index.sqlite"
+
+# SQLite limits the number of parameters of a statement
+_BATCH_SIZE = 500
+
+# Hyphens and underscores are part of a token, so part numbers like "XJ-200"
+# are matched as a whole instead of as "xj" and "200"
+_TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '-_'"
+_QUERY_TOKEN = re.compile(r"[\w-]+")
+# Lucene's English stop words, they match most chunks and only add noise to the
+# ranking of a query
+_STOP_WORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that "
+    "the their then there these they this to was will with".split()
+)
+
+
+class BM25Index:
+    """
+    Local BM25 inverted index of the chunks stored in the vector store.
+
+    Backed by an SQLite FTS5 table, whose bm25() ranking function scores the
+    chunks (k1 = 1.2, b = 0.75). The chunk text and metadata are stored with the
+    postings, so a sparse search needs no round trip to the vector store.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the BM25Index.
+        """
+        self.logger = get_logger(__name__)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, "
+                "metadata TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS postings USING fts5("
+                f'text, tokenize="{_TOKENIZER}")'
+            )
+
+    def is_empty(self) -> bool:
+        """
+        Check if the index has no chunks.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is None
+
+    def _delete(self, chunk_ids: list[str]) -> None:
+        for start in range(0, len(chunk_ids), _BATCH_SIZE):
+            batch = chunk_ids[start : start + _BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            self._conn.execute(
+                "DELETE FROM postings WHERE rowid IN (SELECT id FROM chunks "
+                f"WHERE chunk_id IN ({placeholders}))",
+                batch,
+            )
+            self._conn.execute(
+                f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch
+            )
+
+    def add(self, chunk_ids: list[str], documents: list[Document]) -> None:
+        """
+        Index the documents under their chunk ids, replacing existing ones.
+        """
+        with self._lock, self._conn:
+            self._delete(chunk_ids)
+            for chunk_id, document in zip(chunk_ids, documents, strict=True):
+                row = self._conn.execute(
+                    "INSERT INTO chunks (chunk_id, metadata) VALUES (?, ?)",
+                    (chunk_id, json.dumps(document.metadata)),
+                )
+                self._conn.execute(
+                    "INSERT INTO postings (rowid, text) VALUES (?, ?)",
+                    (row.lastrowid, document.page_content),
+                )
+
+    def update_metadata(
+        self, chunk_ids: list[str], metadatas: list[dict[str, object]]
+    ) -> None:
+        """
+        Replace the metadata of indexed chunks.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE chunk_id = ?",
+                (
+                    (json.dumps(metadata), chunk_id)
+                    for chunk_id, metadata in zip(chunk_ids, metadatas, strict=True)
+                ),
+            )
+
+    def delete(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Remove the chunks from the index.
+        """
+        with self._lock, self._conn:
+            self._delete(list(chunk_ids))
+
+    def search(self, query: str, k: int) -> list[tuple[Document, float]]:
+        """
+        Returns the k chunks with the highest BM25 score for the query.
+
+        Any query term but stop words may match; chunks matching more and rarer
+        terms rank higher. Scores are positive, higher is better.
+        """
+        tokens = {token.strip("-") for token in _QUERY_TOKEN.findall(query.casefold())}
+        tokens.discard("")
+        # A query made only of stop words is searched as is
+        terms = tokens - _STOP_WORDS or tokens
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in sorted(terms))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunks.chunk_id, chunks.metadata, postings.text, "
+                "bm25(postings) FROM postings "
+                "JOIN chunks ON chunks.id = postings.rowid "
+                "WHERE postings MATCH ? ORDER BY bm25(postings) LIMIT ?",
+                (match, k),
+            ).fetchall()
+        # bm25() is negative, lower is better
+        return [
+            (
+                Document(page_content=text, metadata=json.loads(metadata), id=chunk_id),
+                -score,
+            )
+            for chunk_id, metadata, text, score in rows
+        ]
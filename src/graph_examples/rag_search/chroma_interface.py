@@ -1,19 +1,54 @@
 import os
+import threading
+import time
 import warnings
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
-import tiktoken
+import numpy as np
 from langchain_azure_ai.embeddings import AzureAIEmbeddingsModel
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredMarkdownLoader,
-)
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+from langchain_core.rate_limiters import InMemoryRateLimiter
 
+from graph_examples.embedding_cache import with_embedding_cache
 from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+from graph_examples.rag_search.bm25_index import BM25_INDEX_FILENAME, BM25Index
+from graph_examples.rag_search.ingestion import (
+    SUPPORTED_FILE_TYPES,
+    IngestionOptions,
+    PreparedChunk,
+    batch_chunks,
+    chunk_hash,
+    count_tokens,
+    get_process_pool,
+    load_and_split,
+)
+from graph_examples.rag_search.ingestion_manifest import (
+    COMPLETE,
+    MANIFEST_FILENAME,
+    IngestionManifest,
+    file_hash,
+)
+from graph_examples.rag_search.types import SearchMode
+from graph_examples.rag_search.vector_index import (
+    FULL_VECTORS_FILENAME,
+    VECTOR_INDEX_FILENAME,
+    CompactVectorIndex,
+    FullVectorStore,
+    VectorIndexOptions,
+)
+
+# Chroma rejects larger delete and update batches
+_DELETE_BATCH_SIZE = 5000
+
+# Reciprocal rank fusion constant, dampens the weight of the top ranks
+_RRF_K = 60
+# Candidates of each ranking fused per requested result
+_HYBRID_CANDIDATES = 4
 
 # Suppress ExperimentalWarning from AzureAIChatCompletionsModel
 warnings.filterwarnings(
@@ -27,6 +62,7 @@ class ChromaInterface:
     """
 
     _instance: "ChromaInterface | None" = None
+    _instance_lock = threading.Lock()
 
     @classmethod
     def get_instance(cls) -> "ChromaInterface":
@@ -36,29 +72,80 @@ class ChromaInterface:
         # Use singleton to avoid multiple instances of embedding models
         # and re-establishing API credentials
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        IngestionOptions.from_env(), VectorIndexOptions.from_env()
+                    )
         return cls._instance
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        options: IngestionOptions | None = None,
+        index_options: VectorIndexOptions | None = None,
+    ) -> None:
         """
         Initialize the ChromaInterface
         """
-        self.embedding_3_small = None
-        self.embedding_3_large = None
+        self.options = options or IngestionOptions()
+        self.index_options = index_options or VectorIndexOptions()
+        self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self.embedding_3_small: Embeddings | None = None
+        self.embedding_3_large: Embeddings | None = None
         self.client: Chroma | None = None
+        self.manifest: IngestionManifest | None = None
+        self.bm25_index: BM25Index | None = None
+        # Compact first-pass vectors, None in the "full" index mode
+        self.vector_index: CompactVectorIndex | None = None
+        # text-embedding-3-small vectors of the chunks, only in the "small_model"
+        # index mode
+        self.small_client: Chroma | None = None
+        # Full-precision vectors read to rescore the candidates, None in the "full"
+        # index mode
+        self.full_vectors: FullVectorStore | None = None
+        # Ingestions of the same file must not interleave between the manifest
+        # and the vector store
+        self._file_locks: dict[str, threading.Lock] = {}
+        self._file_locks_lock = threading.Lock()
+        # Bumped after every write to the vector store, see generation
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        # Embedding batches of all ingestions share the concurrency and rate limit
+        self._embedding_pool = ThreadPoolExecutor(
+            max_workers=self.options.embedding_concurrency,
+            thread_name_prefix="embedding",
+        )
+        self._rate_limiter = InMemoryRateLimiter(
+            requests_per_second=self.options.embedding_requests_per_second,
+            check_every_n_seconds=0.01,
+            max_bucket_size=self.options.embedding_concurrency,
+        )
+        # Embeds the query with the small model during the large model request
+        self._query_pool = ThreadPoolExecutor(thread_name_prefix="query")
         self._intialize()
-        self.logger = get_logger(__name__)
+        self._recover()
 
     def _intialize(self) -> None:
-        self.embedding_3_small = AzureAIEmbeddingsModel(
-            model="openai/text-embedding-3-small",  # Dimension : 512, Context: 8k input
-            endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
-            credential=os.getenv("GITHUB_TOKEN"),
+        # Identical texts (re-ingestion, other chunk sizes, duplicate uploads and
+        # repeated queries) are served from the embedding cache
+        self.embedding_3_small = with_embedding_cache(
+            AzureAIEmbeddingsModel(
+                model="openai/text-embedding-3-small",  # Dimension : 512, Context: 8k input
+                endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
+                credential=os.getenv("GITHUB_TOKEN"),
+                # Only the small model collection stores reduced vectors
+                dimensions=self.index_options.dimensions
+                if self.index_options.mode == "small_model"
+                else None,
+            )
         )
-        self.embedding_3_large = AzureAIEmbeddingsModel(
-            model="openai/text-embedding-3-large",  # Dimension : 3072, Context: 8k input
-            endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
-            credential=os.getenv("GITHUB_TOKEN"),
+        self.embedding_3_large = with_embedding_cache(
+            AzureAIEmbeddingsModel(
+                model="openai/text-embedding-3-large",  # Dimension : 3072, Context: 8k input
+                endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
+                credential=os.getenv("GITHUB_TOKEN"),
+            )
         )
         persist_directory = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "ChromaVectorStore"
@@ -68,114 +155,605 @@ class ChromaInterface:
             embedding_function=self.embedding_3_large,
             persist_directory=persist_directory,
         )
+        self.manifest = IngestionManifest(
+            os.path.join(persist_directory, MANIFEST_FILENAME)
+        )
+        self.bm25_index = BM25Index(
+            os.path.join(persist_directory, BM25_INDEX_FILENAME)
+        )
+        if self.index_options.mode == "small_model":
+            # Vectors of other dimensions cannot share a collection, a new one is
+            # filled by _recover
+            self.small_client = Chroma(
+                collection_name=f"rag_search_small_{self.index_options.dimensions}",
+                embedding_function=self.embedding_3_small,
+                persist_directory=persist_directory,
+            )
+        elif self.index_options.mode != "full":
+            self.vector_index = CompactVectorIndex(
+                os.path.join(persist_directory, VECTOR_INDEX_FILENAME),
+                self.index_options,
+            )
+        if self.index_options.mode != "full":
+            self.full_vectors = FullVectorStore(
+                os.path.join(persist_directory, FULL_VECTORS_FILENAME)
+            )
 
-    def ingest(self, file: str, chunk_size: int) -> str:
+    def _recover(self) -> None:
         """
-        Ingest documents and create embeddings.
+        Bring the manifest in sync with the vector store.
+
+        A collection ingested before the manifest existed is indexed once from its
+        chunk ids, and files left pending by an interrupted ingestion are removed.
+        Chunks ingested before the BM25 index existed are indexed from the
+        collection, and the compact vector index, the full-precision vectors and the
+        small model collection are synchronised with it.
+        """
+        if self.client is None or self.manifest is None or self.bm25_index is None:
+            raise RuntimeError("Chroma client is not initialized")
+
+        if self.manifest.is_empty():
+            ids = self.client.get(include=[]).get("ids", [])
+            chunk_ids: dict[tuple[str, int], list[str]] = {}
+            for id in ids:
+                filename, size, *index = id.rsplit("_", 2)
+                if not index or not size.isdigit():
+                    self.logger.warning(
+                        "Skipping chunk id %s not in the ingest format", id
+                    )
+                    continue
+                chunk_ids.setdefault((filename, int(size)), []).append(id)
+            for (filename, size), file_ids in chunk_ids.items():
+                self.manifest.begin(
+                    filename, None, size, ((id, None) for id in file_ids)
+                )
+                self.manifest.complete(filename)
+            if chunk_ids:
+                self.logger.info(
+                    "Indexed %d files (%d chunks) in the ingestion manifest",
+                    len(chunk_ids),
+                    len(ids),
+                )
+
+        for filename in self.manifest.pending_files():
+            self.logger.warning("Removing interrupted ingestion of %s", filename)
+            self._delete_file(filename)
+
+        if self.bm25_index.is_empty():
+            indexed = 0
+            while True:
+                batch = self.client.get(
+                    limit=_DELETE_BATCH_SIZE,
+                    offset=indexed,
+                    include=["documents", "metadatas"],
+                )
+                if not batch["ids"]:
+                    break
+                self.bm25_index.add(
+                    batch["ids"],
+                    [
+                        Document(page_content=text or "", metadata=metadata or {})
+                        for text, metadata in zip(
+                            batch["documents"], batch["metadatas"], strict=True
+                        )
+                    ],
+                )
+                indexed += len(batch["ids"])
+            if indexed:
+                self.logger.info("Indexed %d chunks in the BM25 index", indexed)
+
+        if self.vector_index is not None or self.full_vectors is not None:
+            self._sync_vector_index()
+        if self.small_client is not None:
+            self._sync_small_collection()
+
+    def _sync_vector_index(self) -> None:
+        """
+        Add the missing chunks to the compact vector index and the full-precision
+        vectors and remove the extra ones, e.g. after the index mode changed or
+        chunks were written in the "full" mode.
+        """
+        if self.client is None:
+            raise RuntimeError("Chroma client is not initialized")
+        chunk_ids = set(self.client.get(include=[])["ids"])
+        for name, index in (
+            (f"{self.index_options.mode} vector index", self.vector_index),
+            ("full-precision vectors", self.full_vectors),
+        ):
+            if index is None:
+                continue
+            indexed = set(index.ids())
+            index.delete(indexed - chunk_ids)
+            missing = sorted(chunk_ids - indexed)
+            for start in range(0, len(missing), _DELETE_BATCH_SIZE):
+                stored = self.client.get(
+                    ids=missing[start : start + _DELETE_BATCH_SIZE],
+                    include=["embeddings"],
+                )
+                index.add(stored["ids"], np.asarray(stored["embeddings"]))
+            if missing:
+                self.logger.info("Indexed %d chunks in the %s", len(missing), name)
+
+    def _index_vectors(self, chunk_ids: list[str]) -> None:
+        """
+        Add the full-precision vectors of stored chunks to the compact vector index
+        and the full-precision vectors.
         """
-        # Get existing ids in the collection
         if self.client is None:
             raise RuntimeError("Chroma client is not initialized")
-        existing_ids = self.client.get().get("ids", [])
-        self.logger.info("Existing ids: %s", existing_ids)
-
-        # Build search prefix
-        id_search_prefix = f"{Path(file).stem}_{chunk_size}_"
-        self.logger.info("id_search_prefix: %s", id_search_prefix)
-
-        # Check if document with this prefix already exists
-        already_exists = any(id.startswith(id_search_prefix) for id in existing_ids)
-        self.logger.info("already_exists: %s", already_exists)
-
-        if already_exists:
-            return f"{Path(file).name}: Already ingested with chunk size {chunk_size}. Skipping ingestion."
-
-        # check if document with this prefix but different chunk size exists
-        prefix_exists = any(id.startswith(f"{Path(file).stem}_") for id in existing_ids)
-        if prefix_exists:
-            # remove existing documents with this prefix
-            self.client.delete(
-                ids=[id for id in existing_ids if id.startswith(f"{Path(file).stem}_")]
+        stored = self.client.get(ids=chunk_ids, include=["embeddings"])
+        vectors = np.asarray(stored["embeddings"])
+        if self.vector_index is not None:
+            self.vector_index.add(stored["ids"], vectors)
+        if self.full_vectors is not None:
+            self.full_vectors.add(stored["ids"], vectors)
+
+    def _sync_small_collection(self) -> None:
+        """
+        Embed the missing chunks with the small model and remove the extra ones,
+        e.g. after switching to the "small_model" mode or changing its dimensions.
+        """
+        if self.client is None or self.small_client is None:
+            raise RuntimeError("Chroma client is not initialized")
+        chunk_ids = set(self.client.get(include=[])["ids"])
+        indexed = set(self.small_client.get(include=[])["ids"])
+        extra = sorted(indexed - chunk_ids)
+        for start in range(0, len(extra), _DELETE_BATCH_SIZE):
+            self.small_client.delete(ids=extra[start : start + _DELETE_BATCH_SIZE])
+        missing = sorted(chunk_ids - indexed)
+        for start in range(0, len(missing), _DELETE_BATCH_SIZE):
+            stored = self.client.get(
+                ids=missing[start : start + _DELETE_BATCH_SIZE], include=["documents"]
+            )
+            texts = [text or "" for text in stored["documents"]]
+            self._add_chunks(
+                [
+                    PreparedChunk(
+                        chunk_id=chunk_id,
+                        chunk_hash=chunk_hash(text),
+                        tokens=tokens,
+                        document=Document(page_content=text),
+                    )
+                    for chunk_id, text, tokens in zip(
+                        stored["ids"], texts, count_tokens(texts), strict=True
+                    )
+                ],
+                self._add_small_batch,
+            )
+        if missing:
+            self.logger.info(
+                "Embedded %d chunks in the small model collection", len(missing)
             )
 
-        file_type = Path(file).suffix.lower()
-        loader: PyPDFLoader | TextLoader | UnstructuredMarkdownLoader
+    def _delete_file(self, filename: str) -> None:
+        """
+        Delete the chunks of a file from the vector store and the manifest.
+        """
+        if self.manifest is None:
+            raise RuntimeError("Chroma client is not initialized")
+        chunk_ids = self.manifest.chunk_ids(filename)
+        self.manifest.mark_pending(filename)
+        self._delete_ids(chunk_ids)
+        self.manifest.remove(filename)
 
-        if file_type == ".pdf":
-            loader = PyPDFLoader(file)
-        elif file_type == ".txt":
-            loader = TextLoader(file)
-        elif file_type == ".md":
-            loader = UnstructuredMarkdownLoader(file)
-        else:
-            return f"{Path(file).name}: Unsupported file type"
+    def _delete_ids(self, chunk_ids: list[str]) -> None:
+        """
+        Delete chunks from the vector store and the BM25 index.
+        """
+        if self.client is None or self.bm25_index is None:
+            raise RuntimeError("Chroma client is not initialized")
+        if not chunk_ids:
+            return
+        try:
+            for start in range(0, len(chunk_ids), _DELETE_BATCH_SIZE):
+                batch = chunk_ids[start : start + _DELETE_BATCH_SIZE]
+                self.client.delete(ids=batch)
+                self.bm25_index.delete(batch)
+                if self.vector_index is not None:
+                    self.vector_index.delete(batch)
+                if self.full_vectors is not None:
+                    self.full_vectors.delete(batch)
+                if self.small_client is not None:
+                    self.small_client.delete(ids=batch)
+        finally:
+            self._bump_generation()
 
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            encoding_name="cl100k_base",
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_size // 8,
-        )
-        chunks = loader.load_and_split(text_splitter=text_splitter)
-        self.logger.info("len(chunks): %d", len(chunks))
+    @property
+    def generation(self) -> int:
+        """
+        Returns the generation of the vector store content.
+
+        The generation is bumped after every write (added, updated or deleted
+        chunks), so results computed before a write are keyed by an older
+        generation than any lookup made after it.
+        """
+        return self._generation
+
+    def _bump_generation(self) -> None:
+        with self._generation_lock:
+            self._generation += 1
+
+    def _file_lock(self, filename: str) -> threading.Lock:
+        with self._file_locks_lock:
+            return self._file_locks.setdefault(filename, threading.Lock())
+
+    def ingest(self, file: str, chunk_size: int) -> str:
+        """
+        Ingest documents and create embeddings.
+        """
+        return self.ingest_many([file], chunk_size)[0]
+
+    def ingest_many(self, files: list[str], chunk_size: int) -> list[str]:
+        """
+        Ingest several files through the ingestion pipeline.
+
+        Files are loaded and split in the process pool while the chunks of the
+        files already split are embedded, concurrently and under the rate limit of
+        the embedding endpoint. Only chunks whose text is not in the vector store
+        yet are embedded, and chunks no longer in the file are removed.
+
+        Args:
+            files (list[str]): Paths of PDF, TXT or MD files.
+            chunk_size (int): Chunk size in tokens.
+
+        Returns:
+            list[str]: Ingestion status of every file, in the order of files.
+        """
+        if self.manifest is None:
+            raise RuntimeError("Chroma client is not initialized")
+
+        statuses: dict[int, str] = {}
+        splits: dict[int, tuple[str, Future[list[PreparedChunk]]]] = {}
+        process_pool = get_process_pool(self.options.load_workers)
+        for position, file in enumerate(files):
+            if Path(file).suffix.lower() not in SUPPORTED_FILE_TYPES:
+                statuses[position] = f"{Path(file).name}: Unsupported file type"
+                continue
+
+            content_hash = file_hash(file)
+            entry = self.manifest.get(Path(file).stem)
+            # Files indexed from an older collection have no content hash
+            if (
+                entry is not None
+                and entry.state == COMPLETE
+                and entry.chunk_size == chunk_size
+                and entry.content_hash in (None, content_hash)
+            ):
+                statuses[position] = (
+                    f"{Path(file).name}: Already ingested with chunk size "
+                    f"{chunk_size}. Skipping ingestion."
+                )
+                continue
+
+            future = process_pool.submit(load_and_split, file, chunk_size)
+            splits[position] = (content_hash, future)
+
+        if splits:
+            with ThreadPoolExecutor(max_workers=len(splits)) as file_pool:
+                results = {
+                    position: file_pool.submit(
+                        self._ingest_file, files[position], chunk_size, *split
+                    )
+                    for position, split in splits.items()
+                }
+                for position, result in results.items():
+                    statuses[position] = result.result()
+
+        return [statuses[position] for position in range(len(files))]
+
+    def _ingest_file(
+        self,
+        file: str,
+        chunk_size: int,
+        content_hash: str,
+        split: Future[list[PreparedChunk]],
+    ) -> str:
+        """
+        Write the chunks of a split file to the vector store and the manifest.
+        """
+        if self.manifest is None:
+            raise RuntimeError("Chroma client is not initialized")
 
         id_prefix = Path(file).stem
-        batch_chunk = []
-        chunk_ids = []
-        batch_size = 0
-        for i, chunk in enumerate(chunks):
-            size = len(tiktoken.get_encoding("cl100k_base").encode(chunk.page_content))
-            if batch_size + size < 8192:
-                chunk_ids.append(f"{id_prefix}_{chunk_size}_{i}")
-                batch_chunk.append(chunk)
-                batch_size += size
-            else:
-                # we have just enough to process batch
-                self.client.add_documents(batch_chunk, ids=chunk_ids)
-                batch_chunk = [chunk]
-                chunk_ids = [f"{id_prefix}_{chunk_size}_{i}"]
-                batch_size = size
+        start = time.perf_counter()
+        try:
+            chunks = split.result()
+            self.logger.info("%s: %d chunks", Path(file).name, len(chunks))
+            with self._file_lock(id_prefix):
+                entry = self.manifest.get(id_prefix)
+                previous_ids = self.manifest.chunk_ids(id_prefix) if entry else []
+                # Chunk ids are content hashes: an id already in a completely
+                # ingested file has the same text and its embedding is reused
+                reusable = (
+                    set(previous_ids)
+                    if entry is not None and entry.state == COMPLETE
+                    else set()
+                )
+                chunk_ids = {chunk.chunk_id for chunk in chunks}
+                new_chunks = [c for c in chunks if c.chunk_id not in reusable]
+                kept_chunks = [c for c in chunks if c.chunk_id in reusable]
+                stale_ids = [id for id in previous_ids if id not in chunk_ids]
 
-        # process remaining batch if any
-        if batch_chunk:
-            self.client.add_documents(batch_chunk, ids=chunk_ids)
+                self.manifest.begin(
+                    id_prefix,
+                    content_hash,
+                    chunk_size,
+                    ((chunk.chunk_id, chunk.chunk_hash) for chunk in chunks),
+                )
+                try:
+                    self._add_chunks(new_chunks)
+                except Exception:
+                    # Keep the previous version of the file if there is one,
+                    # otherwise leave no partial file behind
+                    if entry is not None and entry.state == COMPLETE:
+                        added_ids = [chunk.chunk_id for chunk in new_chunks]
+                        self._delete_ids(added_ids)
+                        self.manifest.restore(entry, added_ids)
+                    else:
+                        self._delete_file(id_prefix)
+                    raise
+                try:
+                    self._update_metadata(kept_chunks)
+                    self._delete_ids(stale_ids)
+                except Exception:
+                    self._delete_file(id_prefix)
+                    raise
+                self.manifest.complete(id_prefix, stale_ids)
+        except Exception as e:
+            self.logger.exception("Ingestion of %s failed", file)
+            return f"{Path(file).name}: Ingestion failed: {e}"
 
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("ingest_seconds", elapsed)
+        self.metrics.increment("chunks_embedded", len(new_chunks))
+        self.metrics.increment("chunks_reused", len(kept_chunks))
+        self.logger.info(
+            "%s: %d chunks embedded, %d reused, %d removed in %.2fs",
+            Path(file).name,
+            len(new_chunks),
+            len(kept_chunks),
+            len(stale_ids),
+            elapsed,
+        )
+        if kept_chunks or stale_ids:
+            return (
+                f"{Path(file).name}: Successfully ingested ({len(new_chunks)} "
+                f"chunks embedded, {len(kept_chunks)} unchanged, "
+                f"{len(stale_ids)} removed)"
+            )
         return f"{Path(file).name}: Successfully ingested"
 
-    def describe_ingested_content(self) -> str:
+    def _add_chunks(
+        self,
+        chunks: list[PreparedChunk],
+        add_batch: Callable[[list[PreparedChunk]], None] | None = None,
+    ) -> None:
         """
-        Returns a summary of ingested content
+        Embed and add the chunks in concurrent, rate limited batches.
+
+        Args:
+            chunks (list[PreparedChunk]): Chunks to embed.
+            add_batch (Callable[[list[PreparedChunk]], None] | None, optional):
+                Embeds and stores one batch. Defaults to _add_batch.
         """
-        # Get existing ids in the collection
-        if self.client is None:
+        futures = [
+            self._embedding_pool.submit(add_batch or self._add_batch, batch)
+            for batch in batch_chunks(chunks, self.options.batch_tokens)
+        ]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            # Do not start the remaining batches of a failed file
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+    def _add_batch(self, batch: list[PreparedChunk]) -> None:
+        """
+        Embed and add one batch of chunks to the vector store and the BM25 index.
+        """
+        if self.client is None or self.bm25_index is None:
             raise RuntimeError("Chroma client is not initialized")
-        existing_ids = self.client.get().get("ids", [])
+        documents = [chunk.document for chunk in batch]
+        chunk_ids = [chunk.chunk_id for chunk in batch]
+        self._rate_limiter.acquire()
+        with self.metrics.timer("embedding_batch_seconds"):
+            try:
+                self.client.add_documents(documents, ids=chunk_ids)
+                self.bm25_index.add(chunk_ids, documents)
+                if self.vector_index is not None or self.full_vectors is not None:
+                    self._index_vectors(chunk_ids)
+                if self.small_client is not None:
+                    self._add_small_batch(batch)
+            finally:
+                self._bump_generation()
+        self.metrics.increment("embedding_batches")
 
-        # dictionary to store filename with chunk size
-        file_chunk_map: dict[str, int] = {}
+    def _add_small_batch(self, batch: list[PreparedChunk]) -> None:
+        """
+        Embed one batch of chunks with the small model and add the vectors to the
+        small model collection.
+        """
+        if self.small_client is None or self.embedding_3_small is None:
+            raise RuntimeError("Chroma client is not initialized")
+        self._rate_limiter.acquire()
+        vectors = self.embedding_3_small.embed_documents(
+            [chunk.document.page_content for chunk in batch]
+        )
+        # The collection only selects candidates, the texts and metadata are read
+        # from the main collection
+        self.small_client._collection.upsert(
+            ids=[chunk.chunk_id for chunk in batch],
+            embeddings=np.asarray(vectors, dtype=np.float32),
+        )
+
+    def _update_metadata(self, chunks: Iterable[PreparedChunk]) -> None:
+        """
+        Refresh the metadata (e.g. page numbers) of unchanged chunks without
+        embedding them again.
+        """
+        if self.client is None or self.bm25_index is None:
+            raise RuntimeError("Chroma client is not initialized")
+        chunks = [chunk for chunk in chunks if chunk.document.metadata]
+        if not chunks:
+            return
+        try:
+            for start in range(0, len(chunks), _DELETE_BATCH_SIZE):
+                batch = chunks[start : start + _DELETE_BATCH_SIZE]
+                # The langchain wrapper only updates documents together with their
+                # embeddings, so the metadata is updated on the collection itself
+                chunk_ids = [chunk.chunk_id for chunk in batch]
+                metadatas = [chunk.document.metadata for chunk in batch]
+                self.client._collection.update(ids=chunk_ids, metadatas=metadatas)  # type: ignore[arg-type]
+                self.bm25_index.update_metadata(chunk_ids, metadatas)
+        finally:
+            self._bump_generation()
 
-        for id in existing_ids:
-            parts = id.rsplit("_", 2)
-            filename, size, *index = parts
-            if filename not in file_chunk_map:
-                file_chunk_map[filename] = int(size)
+    def describe_ingested_content(self) -> str:
+        """
+        Returns a summary of ingested content
+        """
+        if self.manifest is None:
+            raise RuntimeError("Chroma client is not initialized")
+        files = self.manifest.files()
 
-        if not file_chunk_map:
+        if not files:
             return "No documents ingested yet"
 
         # format output
         return "\n".join(
-            f"{filename} (chunked size {size})"
-            for filename, size in file_chunk_map.items()
+            f"{entry.file} (chunked size {entry.chunk_size})" for entry in files
         )
 
-    def search(self, query: str) -> list[tuple[Document, float]]:
+    def search(
+        self, query: str, k: int = 6, mode: SearchMode = "dense"
+    ) -> list[tuple[Document, float]]:
         """
         Search for documents in the vector store
+
+        Args:
+            query (str): Query to search for.
+            k (int, optional): Number of documents to return. Defaults to 6.
+            mode (SearchMode, optional): "dense" ranks by embedding distance (lower
+                is better), "sparse" by BM25 score and "hybrid" by the reciprocal
+                rank fusion of both (higher is better). Defaults to "dense".
+
+        Returns:
+            list[tuple[Document, float]]: Documents and their scores, best first.
         """
-        if self.client is None:
+        if self.client is None or self.bm25_index is None:
             raise RuntimeError("Chroma client is not initialized")
-        results: list[tuple[Document, float]] = (
-            self.client.similarity_search_with_score(query, k=6)
-        )
+        results: list[tuple[Document, float]]
+        with self.metrics.timer(f"{mode}_search_seconds"):
+            if mode == "dense":
+                results = self._dense_search(query, k)
+            elif mode == "sparse":
+                results = self.bm25_index.search(query, k)
+            else:
+                candidates = k * _HYBRID_CANDIDATES
+                results = _reciprocal_rank_fusion(
+                    [
+                        [
+                            document
+                            for document, _ in self._dense_search(query, candidates)
+                        ],
+                        [
+                            document
+                            for document, _ in self.bm25_index.search(query, candidates)
+                        ],
+                    ],
+                    k,
+                )
         self.logger.debug("Search results: %s", results)
         return results
+
+    def _dense_search(self, query: str, k: int) -> list[tuple[Document, float]]:
+        """
+        Returns the k nearest chunks by distance of the full-precision embeddings.
+
+        With a compact vector index or the small model collection, the first pass
+        selects the candidates, they are rescored with their full-precision vectors
+        and only the texts of the k best are read from the vector store.
+        """
+        if self.client is None:
+            raise RuntimeError("Chroma client is not initialized")
+        if (
+            self.client.embeddings is None
+            or self.full_vectors is None
+            or (self.vector_index is None and self.small_client is None)
+        ):
+            results: list[tuple[Document, float]] = (
+                self.client.similarity_search_with_score(query, k=k)
+            )
+            return results
+
+        candidate_count = k * self.index_options.rescore_factor
+        small_vector: Future[list[float]] | None = None
+        if self.small_client is not None and self.embedding_3_small is not None:
+            # Both models embed the query at the same time
+            small_vector = self._query_pool.submit(
+                self.embedding_3_small.embed_query, query
+            )
+        query_vector = np.asarray(self.client.embeddings.embed_query(query))
+        candidates: list[str] = []
+        with self.metrics.timer("first_pass_seconds"):
+            if self.small_client is not None and small_vector is not None:
+                candidates = self.small_client._collection.query(
+                    query_embeddings=np.asarray(
+                        [small_vector.result()], dtype=np.float32
+                    ),
+                    n_results=candidate_count,
+                    include=[],
+                )["ids"][0]
+            elif self.vector_index is not None:
+                candidates = self.vector_index.search(query_vector, candidate_count)
+        # Reading the vectors from Chroma costs more than the first pass saves
+        candidates, vectors = self.full_vectors.get(candidates)
+        if not candidates:
+            return []
+        # Same distance as the collection, so the scores match the "full" mode
+        space = (self.client._collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "cosine":
+            distances = 1 - (vectors @ query_vector) / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+            )
+        elif space == "ip":
+            distances = 1 - vectors @ query_vector
+        else:
+            distances = np.sum((vectors - query_vector) ** 2, axis=1)
+        best = np.argsort(distances)[:k]
+        stored = self.client.get(
+            ids=[candidates[i] for i in best], include=["documents", "metadatas"]
+        )
+        documents = {
+            chunk_id: Document(
+                page_content=text or "", metadata=metadata or {}, id=chunk_id
+            )
+            for chunk_id, text, metadata in zip(
+                stored["ids"], stored["documents"], stored["metadatas"], strict=True
+            )
+        }
+        return [
+            (documents[candidates[i]], float(distances[i]))
+            for i in best
+            if candidates[i] in documents
+        ]
+
+
+def _reciprocal_rank_fusion(
+    rankings: list[list[Document]], k: int
+) -> list[tuple[Document, float]]:
+    """
+    Fuse rankings by summing 1 / (_RRF_K + rank) of every document, which needs
+    no calibration between the embedding distances and the BM25 scores.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.id or document.page_content
+            scores[key] = scores.get(key, 0.0) + 1 / (_RRF_K + rank)
+            documents.setdefault(key, document)
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    return [(documents[key], scores[key]) for key in best]
@@ -0,0 +1,208 @@
+import functools
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import tiktoken
+from langchain_community.document_loaders import (
+    PyPDFLoader,
+    TextLoader,
+    UnstructuredMarkdownLoader,
+)
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pydantic import BaseModel, Field
+
+ENCODING_NAME = "cl100k_base"
+SUPPORTED_FILE_TYPES = (".pdf", ".txt", ".md")
+
+# Average size of a split segment in chunks, see _segments()
+_SEGMENT_CHUNKS = 4
+
+
+class IngestionOptions(BaseModel):
+    """
+    Options of the ingestion pipeline.
+    """
+
+    load_workers: int = Field(
+        default_factory=lambda: max(1, min(4, os.cpu_count() or 1)),
+        ge=1,
+        description="Processes loading and splitting files",
+    )
+    embedding_concurrency: int = Field(
+        default=4, ge=1, description="Embedding batches sent at the same time"
+    )
+    embedding_requests_per_second: float = Field(
+        default=4.0, gt=0, description="Rate limit of the embedding requests"
+    )
+    batch_tokens: int = Field(
+        default=8192, ge=1, description="Maximum tokens of an embedding batch"
+    )
+
+    @classmethod
+    def from_env(cls) -> "IngestionOptions":
+        """
+        Build the options from RAG_INGEST_<OPTION> environment variables, e.g. RAG_INGEST_EMBEDDING_CONCURRENCY.
+        """
+        values = {
+            name: os.environ[f"RAG_INGEST_{name.upper()}"]
+            for name in cls.model_fields
+            if f"RAG_INGEST_{name.upper()}" in os.environ
+        }
+        return cls(**values)
+
+
+class PreparedChunk(BaseModel):
+    """
+    Chunk of a file with its token count and content hash, ready to be embedded.
+    """
+
+    chunk_id: str = Field(description="'<file>_<chunk size>_<content hash>'")
+    chunk_hash: str = Field(description="SHA-256 prefix of the chunk text")
+    tokens: int = Field(description="cl100k_base token count of the chunk text")
+    document: Document
+
+
+@functools.cache
+def _encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding(ENCODING_NAME)
+
+
+def count_tokens(texts: list[str]) -> list[int]:
+    """
+    Returns the cl100k_base token count of every text.
+    """
+    return [len(tokens) for tokens in _encoding().encode_ordinary_batch(texts)]
+
+
+def chunk_hash(text: str) -> str:
+    """
+    Returns the content hash identifying a chunk text.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def _segments(text: str, chunk_size: int) -> list[str]:
+    """
+    Cut the text into segments at content-defined paragraph boundaries.
+
+    The splitter packs paragraphs greedily, so an edit shifts the boundaries of
+    every following chunk. Splitting each segment on its own keeps the chunks
+    after the next segment boundary unchanged. A paragraph ends a segment
+    depending on a hash of its text, with a probability growing with its length,
+    so segments average _SEGMENT_CHUNKS chunks wherever they are in the text.
+    """
+    paragraphs = text.split("\n\n")
+    if len(paragraphs) == 1:
+        return [text]
+
+    segment_tokens = _SEGMENT_CHUNKS * chunk_size
+    token_counts = _encoding().encode_ordinary_batch(paragraphs)
+    segments = []
+    start = 0
+    for i, (paragraph, tokens) in enumerate(zip(paragraphs, token_counts, strict=True)):
+        digest = hashlib.sha256(paragraph.encode()).digest()
+        if int.from_bytes(digest[:8]) / 2**64 < len(tokens) / segment_tokens:
+            segments.append("\n\n".join(paragraphs[start : i + 1]))
+            start = i + 1
+    if start < len(paragraphs):
+        segments.append("\n\n".join(paragraphs[start:]))
+    return segments
+
+
+def load_and_split(file: str, chunk_size: int) -> list[PreparedChunk]:
+    """
+    Load and split a file, counting the tokens of every chunk once.
+
+    Runs in the ingestion process pool. Chunk boundaries are content-defined, so
+    editing a file only changes the chunks around the edit. Chunks with the same
+    text get the same id, so only the first one is kept.
+
+    Args:
+        file (str): Path of a PDF, TXT or MD file.
+        chunk_size (int): Chunk size in tokens.
+
+    Returns:
+        list[PreparedChunk]: Chunks in document order.
+    """
+    file_type = Path(file).suffix.lower()
+    loader: PyPDFLoader | TextLoader | UnstructuredMarkdownLoader
+    if file_type == ".pdf":
+        loader = PyPDFLoader(file)
+    elif file_type == ".txt":
+        loader = TextLoader(file)
+    elif file_type == ".md":
+        loader = UnstructuredMarkdownLoader(file)
+    else:
+        raise ValueError(f"Unsupported file type {file_type}")
+
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=ENCODING_NAME,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_size // 8,
+    )
+    documents = text_splitter.split_documents(
+        Document(page_content=segment, metadata=document.metadata)
+        for document in loader.load()
+        for segment in _segments(document.page_content, chunk_size)
+    )
+    token_counts = count_tokens([document.page_content for document in documents])
+
+    id_prefix = f"{Path(file).stem}_{chunk_size}_"
+    chunks: dict[str, PreparedChunk] = {}
+    for document, tokens in zip(documents, token_counts, strict=True):
+        content_hash = chunk_hash(document.page_content)
+        chunk_id = id_prefix + content_hash
+        if chunk_id not in chunks:
+            chunks[chunk_id] = PreparedChunk(
+                chunk_id=chunk_id,
+                chunk_hash=content_hash,
+                tokens=tokens,
+                document=document,
+            )
+    return list(chunks.values())
+
+
+def batch_chunks(
+    chunks: list[PreparedChunk], max_tokens: int
+) -> Iterator[list[PreparedChunk]]:
+    """
+    Group the chunks into embedding batches of up to max_tokens tokens.
+
+    A chunk larger than max_tokens is sent as a batch of its own.
+    """
+    batch: list[PreparedChunk] = []
+    batch_tokens = 0
+    for chunk in chunks:
+        if batch and batch_tokens + chunk.tokens >= max_tokens:
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(chunk)
+        batch_tokens += chunk.tokens
+    if batch:
+        yield batch
+
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the process pool loading and splitting files, started on first use.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Forking a process running Gradio and HTTP client threads is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
@@ -0,0 +1,241 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+
+from pydantic import BaseModel, Field
+
+from graph_examples.logger import get_logger
+
+MANIFEST_FILENAME = "ingestion_manifest.sqlite"
+
+# A file is "pending" while its chunks are written to or deleted from the vector
+# store, and "complete" once the vector store matches the manifest
+PENDING = "pending"
+COMPLETE = "complete"
+
+
+class IngestedFile(BaseModel):
+    """
+    Manifest entry of an ingested file.
+    """
+
+    file: str = Field(description="File name without extension, the chunk id prefix")
+    content_hash: str | None = Field(
+        description="SHA-256 of the file content, None for files ingested before the manifest"
+    )
+    chunk_size: int = Field(description="Chunk size in tokens")
+    chunk_count: int = Field(description="Number of chunks in the vector store")
+    state: str = Field(description="'pending' or 'complete'")
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the SHA-256 of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    SQLite index of the files and chunk ids stored in the vector store.
+
+    Every change to the vector store is bracketed by the manifest: the file is
+    recorded as pending (with the chunk ids about to be written or deleted) before
+    the vector store is touched and marked complete afterwards. Pending entries
+    left behind by a crash are returned by pending_files() so the caller can
+    remove their chunks and drop them.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the IngestionManifest.
+        """
+        self.logger = get_logger(__name__)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Deleting a file deletes its chunk ids
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "file TEXT PRIMARY KEY, content_hash TEXT, "
+                "chunk_size INTEGER NOT NULL, chunk_count INTEGER NOT NULL, "
+                "state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "chunk_id TEXT PRIMARY KEY, "
+                "file TEXT NOT NULL REFERENCES files (file) ON DELETE CASCADE, "
+                "chunk_hash TEXT)"
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")
+            }
+            if "chunk_hash" not in columns:
+                self._conn.execute("ALTER TABLE chunks ADD COLUMN chunk_hash TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunks_file ON chunks (file)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS files_state ON files (state)"
+            )
+
+    def is_empty(self) -> bool:
+        """
+        Check if the manifest has no files.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def get(self, file: str) -> IngestedFile | None:
+        """
+        Returns the manifest entry of the file, if any.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file, content_hash, chunk_size, chunk_count, state "
+                "FROM files WHERE file = ?",
+                (file,),
+            ).fetchone()
+        if row is None:
+            return None
+        return IngestedFile(
+            file=row[0],
+            content_hash=row[1],
+            chunk_size=row[2],
+            chunk_count=row[3],
+            state=row[4],
+        )
+
+    def chunk_ids(self, file: str) -> list[str]:
+        """
+        Returns the chunk ids of the file.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE file = ? ORDER BY rowid", (file,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def files(self) -> list[IngestedFile]:
+        """
+        Returns the completely ingested files in ingestion order.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file, content_hash, chunk_size, chunk_count, state "
+                "FROM files WHERE state = ? ORDER BY rowid",
+                (COMPLETE,),
+            ).fetchall()
+        return [
+            IngestedFile(
+                file=row[0],
+                content_hash=row[1],
+                chunk_size=row[2],
+                chunk_count=row[3],
+                state=row[4],
+            )
+            for row in rows
+        ]
+
+    def pending_files(self) -> list[str]:
+        """
+        Returns the files left pending by an interrupted ingestion or deletion.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file FROM files WHERE state = ?", (PENDING,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def begin(
+        self,
+        file: str,
+        content_hash: str | None,
+        chunk_size: int,
+        chunks: Iterable[tuple[str, str | None]],
+    ) -> None:
+        """
+        Record the file as pending with the (chunk id, chunk hash) pairs of its new
+        version.
+
+        The chunk ids of the previous version are kept until complete() is called
+        with the stale ones, so an interrupted update can still remove them.
+        """
+        chunks = list(chunks)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (file) DO "
+                "UPDATE SET content_hash = excluded.content_hash, "
+                "chunk_size = excluded.chunk_size, chunk_count = excluded.chunk_count, "
+                "state = excluded.state, updated_at = excluded.updated_at",
+                (file, content_hash, chunk_size, len(chunks), PENDING, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                ((chunk_id, file, chunk_hash) for chunk_id, chunk_hash in chunks),
+            )
+
+    def mark_pending(self, file: str) -> None:
+        """
+        Mark the file as pending before its chunks are deleted from the vector store.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET state = ?, updated_at = ? WHERE file = ?",
+                (PENDING, time.time(), file),
+            )
+
+    def complete(self, file: str, stale_ids: Iterable[str] = ()) -> None:
+        """
+        Mark the file as completely written to the vector store, once the stale
+        chunk ids of its previous version are deleted from it.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE chunk_id = ?",
+                ((chunk_id,) for chunk_id in stale_ids),
+            )
+            self._conn.execute(
+                "UPDATE files SET state = ?, updated_at = ? WHERE file = ?",
+                (COMPLETE, time.time(), file),
+            )
+
+    def restore(self, entry: IngestedFile, added_ids: Iterable[str]) -> None:
+        """
+        Restore the previous version of a file after its update failed, once the
+        added chunk ids are deleted from the vector store.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE chunk_id = ?",
+                ((chunk_id,) for chunk_id in added_ids),
+            )
+            self._conn.execute(
+                "UPDATE files SET content_hash = ?, chunk_size = ?, chunk_count = ?, "
+                "state = ?, updated_at = ? WHERE file = ?",
+                (
+                    entry.content_hash,
+                    entry.chunk_size,
+                    entry.chunk_count,
+                    entry.state,
+                    time.time(),
+                    entry.file,
+                ),
+            )
+
+    def remove(self, file: str) -> None:
+        """
+        Remove the file and its chunk ids, once they are deleted from the vector store.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE file = ?", (file,))
@@ -0,0 +1,112 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+from graph_examples.rag_search.types import ListOfSearchedResults
+
+
+class CachedQueryResults(NamedTuple):
+    """
+    Search and reranked results of a query at a vector store generation.
+    """
+
+    generation: int
+    created_at: float
+    search_results: ListOfSearchedResults
+    reranked_results: list[dict[str, Any]]
+
+
+class QueryResultCache:
+    """
+    In-memory LRU cache of the search and reranked results of recent queries.
+
+    Entries are keyed by the normalized query and only served for the vector store
+    generation they were computed at, so results are never served once a file is
+    ingested or deleted. Entries expire after ttl_seconds and the least recently
+    used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600) -> None:
+        """
+        Initialize the QueryResultCache.
+        """
+        self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedQueryResults] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Returns the cache key of a query, ignoring case and whitespace.
+        """
+        return " ".join(query.casefold().split())
+
+    def get(
+        self, query: str, generation: int
+    ) -> tuple[ListOfSearchedResults, list[dict[str, Any]]] | None:
+        """
+        Returns copies of the cached (search results, reranked results) of the
+        query at the generation, if any.
+        """
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.generation != generation
+                or time.monotonic() - entry.created_at > self.ttl_seconds
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        self.metrics.increment("hits" if entry is not None else "misses")
+        if entry is None:
+            return None
+        self.logger.info("Query cache hit for %r", query)
+        # Callers own the returned results
+        return (
+            entry.search_results.model_copy(deep=True),
+            copy.deepcopy(entry.reranked_results),
+        )
+
+    def put(
+        self,
+        query: str,
+        generation: int,
+        search_results: ListOfSearchedResults,
+        reranked_results: list[dict[str, Any]],
+    ) -> None:
+        """
+        Store the results of the query computed at the generation.
+        """
+        key = self.normalize(query)
+        entry = CachedQueryResults(
+            generation,
+            time.monotonic(),
+            search_results.model_copy(deep=True),
+            copy.deepcopy(reranked_results),
+        )
+        with self._lock:
+            current = self._entries.get(key)
+            # A slow query must not replace the results of a newer generation
+            if current is not None and current.generation > generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every cached result.
+        """
+        with self._lock:
+            self._entries.clear()
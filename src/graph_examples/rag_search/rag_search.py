@@ -1,5 +1,7 @@
 import os
-from typing import Any
+import threading
+import time
+from typing import Any, Literal
 
 from flashrank import Ranker, RerankRequest
 from langchain.agents import create_agent
@@ -11,15 +13,62 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from opik.integrations.langchain import OpikTracer
+from pydantic import BaseModel, Field
 
+from graph_examples.llm_cache import with_llm_cache
 from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
+from graph_examples.rag_search.chroma_interface import ChromaInterface
+from graph_examples.rag_search.query_cache import QueryResultCache
 from graph_examples.rag_search.rag_search_prompts import (
     PROMPT_FOR_ANSWER,
     PROMPT_FOR_RAG_SEARCH,
     SYSTEM_MESSAGE_FOR_RAG_SEARCH,
 )
-from graph_examples.rag_search.tools.chroma_search import semantic_search
-from graph_examples.rag_search.types import ListOfSearchedResults
+from graph_examples.rag_search.tools.chroma_search import (
+    search_documents,
+    semantic_search,
+)
+from graph_examples.rag_search.types import ListOfSearchedResults, SearchMode
+
+RANKER_MODEL = "ms-marco-MiniLM-L-12-v2"
+RANKER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+class RagSearchOptions(BaseModel):
+    """
+    Options selecting how RagSearch retrieves documents.
+    """
+
+    retrieval_mode: Literal["direct", "agent"] = Field(
+        default="direct",
+        description="'direct' queries the vector store from the graph, 'agent' lets a gpt-4.1 agent call the semantic_search tool",
+    )
+    search_mode: SearchMode = Field(
+        default="dense",
+        description="'dense' ranks by embedding distance, 'hybrid' fuses the embedding and BM25 rankings by reciprocal rank (higher scores are better), 'sparse' uses BM25 only",
+    )
+    top_k: int = Field(default=6, ge=1, description="Number of retrieved documents")
+    query_cache_entries: int = Field(
+        default=256,
+        ge=0,
+        description="Queries whose search and reranked results are cached, 0 disables the cache",
+    )
+    query_cache_ttl_seconds: float = Field(
+        default=600, gt=0, description="Lifetime of the cached query results"
+    )
+
+    @classmethod
+    def from_env(cls) -> "RagSearchOptions":
+        """
+        Build the options from RAG_SEARCH_<OPTION> environment variables, e.g. RAG_SEARCH_RETRIEVAL_MODE.
+        """
+        values = {
+            name: os.environ[f"RAG_SEARCH_{name.upper()}"]
+            for name in cls.model_fields
+            if f"RAG_SEARCH_{name.upper()}" in os.environ
+        }
+        return cls(**values)
 
 
 class State(MessagesState, total=False):
@@ -28,6 +77,7 @@ class State(MessagesState, total=False):
     """
 
     query: str
+    generation: int
     search_results: ListOfSearchedResults
     answer_baseline: str
     reranked_results: list[dict[str, Any]]
@@ -37,13 +87,74 @@ class State(MessagesState, total=False):
 class RagSearch:
     """
     RagSearch class to perform RAG search on ingested documents
+
+    The engine holds no per-query state, so a single instance (with its model
+    clients, agent, graph and reranker) is shared by all concurrent Gradio workers.
     """
 
-    def __init__(self) -> None:
+    _instance: "RagSearch | None" = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "RagSearch":
+        """
+        Returns the process-wide RagSearch engine
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(RagSearchOptions.from_env())
+        return cls._instance
+
+    def __init__(self, options: RagSearchOptions | None = None) -> None:
         """
         Initialize the RagSearch class
         """
+        self.options = options or RagSearchOptions()
         self.logger = get_logger(__name__)
+        self.metrics = get_metrics(__name__)
+        self._initialize_models()
+        self._initialize_ranker()
+        # Repeated queries skip the embedding, the vector search and the rerank
+        self._query_cache = (
+            QueryResultCache(
+                max_entries=self.options.query_cache_entries,
+                ttl_seconds=self.options.query_cache_ttl_seconds,
+            )
+            if self.options.query_cache_entries
+            else None
+        )
+        # chains are stateless, build them once and share them across queries
+        if self.options.retrieval_mode == "agent":
+            self._chromadb_search_agent = create_agent(
+                model=self._search_model,
+                tools=[semantic_search],
+                system_prompt=SYSTEM_MESSAGE_FOR_RAG_SEARCH,
+                response_format=ProviderStrategy(ListOfSearchedResults),
+            )
+            self._search_chain = PROMPT_FOR_RAG_SEARCH | self._chromadb_search_agent
+        # answers depend only on the query and the retrieved documents, so they
+        # are served from the LLM response cache
+        self._answer_chain = (
+            PROMPT_FOR_ANSWER | with_llm_cache(self._gllm_41) | StrOutputParser()
+        )
+        self._graph = self._build_graph()
+
+        # optional tracing
+        self._tracer = None
+        if os.getenv("OPIK_API_KEY"):
+            try:
+                project_name = os.path.splitext(os.path.basename(__file__))[0]
+                self._tracer = OpikTracer(
+                    graph=self._graph.get_graph(xray=True), project_name=project_name
+                )
+            except Exception as e:
+                self.logger.warning("Failed to initialize tracer: %s", e)
+
+    def _initialize_models(self) -> None:
+        """
+        Create the chat model clients shared by all queries.
+        """
         self._gllm_41 = AzureAIChatCompletionsModel(
             endpoint=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
             credential=os.getenv("GITHUB_TOKEN"),
@@ -62,28 +173,44 @@ class RagSearch:
             model="openai/gpt-4.1-nano",  # Lower reasoning and accuracy
             # api_version="2024-08-01-preview",
         )
-        self._chromadb_search_agent = create_agent(
-            model=ChatOpenAI(
-                model="openai/gpt-4.1",
-                api_key=os.getenv("GITHUB_TOKEN"),
-                base_url=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
-            ),
-            tools=[semantic_search],
-            system_prompt=SYSTEM_MESSAGE_FOR_RAG_SEARCH,
-            response_format=ProviderStrategy(ListOfSearchedResults),
+        self._search_model = ChatOpenAI(
+            model="openai/gpt-4.1",
+            api_key=os.getenv("GITHUB_TOKEN"),
+            base_url=os.getenv("GITHUB_INFERENCE_ENDPOINT"),
         )
-        self._graph = self._build_graph()
 
-        # optional tracing
-        self._tracer = None
-        if os.getenv("OPIK_API_KEY"):
-            try:
-                project_name = os.path.splitext(os.path.basename(__file__))[0]
-                self._tracer = OpikTracer(
-                    graph=self._graph.get_graph(xray=True), project_name=project_name
-                )
-            except Exception as e:
-                self.logger.warning("Failed to initialize tracer: %s", e)
+    def _initialize_ranker(self) -> None:
+        """
+        Load the reranker model once and warm it up before the first query.
+        """
+        start = time.perf_counter()
+        self._ranker = Ranker(model_name=RANKER_MODEL, cache_dir=RANKER_CACHE_DIR)
+        # The ONNX session and the tokenizer (with its padding state) are shared,
+        # so reranks are serialised; the session already uses all cores per call
+        self._ranker_lock = threading.Lock()
+        self._rerank("warm up", [{"id": 0, "text": "warm up"}])
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("ranker_startup_seconds", elapsed)
+        self.logger.info("Reranker %s ready in %.3fs", RANKER_MODEL, elapsed)
+
+    def _rerank(
+        self, query: str, passages: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Rerank the passages for the query with the shared ranker.
+        """
+        with self._ranker_lock, self.metrics.timer("rerank_seconds"):
+            reranked: list[dict[str, Any]] = self._ranker.rerank(
+                RerankRequest(query=query, passages=passages)
+            )
+        return reranked
+
+    @property
+    def graph(self) -> CompiledStateGraph[State]:
+        """
+        Returns the compiled RAG search graph
+        """
+        return self._graph
 
     def _build_graph(self) -> CompiledStateGraph:
         """
@@ -93,37 +220,72 @@ class RagSearch:
         workflow_builder = StateGraph(State)
 
         # Add nodes
-        workflow_builder.add_node("rag_agent", self._rag_agent)
+        # The direct retrieval skips the agent's two LLM round trips, which only
+        # call semantic_search and echo its results back
+        if self.options.retrieval_mode == "agent":
+            search_node = "rag_agent"
+            workflow_builder.add_node(search_node, self._rag_agent)
+        else:
+            search_node = "retrieve"
+            workflow_builder.add_node(search_node, self._retrieve)
         workflow_builder.add_node("answer_baseline", self._answer_baseline)
         workflow_builder.add_node("reranker", self._reranker)
         workflow_builder.add_node("answer_reranked", self._answer_reranked)
 
         # Add edges
-        workflow_builder.add_edge(START, "rag_agent")
-        workflow_builder.add_edge("rag_agent", "answer_baseline")
-        workflow_builder.add_edge("rag_agent", "reranker")
+        if self._query_cache is not None:
+            workflow_builder.add_node("cached_results", self._cached_results)
+            workflow_builder.add_edge(START, "cached_results")
+            workflow_builder.add_conditional_edges(
+                "cached_results",
+                self._route_cached_results,
+                [search_node, "answer_baseline", "answer_reranked"],
+            )
+        else:
+            workflow_builder.add_edge(START, search_node)
+        workflow_builder.add_edge(search_node, "answer_baseline")
+        workflow_builder.add_edge(search_node, "reranker")
         workflow_builder.add_edge("reranker", "answer_reranked")
         workflow_builder.add_edge("answer_baseline", END)
         workflow_builder.add_edge("answer_reranked", END)
 
         # compile the graph
-        graph = workflow_builder.compile()
+        # The diagram is rendered at build time by `render_graphs`, not here
+        return workflow_builder.compile()
 
-        try:
-            png_data = graph.get_graph().draw_mermaid_png()
-            with open("src/graph_examples/rag_search/rag_search_graph.png", "wb") as f:
-                f.write(png_data)
-        except Exception as e:
-            self.logger.exception("Could not generate graph PNG: %s", e)
+    def _cached_results(self, state: State) -> State:
+        """
+        Serve the search and reranked results of a repeated query from the cache
+        """
+        if self._query_cache is None:
+            raise RuntimeError("Query cache is disabled")
+        # Read before the search, so results of a search overlapping an ingestion
+        # are stored under the generation before it
+        generation = ChromaInterface.get_instance().generation
+        cached = self._query_cache.get(state["query"], generation)
+        if cached is None:
+            return {"messages": [], "generation": generation}
+        search_results, reranked_results = cached
+        return {
+            "messages": [],
+            "generation": generation,
+            "search_results": search_results,
+            "reranked_results": reranked_results,
+        }
 
-        return graph
+    def _route_cached_results(self, state: State) -> list[str]:
+        """
+        Answer from the cached results, or search on a cache miss
+        """
+        if "reranked_results" in state:
+            return ["answer_baseline", "answer_reranked"]
+        return ["rag_agent" if self.options.retrieval_mode == "agent" else "retrieve"]
 
     def _rag_agent(self, state: State) -> State:
         """
         RAG agent to perform RAG search on ingested documents
         """
-        search_chain = PROMPT_FOR_RAG_SEARCH | self._chromadb_search_agent
-        response = search_chain.invoke(state["query"])
+        response = self._search_chain.invoke(state["query"])
         self.logger.debug("Response: %s", response)
         self.logger.info(
             "Number of results: %d", len(response["structured_response"].results)
@@ -133,11 +295,23 @@ class RagSearch:
             "search_results": response["structured_response"],
         }
 
+    def _retrieve(self, state: State) -> State:
+        """
+        Search the vector store directly and build the search results locally
+        """
+        with self.metrics.timer("retrieve_seconds"):
+            results = ListOfSearchedResults(
+                results=search_documents(
+                    state["query"], self.options.search_mode, self.options.top_k
+                )
+            )
+        self.logger.info("Number of results: %d", len(results.results))
+        return {"messages": [], "search_results": results}
+
     def _answer_baseline(self, state: State) -> State:
         """
         Generate answer based on top 2 documents from search results
         """
-        answer_chain = PROMPT_FOR_ANSWER | self._gllm_41 | StrOutputParser()
         documents = "\n".join(
             [
                 f"Document {i + 1}:\n{record.document}"
@@ -145,7 +319,7 @@ class RagSearch:
             ]
         )
         self.logger.debug("Documents: %s", documents)
-        response = answer_chain.invoke(
+        response = self._answer_chain.invoke(
             {"query": state["query"], "documents": documents}
         )
         self.logger.debug("Response: %s", response)
@@ -155,36 +329,34 @@ class RagSearch:
         """
         Reranker to rerank the search results
         """
-        ranker = Ranker(
-            model_name="ms-marco-MiniLM-L-12-v2",
-            cache_dir=os.path.join(
-                os.path.dirname(os.path.abspath(__file__)), ".cache"
-            ),
-        )
         if state["search_results"].results:
-            reranked_results = ranker.rerank(
-                RerankRequest(
-                    query=state["query"],
-                    passages=[
-                        {
-                            "id": i,
-                            "text": r.document,
-                            "meta": {"source": r.source, "original_score": r.score},
-                        }
-                        for i, r in enumerate(state["search_results"].results)
-                    ],
-                )
+            reranked_results = self._rerank(
+                state["query"],
+                [
+                    {
+                        "id": i,
+                        "text": r.document,
+                        "meta": {"source": r.source, "original_score": r.score},
+                    }
+                    for i, r in enumerate(state["search_results"].results)
+                ],
             )
-            return {"messages": [], "reranked_results": reranked_results}
         else:
-            return {"messages": [], "reranked_results": []}
+            reranked_results = []
+
+        if self._query_cache is not None and "generation" in state:
+            self._query_cache.put(
+                state["query"],
+                state["generation"],
+                state["search_results"],
+                reranked_results,
+            )
+        return {"messages": [], "reranked_results": reranked_results}
 
     def _answer_reranked(self, state: State) -> State:
         """
         Generate answer based on reranked documents
         """
-        reranked_answer_chain = PROMPT_FOR_ANSWER | self._gllm_41 | StrOutputParser()
-
         if state["reranked_results"]:
             reranked_documents = "\n".join(
                 [
@@ -196,7 +368,7 @@ class RagSearch:
             reranked_documents = ""
 
         self.logger.info("Reranked Documents: %s", reranked_documents)
-        response = reranked_answer_chain.invoke(
+        response = self._answer_chain.invoke(
             {"query": state["query"], "documents": reranked_documents}
         )
         self.logger.info("Reranked Response: %s", response)
@@ -211,7 +383,8 @@ class RagSearch:
         config: RunnableConfig | None = (
             {"callbacks": [self._tracer]} if self._tracer else None
         )
-        response = self._graph.invoke({"query": query}, config=config)
+        with self.metrics.timer("query_seconds"):
+            response = self._graph.invoke({"query": query}, config=config)
         self.logger.debug("Response: %s", response)
         return (
             response["search_results"],
@@ -1,15 +1,18 @@
 import os
+import time
 
 import gradio as gr
 import pandas as pd
 from dotenv import load_dotenv
 
 from graph_examples.logger import get_logger
+from graph_examples.metrics import get_metrics
 from graph_examples.rag_search.chroma_interface import ChromaInterface
 from graph_examples.rag_search.rag_search import RagSearch
 
 load_dotenv(override=True)
 logger = get_logger(__name__)
+metrics = get_metrics(__name__)
 
 
 def ingest_documents(file_list: list[str], chunk_size: int) -> str:
@@ -20,11 +23,8 @@ def ingest_documents(file_list: list[str], chunk_size: int) -> str:
         return "Please upload a file first."
 
     ingest_chroma = ChromaInterface.get_instance()
-    ingestion_status = []
-
-    for file in file_list:
-        status = ingest_chroma.ingest(file, chunk_size)
-        ingestion_status.append(status)
+    # The files are split in parallel and their embedding batches are pipelined
+    ingestion_status = ingest_chroma.ingest_many(file_list, int(chunk_size))
 
     return "\n".join(ingestion_status)
 
@@ -49,7 +49,7 @@ def backend_search_pipeline(
     if not query or not query.strip():
         return "Please enter a search query.", pd.DataFrame(), pd.DataFrame(), "", ""
 
-    rag_search = RagSearch()
+    rag_search = RagSearch.get_instance()
     search_results, reranked_results, baseline_answer, reranked_answer = (
         rag_search.respond(query)
     )
@@ -79,10 +79,24 @@ def backend_search_pipeline(
     return query, search_result_df, reranked_result_df, baseline_answer, reranked_answer
 
 
+def warm_up_engine() -> float:
+    """
+    Build the shared RagSearch engine and load the reranker before the first query.
+    """
+    start = time.perf_counter()
+    RagSearch.get_instance()
+    elapsed = time.perf_counter() - start
+    metrics.observe("engine_startup_seconds", elapsed)
+    logger.info("RagSearch engine ready in %.3fs", elapsed)
+    return elapsed
+
+
 def main() -> None:
     """
     Main function to run the app.
     """
+    warm_up_engine()
+
     title = os.path.splitext(os.path.basename(__file__))[0]
 
     with gr.Blocks(title=title) as demo:
@@ -1,27 +1,45 @@
 from langchain.tools import tool
 
 from graph_examples.rag_search.chroma_interface import ChromaInterface
-from graph_examples.rag_search.types import SearchResult
+from graph_examples.rag_search.types import SearchMode, SearchResult
 
 
-@tool
-def semantic_search(query: str) -> list[SearchResult]:
+def search_documents(
+    query: str, mode: SearchMode = "dense", k: int = 6
+) -> list[SearchResult]:
     """
-    Semantic search on ingested documents.
+    Semantic search on ingested documents, without going through an LLM.
 
     Args:
         query (str): Query to search for
+        mode (SearchMode): "dense" (embeddings, default), "sparse" (BM25 keywords) or "hybrid" (both, fused)
+        k (int): Number of results
 
     Returns:
         list[SearchResult]: List of search results. Each result contains the document, source, and score.
     """
     chroma = ChromaInterface.get_instance()
-    results = chroma.search(query)
+    results = chroma.search(query, k=k, mode=mode)
     return [
         SearchResult(
             document=result[0].page_content,
             source=result[0].metadata.get("source", "").split("/")[-1],
-            score=round(result[1], 3),
+            score=round(result[1], 4),
         )
         for result in results
     ]
+
+
+@tool
+def semantic_search(query: str, mode: SearchMode = "dense") -> list[SearchResult]:
+    """
+    Semantic search on ingested documents.
+
+    Args:
+        query (str): Query to search for
+        mode (SearchMode): "dense" (default) matches meaning, "hybrid" both meaning and exact terms such as part numbers, "sparse" only exact terms
+
+    Returns:
+        list[SearchResult]: List of search results. Each result contains the document, source, and score.
+    """
+    return search_documents(query, mode)
@@ -1,5 +1,10 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
+# "dense" ranks by embedding distance, "sparse" by BM25 and "hybrid" fuses both
+type SearchMode = Literal["dense", "sparse", "hybrid"]
+
 
 class SearchResult(BaseModel):
     """
@@ -0,0 +1,362 @@
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from typing import Literal
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+from graph_examples.logger import get_logger
+
+VECTOR_INDEX_FILENAME = "vector_index.sqlite"
+FULL_VECTORS_FILENAME = "full_vectors.sqlite"
+
+# SQLite limits the number of parameters of a statement
+_BATCH_SIZE = 500
+
+# Rows of int8 codes converted to float32 at a time during a search
+_SCAN_BLOCK = 4096
+
+# Element type of the compact vectors of each mode
+_DTYPES: dict[str, type[np.generic]] = {
+    "matryoshka": np.float32,
+    "int8": np.int8,
+    "binary": np.uint8,
+}
+
+# Native dimensions of text-embedding-3-small
+_SMALL_MODEL_DIMENSIONS = 1536
+
+
+class VectorIndexOptions(BaseModel):
+    """
+    Options of the first-pass vector index searched before rescoring.
+    """
+
+    mode: Literal["full", "matryoshka", "int8", "binary", "small_model"] = Field(
+        default="full",
+        description="'full' searches the full-precision vectors in Chroma, the other modes first search compact vectors, or text-embedding-3-small vectors in the experimental 'small_model', and rescore the best candidates with the full-precision ones. 'small_model' embeds every chunk and query twice and is not a latency optimisation in general, see benchmarks/bench_two_tier_search.py",
+    )
+    dimensions: int = Field(
+        default=512,
+        ge=64,
+        le=3072,
+        description="Leading Matryoshka dimensions kept in the compact vectors, or dimensions of the text-embedding-3-small vectors in 'small_model'",
+    )
+    rescore_factor: int = Field(
+        default=4, ge=1, description="Candidates rescored per requested result"
+    )
+
+    @classmethod
+    def from_env(cls) -> "VectorIndexOptions":
+        """
+        Build the options from RAG_INDEX_<OPTION> environment variables, e.g. RAG_INDEX_MODE.
+        """
+        values = {
+            name: os.environ[f"RAG_INDEX_{name.upper()}"]
+            for name in cls.model_fields
+            if f"RAG_INDEX_{name.upper()}" in os.environ
+        }
+        return cls(**values)
+
+    @model_validator(mode="after")
+    def _check_small_model_dimensions(self) -> "VectorIndexOptions":
+        if self.mode == "small_model" and self.dimensions > _SMALL_MODEL_DIMENSIONS:
+            raise ValueError(
+                f"text-embedding-3-small has at most {_SMALL_MODEL_DIMENSIONS} "
+                "dimensions"
+            )
+        return self
+
+
+class CompactVectorIndex:
+    """
+    In-memory index of truncated and optionally quantized embeddings.
+
+    text-embedding-3 models are trained with Matryoshka representation learning,
+    so the leading dimensions of a vector, renormalized, are an embedding on their
+    own. "matryoshka" keeps them as float32, "int8" quantizes them to 8 bits per
+    dimension with a scale per vector, compared with the float32 query, and
+    "binary" to their sign bit, compared by Hamming distance. The
+    compact vectors are persisted in SQLite and loaded at startup; the search is
+    an exhaustive scan, which is exact on the compact vectors and needs no graph
+    index. Chroma still keeps the full-precision vectors and their HNSW index, so
+    the compact vectors add to the memory of the "full" mode.
+    """
+
+    def __init__(self, path: str, options: VectorIndexOptions) -> None:
+        """
+        Initialize the CompactVectorIndex.
+
+        Args:
+            path (str): SQLite file persisting the compact vectors, ":memory:" to
+                keep them in memory only.
+            options (VectorIndexOptions): Mode and dimensions of the compact vectors.
+        """
+        if options.mode in ("full", "small_model"):
+            raise ValueError(f"The {options.mode} mode searches Chroma collections")
+        self.logger = get_logger(__name__)
+        self.options = options
+        self._signature = f"{options.mode}:{options.dimensions}"
+        self._lock = threading.Lock()
+        # One row per chunk, the row of a chunk id is in _rows
+        self._matrix = np.empty((0, self._width()), dtype=self._dtype())
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "chunk_id TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            row = self._conn.execute(
+                "SELECT value FROM settings WHERE key = 'signature'"
+            ).fetchone()
+            # Vectors of another mode or dimension cannot be compared
+            if row is not None and row[0] != self._signature:
+                self.logger.info(
+                    "Vector index mode changed from %s to %s, rebuilding it",
+                    row[0],
+                    self._signature,
+                )
+                self._conn.execute("DELETE FROM vectors")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('signature', ?)",
+                (self._signature,),
+            )
+        rows = self._conn.execute("SELECT chunk_id, vector FROM vectors").fetchall()
+        if rows:
+            self._ids = [row[0] for row in rows]
+            self._rows = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+            self._matrix = np.frombuffer(
+                b"".join(row[1] for row in rows), dtype=self._dtype()
+            ).reshape(len(rows), self._width())
+            # frombuffer is read-only, rows are replaced in place
+            self._matrix = self._matrix.copy()
+
+    def _dtype(self) -> type[np.generic]:
+        return _DTYPES[self.options.mode]
+
+    def _width(self) -> int:
+        if self.options.mode == "binary":
+            return (self.options.dimensions + 7) // 8
+        if self.options.mode == "int8":
+            # The float32 scale is stored in the last 4 bytes of the row
+            return self.options.dimensions + 4
+        return self.options.dimensions
+
+    def _truncate(self, vectors: np.ndarray) -> np.ndarray:
+        truncated = np.asarray(vectors, dtype=np.float32)[:, : self.options.dimensions]
+        norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+        normalized: np.ndarray = truncated / np.where(norms == 0, 1, norms)
+        return normalized
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Returns the compact vectors of full-precision embeddings, one per row.
+        """
+        truncated = self._truncate(vectors)
+        if self.options.mode == "int8":
+            # The components of a unit vector are far below 1, so each vector is
+            # scaled to use the whole int8 range
+            scales = np.abs(truncated).max(axis=1, keepdims=True) / 127
+            scales = np.where(scales == 0, 1, scales).astype(np.float32)
+            codes = np.round(truncated / scales).astype(np.int8)
+            return np.concatenate([codes, scales.view(np.int8)], axis=1)
+        if self.options.mode == "binary":
+            return np.packbits(truncated > 0, axis=1)
+        return truncated
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the memory used by the compact vectors.
+        """
+        return int(self._matrix.nbytes)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def ids(self) -> list[str]:
+        """
+        Returns the indexed chunk ids.
+        """
+        with self._lock:
+            return list(self._ids)
+
+    def add(self, chunk_ids: list[str], vectors: np.ndarray) -> None:
+        """
+        Index the full-precision embeddings under their chunk ids.
+        """
+        if not chunk_ids:
+            return
+        if vectors.shape[1] < self.options.dimensions:
+            raise ValueError(
+                f"Embeddings have {vectors.shape[1]} dimensions, the vector index "
+                f"keeps {self.options.dimensions}"
+            )
+        compact = self.encode(vectors)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?)",
+                (
+                    (chunk_id, vector.tobytes())
+                    for chunk_id, vector in zip(chunk_ids, compact, strict=True)
+                ),
+            )
+            new_rows = []
+            for chunk_id, vector in zip(chunk_ids, compact, strict=True):
+                row = self._rows.get(chunk_id)
+                if row is not None:
+                    self._matrix[row] = vector
+                else:
+                    self._rows[chunk_id] = len(self._ids)
+                    self._ids.append(chunk_id)
+                    new_rows.append(vector)
+            if new_rows:
+                # Searches keep the matrix they started with
+                self._matrix = np.concatenate([self._matrix, np.stack(new_rows)])
+
+    def delete(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Remove the chunks from the index.
+        """
+        chunk_ids = list(chunk_ids)
+        with self._lock, self._conn:
+            for start in range(0, len(chunk_ids), _BATCH_SIZE):
+                batch = chunk_ids[start : start + _BATCH_SIZE]
+                self._conn.execute(
+                    "DELETE FROM vectors WHERE chunk_id IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                )
+            removed = {self._rows[id] for id in chunk_ids if id in self._rows}
+            if removed:
+                keep = np.ones(len(self._ids), dtype=bool)
+                keep[list(removed)] = False
+                self._matrix = self._matrix[keep]
+                self._ids = [
+                    id for id, kept in zip(self._ids, keep, strict=True) if kept
+                ]
+                self._rows = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+
+    def search(self, query_vector: np.ndarray, n: int) -> list[str]:
+        """
+        Returns the ids of the n chunks closest to the query on the compact vectors.
+        """
+        with self._lock:
+            matrix, ids = self._matrix, self._ids
+        if not ids:
+            return []
+
+        if self.options.mode == "binary":
+            query = self.encode(query_vector[np.newaxis])[0]
+            # Hamming distance, lower is closer
+            scores = -np.bitwise_count(matrix ^ query).sum(axis=1, dtype=np.int32)
+        elif self.options.mode == "int8":
+            query = self._truncate(query_vector[np.newaxis])[0]
+            dimensions = self.options.dimensions
+            scores = np.empty(len(matrix), dtype=np.float32)
+            # Convert a block at a time, a float32 copy of the codes would take
+            # the memory saved by quantizing them
+            for start in range(0, len(matrix), _SCAN_BLOCK):
+                block = matrix[start : start + _SCAN_BLOCK]
+                scales = block[:, dimensions:].copy().view(np.float32)[:, 0]
+                codes = block[:, :dimensions].astype(np.float32)
+                scores[start : start + len(block)] = (codes @ query) * scales
+        else:
+            scores = matrix @ self._truncate(query_vector[np.newaxis])[0]
+        n = min(n, len(matrix))
+        best = np.argpartition(-scores, n - 1)[:n]
+        return [ids[i] for i in best[np.argsort(-scores[best], kind="stable")]]
+
+
+class FullVectorStore:
+    """
+    Full-precision embeddings of the chunks, read by id to rescore candidates.
+
+    Chroma returns stored embeddings as Python lists converted to numpy, which
+    costs about 0.3 ms per 3072-dimension vector. The vectors are kept here as
+    float32 blobs in SQLite instead, read straight into a matrix. They stay on
+    disk, only the rows of the candidates are read during a search.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the FullVectorStore.
+
+        Args:
+            path (str): SQLite file of the vectors, ":memory:" to keep them in
+                memory only.
+        """
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "chunk_id TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def ids(self) -> list[str]:
+        """
+        Returns the stored chunk ids.
+        """
+        with self._lock:
+            return [
+                row[0] for row in self._conn.execute("SELECT chunk_id FROM vectors")
+            ]
+
+    def add(self, chunk_ids: list[str], vectors: np.ndarray) -> None:
+        """
+        Store the embeddings under their chunk ids, replacing existing ones.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?)",
+                (
+                    (chunk_id, vector.tobytes())
+                    for chunk_id, vector in zip(chunk_ids, vectors, strict=True)
+                ),
+            )
+
+    def delete(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Remove the chunks from the store.
+        """
+        chunk_ids = list(chunk_ids)
+        with self._lock, self._conn:
+            for start in range(0, len(chunk_ids), _BATCH_SIZE):
+                batch = chunk_ids[start : start + _BATCH_SIZE]
+                self._conn.execute(
+                    "DELETE FROM vectors WHERE chunk_id IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                )
+
+    def get(self, chunk_ids: list[str]) -> tuple[list[str], np.ndarray]:
+        """
+        Returns the ids found among chunk_ids and their vectors, one per row.
+        """
+        rows = []
+        with self._lock:
+            for start in range(0, len(chunk_ids), _BATCH_SIZE):
+                batch = chunk_ids[start : start + _BATCH_SIZE]
+                rows += self._conn.execute(
+                    "SELECT chunk_id, vector FROM vectors WHERE chunk_id IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+        return [row[0] for row in rows], vectors.reshape(len(rows), -1)
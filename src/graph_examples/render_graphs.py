@@ -0,0 +1,107 @@
+import hashlib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+from langgraph.graph.state import CompiledStateGraph
+
+from graph_examples.logger import get_logger
+
+load_dotenv(override=True)
+logger = get_logger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+
+
+def _doc_gen_graph() -> CompiledStateGraph[Any]:
+    from graph_examples.doc_generator.doc_gen import DocGen
+
+    return DocGen().graph
+
+
+def _rag_search_graph() -> CompiledStateGraph[Any]:
+    from graph_examples.rag_search.rag_search import RagSearch
+
+    return RagSearch().graph
+
+
+def _review_product_graph() -> CompiledStateGraph[Any]:
+    from graph_examples.review_product.editorial_board import EditorialBoard
+
+    return EditorialBoard().graph
+
+
+# (graph builder, output png, render subgraphs)
+GRAPH_TARGETS: dict[str, tuple[Callable[[], CompiledStateGraph[Any]], Path, bool]] = {
+    "doc_gen": (
+        _doc_gen_graph,
+        PACKAGE_DIR / "doc_generator" / "doc_gen_graph.png",
+        False,
+    ),
+    "rag_search": (
+        _rag_search_graph,
+        PACKAGE_DIR / "rag_search" / "rag_search_graph.png",
+        False,
+    ),
+    "review_product": (
+        _review_product_graph,
+        PACKAGE_DIR / "review_product" / "review_product_graph.png",
+        True,
+    ),
+}
+
+
+def topology_hash(graph: CompiledStateGraph[Any], xray: bool = False) -> str:
+    """
+    Returns a hash of the graph topology (nodes and edges) as mermaid text.
+    """
+    mermaid = graph.get_graph(xray=xray).draw_mermaid()
+    return hashlib.sha256(mermaid.encode("utf-8")).hexdigest()
+
+
+def render_graph(
+    graph: CompiledStateGraph[Any], output_path: Path, xray: bool = False
+) -> bool:
+    """
+    Render the graph diagram to output_path unless the cached render is current.
+
+    Args:
+        graph (CompiledStateGraph): Compiled graph to render.
+        output_path (Path): Destination PNG file.
+        xray (bool, optional): Render subgraphs too. Defaults to False.
+
+    Returns:
+        bool: True if the PNG was (re)rendered, False if the cached PNG was reused.
+    """
+    digest = topology_hash(graph, xray=xray)
+    # The topology hash is stored next to the PNG as the cache key
+    hash_path = output_path.with_suffix(".sha256")
+    if (
+        output_path.exists()
+        and hash_path.exists()
+        and hash_path.read_text().strip() == digest
+    ):
+        logger.info("%s is up to date", output_path.name)
+        return False
+
+    png_data = graph.get_graph(xray=xray).draw_mermaid_png()
+    output_path.write_bytes(png_data)
+    hash_path.write_text(digest + "\n")
+    logger.info("Rendered %s", output_path)
+    return True
+
+
+def main() -> None:
+    """
+    Render the diagrams of all example graphs (build time only, not on request paths).
+    """
+    for name, (build, output_path, xray) in GRAPH_TARGETS.items():
+        try:
+            render_graph(build(), output_path, xray=xray)
+        except Exception as e:
+            logger.exception("Could not render graph %s: %s", name, e)
+
+
+if __name__ == "__main__":
+    main()
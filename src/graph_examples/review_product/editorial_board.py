@@ -1,8 +1,10 @@
+import copy
 import os
 import re
-from functools import partial
+from functools import cache, partial
 
 from langchain_core.messages import AnyMessage, HumanMessage
+from langchain_core.runnables.graph import Graph
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
@@ -54,17 +56,49 @@ class EditorialBoard:
         self._graph = self._build_graph()
 
         # optional tracing
-        self._tracer = None
+        self._xray_graph: Graph | None = None
+        self._tracer = self._setup_tracer(trace_project_name)
+
+    @classmethod
+    @cache
+    def shared(cls) -> "EditorialBoard":
+        """
+        Returns the board without a tracer that is built once per process, the
+        compiled graph holds no per-session state and can be shared.
+        """
+        return cls()
+
+    def with_tracer(self, trace_project_name: str) -> "EditorialBoard":
+        """
+        Returns a copy of the board that shares the compiled graph but has its own
+        Opik tracer, so a cached board can be traced per session.
+        """
+        board = copy.copy(self)
+        board._tracer = self._setup_tracer(trace_project_name)
+        return board
+
+    def _setup_tracer(self, trace_project_name: str | None) -> OpikTracer | None:
+        """Setup tracer for tracing the graph"""
         if trace_project_name and os.getenv("OPIK_API_KEY"):
             try:
+                # The xray graph is drawn once and reused by every tracer
+                if self._xray_graph is None:
+                    self._xray_graph = self._graph.get_graph(xray=True)
                 # Instantiate OpikTracer
-                self._tracer = OpikTracer(
-                    graph=self._graph.get_graph(xray=True),
+                return OpikTracer(
+                    graph=self._xray_graph,
                     project_name=trace_project_name,
                 )
             except Exception as e:
                 self.logger.warning(f"Failed to initialize tracer: {e}")
 
+        return None
+
+    @property
+    def graph(self) -> CompiledStateGraph[EditorialBoardState]:
+        """Compiled super graph of the editorial board"""
+        return self._graph
+
     def _build_graph(self) -> CompiledStateGraph:
         """Construct the super graph for editorial board"""
         # Build the grap
@@ -130,6 +130,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+
 # session state : analysis_completed
 if "analysis_completed" not in st.session_state:
     st.session_state.analysis_completed = False
@@ -212,7 +213,12 @@ with col_centre:
     if st.button("🚀 Compare Products", width="stretch", type="primary"):
         if product_a and product_b and product_a != product_b:
             tracer_name = Path(__file__).parent.name
-            editorial_board = EditorialBoard(trace_project_name=tracer_name)
+            # The graph is shared across sessions, the Opik tracer is not
+            if "editorial_board" not in st.session_state:
+                st.session_state.editorial_board = EditorialBoard.shared().with_tracer(
+                    tracer_name
+                )
+            editorial_board = st.session_state.editorial_board
 
             query = f"Compare {product_a} and {product_b}. Which is better?"
 
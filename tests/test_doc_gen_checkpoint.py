@@ -0,0 +1,122 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from bench_doc_gen_concurrency import StubDocGen
+from stubs import StubChatModel
+
+from graph_examples.doc_generator.doc_gen import DocGenOptions, State
+
+TOPIC = "The history of tea"
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyDocGen(StubDocGen):
+    """
+    StubDocGen whose safety evaluation is rate limited on its first call.
+    """
+
+    def __init__(self, options: DocGenOptions) -> None:
+        self.failures = 1
+        super().__init__(options)
+
+    async def _eval_safety(self, state: State) -> State:
+        if self.failures:
+            self.failures -= 1
+            try:
+                raise RateLimitError("Too Many Requests")
+            except RateLimitError as error:
+                self._raise_if_resumable(error)
+        return await super()._eval_safety(state)
+
+
+def _calls(doc_gen: StubDocGen) -> int:
+    models = (doc_gen._gllm_41, doc_gen._gllm_41_mini, doc_gen._gllm_41_nano)
+    return sum(model.calls for model in models if isinstance(model, StubChatModel))
+
+
+@pytest.mark.parametrize("generation_mode", ["single", "sections"])
+def test_run_resumes_after_rate_limit(tmp_path: Path, generation_mode: str) -> None:
+    """
+    A run failing with a 429 resumes at the failed node under the same thread id.
+    """
+    options = DocGenOptions(
+        checkpoint=True,
+        checkpoint_path=str(tmp_path / "checkpoints.sqlite"),
+        generation_mode=generation_mode,  # type: ignore[arg-type]
+        cached_nodes=[],
+    )
+
+    async def run() -> None:
+        doc_gen = FlakyDocGen(options)
+        with pytest.raises(RateLimitError):
+            await doc_gen.arun(TOPIC, "thread-1")
+        graph = doc_gen._checkpointed_graph()
+        snapshot = await graph.aget_state(doc_gen._run_config("thread-1"))
+        assert "eval_safety" in snapshot.next
+        calls_before_resume = _calls(doc_gen)
+        resumed = doc_gen.metrics.counter("runs_resumed")
+
+        response, evaluation = await doc_gen.respond(TOPIC, "thread-1")
+
+        assert response.startswith("Stub document text")
+        assert "Safety: 3" in evaluation
+        assert doc_gen.metrics.counter("runs_resumed") == resumed + 1
+        # Only the evaluation step that failed runs again, the outline and the
+        # document are not regenerated
+        assert _calls(doc_gen) - calls_before_resume <= 3
+        # Completed runs do not keep their checkpoints
+        snapshot = await graph.aget_state(doc_gen._run_config("thread-1"))
+        assert not snapshot.values
+        await doc_gen.aclose()
+
+    asyncio.run(run())
+
+
+def test_other_topic_on_same_thread_starts_over(tmp_path: Path) -> None:
+    """
+    A failed run is not resumed for a different topic.
+    """
+    options = DocGenOptions(
+        checkpoint=True,
+        checkpoint_path=str(tmp_path / "checkpoints.sqlite"),
+        cached_nodes=[],
+    )
+
+    async def run() -> None:
+        doc_gen = FlakyDocGen(options)
+        with pytest.raises(RateLimitError):
+            await doc_gen.arun(TOPIC, "thread-1")
+        resumed = doc_gen.metrics.counter("runs_resumed")
+
+        response, _ = await doc_gen.respond("The history of coffee", "thread-1")
+
+        assert response.startswith("Stub document text")
+        assert doc_gen.metrics.counter("runs_resumed") == resumed
+        await doc_gen.aclose()
+
+    asyncio.run(run())
+
+
+def test_concurrent_topics_do_not_serialise() -> None:
+    """
+    N simultaneous topics take about as long as one, not N times as long.
+    """
+    doc_gen = StubDocGen(DocGenOptions(cached_nodes=[]))
+
+    async def run(n: int) -> float:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(doc_gen.respond(f"The history of topic number {i}") for i in range(n))
+        )
+        assert all(response for response, _ in results)
+        return time.perf_counter() - start
+
+    single = asyncio.run(run(1))
+    eight = asyncio.run(run(8))
+
+    assert eight < 3 * single
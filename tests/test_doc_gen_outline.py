@@ -0,0 +1,92 @@
+from graph_examples.doc_generator.doc_gen_outline import (
+    iter_leaves,
+    parse_outline,
+    validate_outline_structure,
+)
+
+OUTLINE = """1. Introduction
+1.1 Background
+
+**2. History**
+2.1 Origins
+2.1.1 Early trade
+2.2 Spread
+
+## 3. Conclusion
+3.1 Summary"""
+
+
+def test_parse_outline_nests_numbered_sections() -> None:
+    """
+    Subsections are attached to their parent and unnumbered lines are ignored.
+    """
+    sections = parse_outline(f"Here is the outline:\n{OUTLINE}\nThanks")
+
+    assert [section.number for section in sections] == ["1", "2", "3"]
+    assert [section.title for section in sections] == [
+        "Introduction",
+        "History",
+        "Conclusion",
+    ]
+    origins = sections[1].subsections[0]
+    assert origins.heading == "2.1 Origins"
+    assert [section.heading for section in origins.subsections] == ["2.1.1 Early trade"]
+    assert sections[1].heading == "2. History"
+
+
+def test_parse_outline_without_numbered_lines_is_empty() -> None:
+    """
+    Text that is not a numbered outline parses to no sections.
+    """
+    assert parse_outline("I cannot write an outline for this topic.") == []
+
+
+def test_render_round_trips_through_parse() -> None:
+    """
+    A rendered outline parses back to the same sections.
+    """
+    sections = parse_outline(OUTLINE)
+    rendered = "\n".join(section.render() for section in sections)
+
+    assert parse_outline(rendered) == sections
+
+
+def test_iter_leaves_yields_sections_without_subsections_in_order() -> None:
+    """
+    Leaves are yielded in document order with their ancestors.
+    """
+    leaves = [
+        ([ancestor.number for ancestor in ancestors], leaf.number)
+        for ancestors, leaf in iter_leaves(parse_outline(OUTLINE))
+    ]
+
+    assert leaves == [
+        (["1"], "1.1"),
+        (["2", "2.1"], "2.1.1"),
+        (["2"], "2.2"),
+        (["3"], "3.1"),
+    ]
+
+
+def test_valid_outline_passes() -> None:
+    """
+    An introduction, main points with subsections and a conclusion are valid.
+    """
+    assert validate_outline_structure(parse_outline(OUTLINE)) is None
+
+
+def test_outline_structure_errors() -> None:
+    """
+    Each structural requirement is reported when it is not met.
+    """
+    cases = {
+        "1. Introduction\n2. Conclusion": "at least one main point",
+        "1. Overview\n2. History\n2.1 Origins\n3. Conclusion": "Introduction",
+        "1. Introduction\n2. History\n2.1 Origins\n3. Outlook": "Conclusion",
+        "1. Introduction\n2. History\n3. Conclusion": "no subsections",
+        "1. Introduction\n2. History\n2.2 Origins\n3. Conclusion": "2.1",
+        "1. Introduction\n3. History\n3.1 Origins\n4. Conclusion": "numbered 2",
+    }
+    for outline, reason in cases.items():
+        error = validate_outline_structure(parse_outline(outline))
+        assert error is not None and reason in error, outline
@@ -0,0 +1,32 @@
+import pytest
+
+from graph_examples.doc_generator.doc_gen_topic_filter import (
+    TopicDecision,
+    TopicPreFilter,
+)
+
+
+@pytest.mark.parametrize(
+    "topic",
+    [
+        "History of the Roman Empire",
+        "Photosynthesis",
+        "Why women are bad at science",
+        "Money laundering methods",
+        "Flask web framework",
+        "機械学習",
+    ],
+)
+def test_possible_topics_reach_the_llm_validator(topic: str) -> None:
+    """
+    Anything that may be a topic is escalated, whether it is suitable or not.
+    """
+    assert TopicPreFilter().classify(topic) is TopicDecision.ESCALATE
+
+
+@pytest.mark.parametrize("topic", ["asdf", "qwrtp zxcvb lkjhg", "!!!!", "12345"])
+def test_gibberish_is_rejected_locally(topic: str) -> None:
+    """
+    Keyboard mashing, symbols and numbers are rejected without an LLM call.
+    """
+    assert TopicPreFilter().classify(topic) is TopicDecision.REJECT
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from graph_examples.rag_search.bm25_index import BM25Index
+from graph_examples.rag_search.chroma_interface import _reciprocal_rank_fusion
+
+CHUNKS = {
+    "pump": "Replace the XJ-200 pump seal every 500 hours of operation.",
+    "valve": "The relief valve opens when the pressure exceeds the set point.",
+    "manual": "This manual describes the pump and the valve of the unit.",
+}
+
+
+def _index(path: Path) -> BM25Index:
+    index = BM25Index(str(path / "bm25_index.sqlite"))
+    index.add(
+        list(CHUNKS),
+        [
+            Document(page_content=text, metadata={"source": f"{chunk_id}.pdf"})
+            for chunk_id, text in CHUNKS.items()
+        ],
+    )
+    return index
+
+
+def _ids(results: list[tuple[Document, float]]) -> list[str | None]:
+    return [document.id for document, _ in results]
+
+
+def test_bm25_ranks_rarer_terms_higher(tmp_path: Path) -> None:
+    """
+    Chunks matching the rarer query terms come first, with positive scores.
+    """
+    results = _index(tmp_path).search("seal of the pump", k=3)
+
+    assert _ids(results) == ["pump", "manual"]
+    assert results[0][1] > results[1][1] > 0
+    assert results[0][0].metadata == {"source": "pump.pdf"}
+
+
+def test_bm25_matches_part_numbers_as_one_token(tmp_path: Path) -> None:
+    """
+    Hyphenated part numbers match as a whole, and stop words alone still search.
+    """
+    index = _index(tmp_path)
+
+    assert _ids(index.search("xj-200", k=3)) == ["pump"]
+    assert _ids(index.search("200", k=3)) == []
+    assert index.search("the", k=3)
+
+
+def test_bm25_delete_and_reopen(tmp_path: Path) -> None:
+    """
+    Deleted chunks are no longer found, and the index is persisted.
+    """
+    _index(tmp_path).delete(["pump"])
+
+    reopened = BM25Index(str(tmp_path / "bm25_index.sqlite"))
+
+    assert _ids(reopened.search("pump", k=3)) == ["manual"]
+    assert not reopened.is_empty()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    """
+    A document ranked by both lists beats documents ranked first by only one.
+    """
+    a, b, c = (Document(page_content=text, id=text) for text in "abc")
+
+    fused = _reciprocal_rank_fusion([[a, b], [c, b]], k=3)
+
+    assert _ids(fused) == ["b", "a", "c"]
+    assert fused[0][1] == 2 / 62
+    assert fused[1][1] == fused[2][1] == 1 / 61
+
+
+def test_reciprocal_rank_fusion_keeps_k_and_falls_back_to_text() -> None:
+    """
+    Documents without an id are fused by their text, and only k are returned.
+    """
+    dense = [Document(page_content="same"), Document(page_content="other")]
+    sparse = [Document(page_content="same")]
+
+    fused = _reciprocal_rank_fusion([dense, sparse], k=1)
+
+    assert [document.page_content for document, _ in fused] == ["same"]
@@ -0,0 +1,86 @@
+from graph_examples.rag_search.query_cache import QueryResultCache
+from graph_examples.rag_search.types import ListOfSearchedResults, SearchResult
+
+
+def _results(text: str) -> ListOfSearchedResults:
+    return ListOfSearchedResults(
+        results=[SearchResult(document=text, source="notes.pdf", score=0.5)]
+    )
+
+
+def test_hit_at_same_generation_ignores_case_and_whitespace() -> None:
+    """
+    A query is served at the generation it was stored at, whatever its spacing.
+    """
+    cache = QueryResultCache()
+    cache.put("What is RAG?", 3, _results("old"), [{"rank": 1}])
+
+    cached = cache.get("  what IS   rag? ", 3)
+
+    assert cached is not None
+    search_results, reranked = cached
+    assert search_results.results[0].document == "old"
+    assert reranked == [{"rank": 1}]
+
+
+def test_new_generation_invalidates_entry() -> None:
+    """
+    Results stored before a write are not served, and are evicted, after it.
+    """
+    cache = QueryResultCache()
+    cache.put("What is RAG?", 3, _results("old"), [])
+
+    assert cache.get("What is RAG?", 4) is None
+    # The stale entry was removed, it is not served at its own generation either
+    assert cache.get("What is RAG?", 3) is None
+
+
+def test_older_generation_does_not_replace_newer_results() -> None:
+    """
+    A slow query computed before a write keeps the newer results in place.
+    """
+    cache = QueryResultCache()
+    cache.put("What is RAG?", 5, _results("new"), [])
+    cache.put("What is RAG?", 4, _results("old"), [])
+
+    cached = cache.get("What is RAG?", 5)
+
+    assert cached is not None
+    assert cached[0].results[0].document == "new"
+
+
+def test_callers_get_copies() -> None:
+    """
+    Changing returned results does not change the cached ones.
+    """
+    cache = QueryResultCache()
+    cache.put("What is RAG?", 1, _results("old"), [{"rank": 1}])
+
+    first = cache.get("What is RAG?", 1)
+    assert first is not None
+    first[0].results.clear()
+    first[1].clear()
+
+    second = cache.get("What is RAG?", 1)
+    assert second is not None
+    assert len(second[0].results) == 1
+    assert second[1] == [{"rank": 1}]
+
+
+def test_ttl_and_max_entries() -> None:
+    """
+    Expired entries miss and the least recently used entry is evicted.
+    """
+    expired = QueryResultCache(ttl_seconds=-1)
+    expired.put("What is RAG?", 1, _results("old"), [])
+    assert expired.get("What is RAG?", 1) is None
+
+    cache = QueryResultCache(max_entries=2)
+    cache.put("first", 1, _results("first"), [])
+    cache.put("second", 1, _results("second"), [])
+    assert cache.get("first", 1) is not None
+    cache.put("third", 1, _results("third"), [])
+
+    assert cache.get("second", 1) is None
+    assert cache.get("first", 1) is not None
+    assert cache.get("third", 1) is not None
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from graph_examples.rag_search.vector_index import (
+    CompactVectorIndex,
+    FullVectorStore,
+    VectorIndexOptions,
+)
+
+DIMENSIONS = 256
+
+
+def _vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSIONS))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode", ["matryoshka", "int8", "binary"])
+def test_compact_index_round_trip(tmp_path: Path, mode: str) -> None:
+    """
+    Reopened indexes hold the same compact vectors and find the same neighbours.
+    """
+    path = str(tmp_path / "vector_index.sqlite")
+    options = VectorIndexOptions(mode=mode, dimensions=64)  # type: ignore[arg-type]
+    vectors = _vectors(50)
+    ids = [f"chunk-{i}" for i in range(50)]
+    index = CompactVectorIndex(path, options)
+    index.add(ids, vectors)
+
+    reopened = CompactVectorIndex(path, options)
+
+    assert sorted(reopened.ids()) == sorted(ids)
+    assert reopened.nbytes == index.nbytes
+    for i in range(0, 50, 7):
+        assert reopened.search(vectors[i], 1) == [ids[i]]
+        assert reopened.search(vectors[i], 5) == index.search(vectors[i], 5)
+
+
+def test_compact_index_replace_and_delete_are_persisted(tmp_path: Path) -> None:
+    """
+    Replaced and deleted chunks are reloaded as they were left.
+    """
+    path = str(tmp_path / "vector_index.sqlite")
+    options = VectorIndexOptions(mode="int8", dimensions=64)
+    vectors = _vectors(3)
+    index = CompactVectorIndex(path, options)
+    index.add(["a", "b", "c"], vectors)
+    index.add(["a"], vectors[2:3])
+    index.delete(["c"])
+
+    reopened = CompactVectorIndex(path, options)
+
+    assert sorted(reopened.ids()) == ["a", "b"]
+    assert reopened.search(vectors[2], 1) == ["a"]
+
+
+def test_compact_index_is_rebuilt_when_mode_changes(tmp_path: Path) -> None:
+    """
+    Vectors of another mode or dimension are dropped instead of compared.
+    """
+    path = str(tmp_path / "vector_index.sqlite")
+    CompactVectorIndex(path, VectorIndexOptions(mode="binary", dimensions=64)).add(
+        ["a"], _vectors(1)
+    )
+
+    assert len(CompactVectorIndex(path, VectorIndexOptions(mode="binary"))) == 0
+
+
+def test_compact_index_rejects_shorter_embeddings() -> None:
+    """
+    Embeddings must have at least the dimensions kept by the index.
+    """
+    index = CompactVectorIndex(":memory:", VectorIndexOptions(mode="matryoshka"))
+
+    with pytest.raises(ValueError, match="dimensions"):
+        index.add(["a"], _vectors(1))
+
+
+def test_full_vector_store_round_trip(tmp_path: Path) -> None:
+    """
+    Stored vectors are read back exactly, missing ids are skipped.
+    """
+    path = str(tmp_path / "full_vectors.sqlite")
+    vectors = _vectors(3)
+    FullVectorStore(path).add(["a", "b", "c"], vectors)
+    store = FullVectorStore(path)
+    store.delete(["b"])
+
+    ids, found = store.get(["c", "b", "a", "missing"])
+
+    assert sorted(store.ids()) == ["a", "c"]
+    assert sorted(ids) == ["a", "c"]
+    for chunk_id, vector in zip(ids, found, strict=True):
+        np.testing.assert_array_equal(vector, vectors["abc".index(chunk_id)])
+    assert store.get(["missing"])[0] == []